@@ -0,0 +1,312 @@
+"""
+Revenue amount extraction shared by the forecast, sales-ops and revenue scripts.
+
+`extract_batch` pulls numeric amounts out of memory content (JSON fields
+first, then `key: value` pairs, then bare numbers). `AmountCache` persists
+the result per content hash in SQLite, together with the stage a keyword
+classifier assigned, so notes that did not change since the last run are
+never parsed again. Bump `EXTRACTOR_VERSION` whenever extraction rules
+change; opening a cache written by another version discards its entries.
+
+License: Apache 2.0
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import re
+import sqlite3
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional acceleration
+    np = None
+
+from _shared import KeywordClassifier, state_dir
+
+# 1: per-memory extractor; 2: batched, digit-led numbers, word-safe suffixes.
+EXTRACTOR_VERSION = 2
+
+AMOUNT_KEYS = ("arr", "mrr", "revenue", "amount", "value", "uplift", "delta")
+JSON_AMOUNT_KEYS = frozenset({"arr", "mrr", "revenue", "amount"})
+# Patterns run over lower-cased content: without IGNORECASE the regex engine
+# can skip ahead to positions that start with a key letter or a digit.
+# A number must start with a digit (a lone "," is not an amount) and a scale
+# suffix only counts when it does not start a word ("12 months").
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)\s*(?:(k|mm|m|b)(?![a-z]))?"
+AMOUNT_KEY_PATTERN = re.compile(r"(?:" + "|".join(AMOUNT_KEYS) + r")\s*[:=]\s*\$?\s*" + _NUMBER)
+VALUE_PATTERN = re.compile(_NUMBER)
+# One pass finds keyed amounts (groups 1-2) and bare numbers (groups 3-4);
+# keyed amounts win when a memory has any.
+COMBINED_AMOUNT_PATTERN = re.compile(AMOUNT_KEY_PATTERN.pattern + "|" + VALUE_PATTERN.pattern)
+SUFFIX_SCALE = {"k": 1_000.0, "m": 1_000_000.0, "mm": 1_000_000.0, "b": 1_000_000_000.0}
+
+# SQLite limits bound parameters per statement; look hashes up in slices.
+_LOOKUP_CHUNK = 500
+
+
+def coerce_value(raw: str, suffix: Optional[str]) -> float:
+    value = float(raw.replace(",", ""))
+    if suffix:
+        value *= SUFFIX_SCALE.get(suffix.lower(), 1.0)
+    return value
+
+
+def parse_json_amounts(content: str) -> List[float]:
+    """Attempt to read JSON objects/dicts for numeric fields."""
+    matches: List[float] = []
+    # Cheap pre-screen: only documents that open like an object/array are parsed.
+    if content.lstrip()[:1] not in ("{", "["):
+        return matches
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return matches
+
+    def collect(obj):
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                if isinstance(value, (int, float)) and key.lower() in JSON_AMOUNT_KEYS:
+                    matches.append(float(value))
+                else:
+                    collect(value)
+        elif isinstance(obj, list):
+            for item in obj:
+                collect(item)
+
+    collect(data)
+    return matches
+
+
+def extract_amounts(content: str) -> Tuple[List[float], bool]:
+    """Return numeric amounts and flag whether detection was heuristic."""
+    batch = extract_batch([content])
+    return batch.amounts(0), bool(batch.heuristic[0])
+
+
+class AmountBatch:
+    """
+    Amounts extracted from a batch of memories, stored as typed arrays.
+
+    Attributes:
+        values: Every extracted amount, memory after memory (``array('d')``)
+        offsets: ``values[offsets[i]:offsets[i + 1]]`` belong to memory ``i``
+        means: Mean amount per memory, NaN when nothing was found
+        heuristic: 1 where the memory's amounts came from text patterns
+    """
+
+    def __init__(self, size: int):
+        self.values = array("d")
+        self.offsets = array("q", [0])
+        self.means = array("d")
+        self.heuristic = array("b")
+        self.size = size
+
+    def amounts(self, index: int) -> List[float]:
+        return list(self.values[self.offsets[index]:self.offsets[index + 1]])
+
+    def found(self, index: int) -> bool:
+        return self.offsets[index + 1] > self.offsets[index]
+
+    def append(self, amounts: Sequence[float], heuristic: bool) -> None:
+        self.values.extend(amounts)
+        self.offsets.append(len(self.values))
+        self.means.append(math.fsum(amounts) / len(amounts) if amounts else math.nan)
+        self.heuristic.append(1 if heuristic else 0)
+
+    def total(self) -> float:
+        """Sum of per-memory means, skipping memories without amounts."""
+        if not self.means:
+            return 0.0
+        if np is not None:
+            means = np.frombuffer(self.means, dtype=np.float64)
+            return float(np.nansum(means))
+        return math.fsum(value for value in self.means if value == value)
+
+
+def extract_batch(contents: Sequence[str]) -> AmountBatch:
+    """
+    Extract amounts for many memories in one pass over the batch.
+
+    Memories are pre-screened for JSON by their first non-blank character,
+    and everything else goes through a single combined keyed/plain pattern,
+    so each memory costs one regex scan and no exception handling.
+    """
+    batch = AmountBatch(len(contents))
+    values, offsets, means, heuristic = batch.values, batch.offsets, batch.means, batch.heuristic
+    findall = COMBINED_AMOUNT_PATTERN.findall
+    scale = SUFFIX_SCALE
+    nan = float("nan")
+    for content in contents:
+        amounts = parse_json_amounts(content)
+        flag = 0
+        if not amounts:
+            keyed: List[float] = []
+            plain: List[float] = []
+            for key_raw, key_suffix, raw, suffix in findall(content.lower()):
+                if key_raw:
+                    value = float(key_raw.replace(",", ""))
+                    if key_suffix:
+                        value *= scale[key_suffix]
+                    keyed.append(value)
+                elif not keyed:
+                    value = float(raw.replace(",", ""))
+                    if suffix:
+                        value *= scale[suffix]
+                    if value:
+                        plain.append(value)
+            amounts = keyed or plain
+            flag = 1 if amounts else 0
+        values.extend(amounts)
+        offsets.append(len(values))
+        means.append(math.fsum(amounts) / len(amounts) if amounts else nan)
+        heuristic.append(flag)
+    return batch
+
+
+def content_hash(content: str) -> bytes:
+    return hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def default_cache_path(override: Optional[Path] = None) -> Path:
+    """Cache file: explicit path, or `amounts.sqlite3` in the shared `amount-cache` state dir."""
+    if override and Path(override).suffix:
+        return Path(override).expanduser()
+    return state_dir("amount-cache", override) / "amounts.sqlite3"
+
+
+class AmountCache:
+    """
+    Persistent content-hash -> (amounts, heuristic flag, stages) cache.
+
+    Stages are stored per classifier fingerprint, so the forecast and the
+    sales-ops snapshot can share entries while classifying differently.
+    Entries looked up once are memoised for the rest of the process.
+
+    Example:
+        >>> with AmountCache(Path("/tmp/amounts.sqlite3")) as cache:
+        ...     batch, stages = cache.extract(["Signed, mrr: 12k"], classifier, "pipeline")
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS amounts (
+                hash BLOB PRIMARY KEY,
+                amounts BLOB NOT NULL,
+                heuristic INTEGER NOT NULL,
+                stages TEXT NOT NULL DEFAULT '{}'
+            );
+            CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+        row = self._conn.execute("SELECT value FROM cache_meta WHERE key = 'extractor_version'").fetchone()
+        if row is None or row[0] != str(EXTRACTOR_VERSION):
+            self._conn.execute("DELETE FROM amounts")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('extractor_version', ?)",
+                (str(EXTRACTOR_VERSION),),
+            )
+            self._conn.commit()
+        self._memo: Dict[bytes, Tuple[array, bool, Dict[str, str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self) -> "AmountCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _load(self, hashes: Sequence[bytes]) -> None:
+        wanted = [digest for digest in dict.fromkeys(hashes) if digest not in self._memo]
+        for start in range(0, len(wanted), _LOOKUP_CHUNK):
+            chunk = wanted[start:start + _LOOKUP_CHUNK]
+            rows = self._conn.execute(
+                f"SELECT hash, amounts, heuristic, stages FROM amounts WHERE hash IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for digest, blob, heuristic, stages in rows:
+                values = array("d")
+                values.frombytes(blob)
+                self._memo[bytes(digest)] = (values, bool(heuristic), json.loads(stages))
+
+    def extract(
+        self,
+        contents: Sequence[str],
+        classifier: Optional[KeywordClassifier] = None,
+        default: str = "",
+    ) -> Tuple[AmountBatch, List[str]]:
+        """
+        Cached equivalent of `extract_batch`, optionally classifying too.
+
+        Returns:
+            (AmountBatch in input order, stage per content; empty strings
+            when no classifier is given)
+        """
+        hashes = [content_hash(content) for content in contents]
+        self._load(hashes)
+
+        missing: Dict[bytes, str] = {}
+        for digest, content in zip(hashes, contents):
+            if digest not in self._memo:
+                missing.setdefault(digest, content)
+        inserts = []
+        if missing:
+            fresh = extract_batch(list(missing.values()))
+            for position, digest in enumerate(missing):
+                values = array("d", fresh.amounts(position))
+                entry = (values, bool(fresh.heuristic[position]), {})
+                self._memo[digest] = entry
+                inserts.append(digest)
+        self.misses += len(missing)
+        self.hits += len(hashes) - len(missing)
+
+        updates = []
+        stages: List[str] = []
+        if classifier is not None:
+            key = f"{classifier.fingerprint}:{default}"
+            for digest, content in zip(hashes, contents):
+                known = self._memo[digest][2]
+                stage = known.get(key)
+                if stage is None:
+                    stage = known[key] = classifier.first(content, default=default)
+                    if digest not in missing:
+                        updates.append(digest)
+                stages.append(stage)
+        else:
+            stages = [""] * len(contents)
+
+        if inserts or updates:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO amounts (hash, amounts, heuristic, stages) VALUES (?, ?, ?, ?)",
+                [
+                    (digest, self._memo[digest][0].tobytes(), int(self._memo[digest][1]), json.dumps(self._memo[digest][2]))
+                    for digest in dict.fromkeys(inserts + updates)
+                ],
+            )
+            self._conn.commit()
+
+        batch = AmountBatch(len(contents))
+        for digest in hashes:
+            values, heuristic, _ = self._memo[digest]
+            batch.append(values, heuristic)
+        return batch, stages
+
+
+def extract_with(cache: Optional[AmountCache], contents: Sequence[str]) -> AmountBatch:
+    """`extract_batch`, through the cache when one is open."""
+    if cache is None:
+        return extract_batch(contents)
+    return cache.extract(contents)[0]
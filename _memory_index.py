@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+Local memory index for Cogniz Memory Skills helper scripts.
+
+Mirrors the memories of a scope (an account or project tag such as
+`account:acme-corp`) into a SQLite database so reports can be answered
+locally. Each scope remembers when it was last synced; readers only ask the
+API for memories created since then and merge them by memory ID. A scope
+synced within the last few minutes (`MemoryIndex.max_sync_age`) is read
+without asking the API at all.
+
+Buckets computed by a skill's `KeywordClassifier` are stored next to the
+memories, keyed by the classifier's fingerprint, so unchanged memories are
+never re-classified; re-synced memories drop their stored buckets.
+
+Full-text search uses SQLite FTS5 when the interpreter's SQLite was built
+with it and falls back to a LIKE scan otherwise.
+
+Run this module directly (e.g. from cron) to keep scopes warm:
+
+    python _memory_index.py --config ~/.cogniz/config.json \
+        --scope account:acme-corp --scope project:atlas --lookback-days 90
+
+License: Apache 2.0
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+ROOT_DIR = Path(__file__).resolve().parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from _shared import KeywordClassifier, configure_logging, ensure_memory_api, paged_search, state_dir  # noqa: E402
+
+INDEX_SCHEMA_VERSION = 1
+DEFAULT_INDEX_FILENAME = "index.sqlite3"
+# A sync that reaches this many memories is treated as truncated.
+MAX_SYNC_MEMORIES = 20000
+# Reads skip the API top-up for scopes synced less than this many minutes ago.
+DEFAULT_SYNC_MAX_AGE_MINUTES = 15.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    scope TEXT NOT NULL,
+    memory_id TEXT NOT NULL,
+    created_at TEXT,
+    category TEXT,
+    content TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (scope, memory_id)
+);
+CREATE INDEX IF NOT EXISTS memories_scope_created ON memories (scope, created_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    scope TEXT PRIMARY KEY,
+    synced_at TEXT NOT NULL,
+    covered_since TEXT,
+    memory_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memory_labels (
+    scope TEXT NOT NULL,
+    memory_id TEXT NOT NULL,
+    classifier TEXT NOT NULL,
+    label TEXT NOT NULL,
+    PRIMARY KEY (scope, memory_id, classifier)
+);
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# External-content FTS table kept in step with `memories` by triggers.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts
+    USING fts5(content, content='memories', content_rowid='rowid');
+CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts (rowid, content) VALUES (new.rowid, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts (memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE ON memories BEGIN
+    INSERT INTO memories_fts (memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+    INSERT INTO memories_fts (rowid, content) VALUES (new.rowid, new.content);
+END;
+"""
+
+
+def default_index_path(path: Optional[Path] = None) -> Path:
+    """
+    Index location: an `--index-path` database file, `index.sqlite3` inside an
+    existing `--index-path` directory, else the shared `memory-index` state dir.
+    """
+    if path is None:
+        return state_dir("memory-index") / DEFAULT_INDEX_FILENAME
+    path = Path(path).expanduser()
+    if path.is_dir():
+        return path / DEFAULT_INDEX_FILENAME
+    return path
+
+
+def _utc_now() -> str:
+    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+
+
+def _covers(state: Optional[Dict], since: Optional[str]) -> bool:
+    """Whether a scope's synced history reaches back to `since` (None = full history)."""
+    return state is not None and (
+        state["covered_since"] is None or (since is not None and since >= state["covered_since"])
+    )
+
+
+class MemoryIndex:
+    """
+    SQLite-backed mirror of memories grouped by scope.
+
+    The connection is shared between threads (batch briefings run scopes
+    concurrently), so every statement runs under one lock.
+
+    `max_sync_age` (minutes) is how long a scope counts as fresh after a
+    sync; reads through `search_with_index` skip the API top-up until then
+    (0 tops up on every read).
+
+    Example:
+        >>> index = MemoryIndex(Path("/tmp/index.sqlite3"))
+        >>> index.upsert("account:acme", [{"id": "m1", "content": "Renewal risk"}])
+        1
+        >>> [mem["id"] for mem in index.query("account:acme")]
+        ['m1']
+    """
+
+    def __init__(self, path: Path, max_sync_age: float = DEFAULT_SYNC_MAX_AGE_MINUTES):
+        self.path = Path(path)
+        self.max_sync_age = max_sync_age
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.fts = self._enable_fts()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('schema_version', ?)",
+            (str(INDEX_SCHEMA_VERSION),),
+        )
+        self._conn.commit()
+
+    def _enable_fts(self) -> bool:
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            logging.getLogger("memory_index").debug("SQLite FTS5 unavailable; using LIKE search")
+            return False
+        return True
+
+    def __enter__(self) -> "MemoryIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def upsert(self, scope: str, memories: Iterable[Dict]) -> int:
+        """Insert or replace memories under a scope, keyed by memory ID."""
+        rows = [
+            (
+                scope,
+                str(mem["id"]),
+                mem.get("created_at"),
+                mem.get("category"),
+                mem.get("content") or "",
+                json.dumps(mem, separators=(",", ":"), default=str),
+            )
+            for mem in memories
+            if mem.get("id") is not None
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            # Delete-then-insert keeps the FTS triggers simple and the rowid fresh.
+            self._conn.executemany(
+                "DELETE FROM memories WHERE scope = ? AND memory_id = ?",
+                [(row[0], row[1]) for row in rows],
+            )
+            self._conn.executemany(
+                "DELETE FROM memory_labels WHERE scope = ? AND memory_id = ?",
+                [(row[0], row[1]) for row in rows],
+            )
+            self._conn.executemany(
+                "INSERT INTO memories (scope, memory_id, created_at, category, content, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def sync_state(self, scope: str) -> Optional[Dict]:
+        """Last sync time and the oldest date it covers (None = full history)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at, covered_since, memory_count FROM sync_state WHERE scope = ?",
+                (scope,),
+            ).fetchone()
+        if not row:
+            return None
+        return {"synced_at": row[0], "covered_since": row[1], "memory_count": row[2]}
+
+    def last_sync(self, scope: str) -> Optional[str]:
+        state = self.sync_state(scope)
+        return state["synced_at"] if state else None
+
+    def is_fresh(self, scope: str, since: Optional[str] = None) -> bool:
+        """Whether `scope` was synced within `max_sync_age` minutes, back to `since`."""
+        state = self.sync_state(scope)
+        if self.max_sync_age <= 0 or not _covers(state, since):
+            return False
+        synced_at = datetime.fromisoformat(state["synced_at"].rstrip("Z"))
+        return datetime.utcnow() - synced_at < timedelta(minutes=self.max_sync_age)
+
+    def mark_synced(self, scope: str, synced_at: str, covered_since: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (scope, synced_at, covered_since, memory_count) "
+                "VALUES (?, ?, ?, (SELECT COUNT(*) FROM memories WHERE scope = ?))",
+                (scope, synced_at, covered_since, scope),
+            )
+            self._conn.commit()
+
+    def query(
+        self,
+        scope: str,
+        since: Optional[str] = None,
+        categories: Optional[Sequence[str]] = None,
+        text: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Return indexed memories for a scope, newest first.
+
+        Args:
+            scope: Scope tag the memories were synced under
+            since: Optional ISO date/datetime lower bound on created_at
+            categories: Optional category filter
+            text: Optional full-text filter (FTS5 query syntax when available)
+            limit: Optional maximum number of memories
+        """
+        sql = ["SELECT m.payload FROM memories AS m"]
+        clauses = ["m.scope = ?"]
+        params: List = [scope]
+        if text:
+            if self.fts:
+                sql.append("JOIN memories_fts ON memories_fts.rowid = m.rowid")
+                clauses.append("memories_fts MATCH ?")
+                params.append(text)
+            else:
+                clauses.append("m.content LIKE ?")
+                params.append(f"%{text}%")
+        if since:
+            clauses.append("m.created_at >= ?")
+            params.append(since)
+        if categories:
+            clauses.append(f"m.category IN ({', '.join('?' for _ in categories)})")
+            params.extend(categories)
+        sql.append("WHERE " + " AND ".join(clauses))
+        sql.append("ORDER BY m.created_at DESC")
+        if limit:
+            sql.append("LIMIT ?")
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(" ".join(sql), params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def prune(self, scope: str, before: str) -> int:
+        """
+        Drop a scope's memories created before an ISO date.
+
+        The scope's covered history is moved up to `before`, so a later
+        sync asking for older memories fetches them again.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM memories WHERE scope = ? AND created_at < ?", (scope, before)
+            )
+            self._conn.execute(
+                "UPDATE sync_state SET covered_since = ?, "
+                "memory_count = (SELECT COUNT(*) FROM memories WHERE scope = ?) "
+                "WHERE scope = ? AND (covered_since IS NULL OR covered_since < ?)",
+                (before, scope, scope, before),
+            )
+            self._conn.execute(
+                "DELETE FROM memory_labels WHERE scope = ? "
+                "AND memory_id NOT IN (SELECT memory_id FROM memories WHERE scope = ?)",
+                (scope, scope),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def buckets(
+        self,
+        scope: str,
+        memories: Sequence[Dict],
+        classifier: KeywordClassifier,
+        default: str,
+    ) -> Dict[str, str]:
+        """
+        Bucket per memory ID, classifying and storing only memories that have
+        no bucket from this classifier yet.
+        """
+        ids = [str(mem["id"]) for mem in memories if mem.get("id") is not None]
+        found: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start : start + 500]
+                found.update(
+                    self._conn.execute(
+                        "SELECT memory_id, label FROM memory_labels WHERE scope = ? AND classifier = ? "
+                        f"AND memory_id IN ({', '.join('?' for _ in chunk)})",
+                        [scope, classifier.fingerprint, *chunk],
+                    ).fetchall()
+                )
+        missing = [
+            (scope, str(mem["id"]), classifier.fingerprint, classifier.first(mem.get("content") or "", default=default))
+            for mem in memories
+            if mem.get("id") is not None and str(mem["id"]) not in found
+        ]
+        if missing:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO memory_labels (scope, memory_id, classifier, label) VALUES (?, ?, ?, ?)",
+                    missing,
+                )
+                self._conn.commit()
+            found.update((row[1], row[3]) for row in missing)
+        return found
+
+    def sync(
+        self,
+        api,
+        scope: str,
+        project_id=None,
+        limit: int = 200,
+        since: Optional[str] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> int:
+        """
+        Fetch memories created since the scope's last sync and merge them
+        into the index. A scope that was never synced, or whose synced
+        history starts after `since`, is fetched from `since` instead
+        (`since=None` means full history).
+
+        Results are paged `limit` at a time until they run out. A fetch
+        that still stops at `MAX_SYNC_MEMORIES` is merged but leaves the
+        scope's sync state untouched, so the next sync asks for the same
+        window again instead of skipping what was cut off.
+
+        Returns:
+            Number of memories fetched from the API
+        """
+        logger = logger or logging.getLogger("memory_index")
+        started = _utc_now()
+        state = self.sync_state(scope)
+        if _covers(state, since):
+            lower_bound = state["synced_at"][:10]
+            covered_since = state["covered_since"]
+        else:
+            lower_bound = covered_since = since
+        query = f"{scope} date>={lower_bound}" if lower_bound else scope
+        logger.info("Syncing index scope '%s' with query '%s' (limit=%s)", scope, query, limit)
+        fetched = paged_search(api, query, limit, MAX_SYNC_MEMORIES, project_id, logger)
+        self.upsert(scope, fetched)
+        if len(fetched) >= MAX_SYNC_MEMORIES:
+            logger.warning(
+                "Index sync for %s stopped at %d memories; sync state not advanced.",
+                scope,
+                len(fetched),
+            )
+            return len(fetched)
+        self.mark_synced(scope, started, covered_since)
+        return len(fetched)
+
+
+def search_with_index(
+    index: MemoryIndex,
+    api,
+    scope: str,
+    project_id=None,
+    since: Optional[str] = None,
+    categories: Optional[Sequence[str]] = None,
+    limit: int = 200,
+    logger: Optional[logging.Logger] = None,
+) -> List[Dict]:
+    """
+    Answer a scope query from the index, topping it up from the API first
+    with whatever was created since the last sync. Scopes synced within the
+    index's `max_sync_age` are answered without an API round trip.
+    """
+    if index.is_fresh(scope, since):
+        (logger or logging.getLogger("memory_index")).debug(
+            "Index scope '%s' synced within %g minutes; skipping API top-up", scope, index.max_sync_age
+        )
+    else:
+        index.sync(api, scope, project_id=project_id, limit=limit, since=since, logger=logger)
+    return index.query(scope, since=since, categories=categories, limit=limit)
+
+
+def read_scopes(path: Path) -> List[str]:
+    """Read scope tags, one per line, skipping blanks and '#' comments."""
+    scopes: List[str] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        scope = line.split("#", 1)[0].strip()
+        if scope and scope not in scopes:
+            scopes.append(scope)
+    return scopes
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Sync Cogniz memories for accounts/projects into the local memory index."
+    )
+    parser.add_argument("--config", required=True, help="Path to Cogniz config JSON.")
+    parser.add_argument(
+        "--scope",
+        action="append",
+        default=[],
+        help="Scope tag to sync, e.g. account:acme-corp or project:atlas (repeatable).",
+    )
+    parser.add_argument(
+        "--scopes-file",
+        type=Path,
+        help="File with one scope tag per line ('#' starts a comment).",
+    )
+    parser.add_argument(
+        "--lookback-days",
+        type=int,
+        default=90,
+        help="History fetched the first time a scope is synced.",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=500,
+        help="Memories fetched per page while syncing a scope.",
+    )
+    parser.add_argument(
+        "--prune-days",
+        type=int,
+        help="Drop indexed memories older than this many days.",
+    )
+    parser.add_argument(
+        "--index-path",
+        type=Path,
+        help=(
+            "Index database file, or an existing directory to hold index.sqlite3 "
+            "(defaults to ~/.cogniz/state/memory-index)."
+        ),
+    )
+    parser.add_argument(
+        "--memory-api-path",
+        help="Override path to the cogniz-memory-manager scripts directory.",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Enable verbose logging.",
+    )
+    args = parser.parse_args()
+    if not args.scope and not args.scopes_file:
+        parser.error("pass at least one --scope or a --scopes-file")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    configure_logging(args.verbose)
+    logger = logging.getLogger("memory_index")
+
+    # Resolve the default manager location exactly as a skill's scripts/ directory would.
+    CognizMemoryAPI, load_config, manager_path = ensure_memory_api(
+        ROOT_DIR / "memory-index" / "scripts", args.memory_api_path
+    )
+    logger.debug("Using Cogniz memory manager from %s", manager_path)
+
+    config = load_config(args.config)
+    api = CognizMemoryAPI(
+        base_url=config["base_url"],
+        api_key=config["api_key"],
+        project_id=config.get("project_id"),
+    )
+
+    scopes = list(args.scope)
+    if args.scopes_file:
+        scopes.extend(scope for scope in read_scopes(args.scopes_file) if scope not in scopes)
+
+    since = (datetime.utcnow() - timedelta(days=args.lookback_days)).strftime("%Y-%m-%d")
+    with MemoryIndex(default_index_path(args.index_path)) as index:
+        for scope in scopes:
+            fetched = index.sync(api, scope, project_id=config.get("project_id"), limit=args.limit, since=since, logger=logger)
+            pruned = 0
+            if args.prune_days:
+                cutoff = (datetime.utcnow() - timedelta(days=args.prune_days)).strftime("%Y-%m-%d")
+                pruned = index.prune(scope, cutoff)
+            logger.info("Scope %s: fetched %d memories, pruned %d", scope, fetched, pruned)
+        logger.info("Index at %s (full-text search: %s)", index.path, "fts5" if index.fts else "like")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
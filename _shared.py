@@ -10,12 +10,21 @@ License: Apache 2.0
 
 from __future__ import annotations
 
+import bisect
+import hashlib
 import importlib
+import json
 import logging
 import os
+import re
 import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Tuple, Type
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Type
 
 
 def configure_logging(verbose: bool = False) -> None:
@@ -104,4 +113,473 @@ def ensure_memory_api(
     raise ModuleNotFoundError(message)
 
 
-__all__ = ["configure_logging", "ensure_memory_api"]
+def state_dir(skill: str, override: Optional[Path] = None) -> Path:
+    """
+    Resolve the local state directory for a skill.
+
+    Resolution order: explicit override, `COGNIZ_STATE_DIR/<skill>`, then
+    `~/.cogniz/state/<skill>` (next to the default Cogniz config).
+
+    Args:
+        skill: Skill-specific subdirectory name (e.g. "account-briefing")
+        override: Optional directory supplied on the command line
+
+    Returns:
+        Directory path (created if missing)
+    """
+    if override:
+        path = Path(override)
+    else:
+        base = os.getenv("COGNIZ_STATE_DIR")
+        path = (Path(base) if base else Path.home() / ".cogniz" / "state") / skill
+    path = path.expanduser()
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def safe_filename(value: str) -> str:
+    """Turn an identifier such as `account:acme-corp` into a file-safe stem."""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", value).strip("._") or "unnamed"
+
+
+_EPOCH = re.compile(r"\d{9,}(?:\.\d+)?")
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """
+    Parse a memory timestamp into a naive UTC datetime.
+
+    Accepts ISO timestamps (a trailing ``Z`` or offset is dropped),
+    ``YYYY/MM/DD`` dates and epoch seconds or milliseconds; anything else,
+    including blanks, gives None.
+    """
+    text = str(value if value is not None else "").strip()
+    if not text:
+        return None
+    try:
+        if _EPOCH.fullmatch(text):
+            seconds = float(text)
+            seconds = seconds / 1000.0 if seconds > 1e11 else seconds
+            return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+        return datetime.fromisoformat(text.rstrip("Z").replace("/", "-")[:19])
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def read_json(path: Path, default: Any = None) -> Any:
+    """
+    Load a JSON state file, returning `default` when it is missing or corrupt.
+    """
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as exc:
+        logging.getLogger("state").warning("Ignoring unreadable state file %s: %s", path, exc)
+        return default
+
+
+def write_json_atomic(path: Path, payload: Any) -> None:
+    """
+    Write JSON via a temporary file and rename so readers never observe a
+    partially written state file (e.g. after an interrupted run).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+class IndexedJsonLog:
+    """
+    Append-only JSON lines log with a sorted index on one timestamp field.
+
+    Each record is one compact line in `log_name`; `index_name` holds one
+    `key<TAB>offset<TAB>length` line per record, so range and point lookups
+    bisect the index and seek straight to the lines they need. A missing
+    index is rebuilt from the log.
+    """
+
+    def __init__(self, directory: Path, log_name: str, index_name: str, key: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.directory / log_name
+        self.index_path = self.directory / index_name
+        self.key = key
+        self._keys: List[str] = []
+        self._spans: List[Tuple[int, int]] = []
+        self._load_index()
+
+    def _load_index(self) -> None:
+        if not self.index_path.exists() and self.log_path.exists():
+            self.rebuild_index()
+            return
+        if not self.index_path.exists():
+            return
+        with self.index_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3:
+                    self._keys.append(parts[0])
+                    self._spans.append((int(parts[1]), int(parts[2])))
+        # Records are appended in time order; only hand-merged logs need sorting.
+        if any(later < earlier for earlier, later in zip(self._keys, self._keys[1:])):
+            order = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+            self._keys = [self._keys[i] for i in order]
+            self._spans = [self._spans[i] for i in order]
+
+    def rebuild_index(self) -> int:
+        """Recreate the index by scanning the log (e.g. after it was copied alone)."""
+        self._keys, self._spans = [], []
+        lines = []
+        offset = 0
+        with self.log_path.open("rb") as handle:
+            for raw in handle:
+                try:
+                    key = json.loads(raw)[self.key]
+                except (ValueError, KeyError):
+                    offset += len(raw)
+                    continue
+                self._keys.append(key)
+                self._spans.append((offset, len(raw)))
+                lines.append(f"{key}\t{offset}\t{len(raw)}\n")
+                offset += len(raw)
+        with self.index_path.open("w", encoding="utf-8") as handle:
+            handle.writelines(lines)
+        return len(lines)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+    def read(self, position: int) -> Dict:
+        offset, length = self._spans[position]
+        with self.log_path.open("rb") as handle:
+            handle.seek(offset)
+            return json.loads(handle.read(length))
+
+    def append_record(self, record: Mapping) -> None:
+        """Append `record` (which must carry the key field) durably."""
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with self.log_path.open("ab") as handle:
+            handle.seek(0, os.SEEK_END)
+            offset = handle.tell()
+            handle.write(line)
+            handle.flush()
+            os.fsync(handle.fileno())
+        # The index line goes last: a crash in between leaves an unindexed (ignored) line.
+        key = record[self.key]
+        with self.index_path.open("a", encoding="utf-8") as handle:
+            handle.write(f"{key}\t{offset}\t{len(line)}\n")
+        position = bisect.bisect_right(self._keys, key)
+        self._keys.insert(position, key)
+        self._spans.insert(position, (offset, len(line)))
+
+    def between(self, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict]:
+        """Yield records keyed in [since, until] (ISO prefixes), oldest first."""
+        low = bisect.bisect_left(self._keys, since) if since else 0
+        # "~" sorts after every timestamp character, so a date prefix includes its whole day.
+        high = bisect.bisect_right(self._keys, until + "~") if until else len(self._keys)
+        if low >= high:
+            return
+        with self.log_path.open("rb") as handle:
+            for offset, length in self._spans[low:high]:
+                handle.seek(offset)
+                yield json.loads(handle.read(length))
+
+    def position_at(self, moment: Optional[str] = None, before: int = 0) -> Optional[int]:
+        """
+        Index of the last record keyed at or before `moment` (an ISO prefix;
+        latest when omitted), stepped back `before` records.
+        """
+        end = bisect.bisect_right(self._keys, moment + "~") if moment else len(self._keys)
+        position = end - 1 - before
+        return position if position >= 0 else None
+
+
+# Overall deadline for a set of concurrent searches (seconds).
+DEFAULT_SEARCH_TIMEOUT = 60.0
+
+
+@dataclass
+class SearchBatch:
+    """Results of `run_searches`, keyed by the names the caller chose."""
+    results: Dict[str, List[Dict]] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.errors
+
+
+def run_searches(
+    api: Any,
+    searches: Mapping[str, Mapping[str, Any]],
+    timeout: Optional[float] = DEFAULT_SEARCH_TIMEOUT,
+    logger: Optional[logging.Logger] = None,
+) -> SearchBatch:
+    """
+    Run independent `api.search(**kwargs)` calls concurrently.
+
+    Wall-clock time is that of the slowest search instead of the sum. A
+    search that raises, or is still running when `timeout` seconds have
+    passed since the batch started, gets an empty result and an entry in
+    `errors`; the other searches are returned as usual. Searches run on
+    daemon threads, so an abandoned request never delays the caller or
+    interpreter exit.
+
+    Args:
+        api: Client exposing `search(**kwargs)`
+        searches: Search name -> keyword arguments (query, limit, project_id, ...)
+        timeout: Overall deadline in seconds (None waits indefinitely)
+        logger: Logger for progress messages
+
+    Example:
+        >>> batch = run_searches(api, {"pipeline": {"query": "category:deal-notes", "limit": 80}})
+        >>> batch.results["pipeline"], batch.errors
+    """
+    logger = logger or logging.getLogger("memory_search")
+    outcomes: Dict[str, Tuple[bool, Any]] = {}
+
+    def run(name: str, kwargs: Dict[str, Any]) -> None:
+        try:
+            outcomes[name] = (True, api.search(**kwargs))
+        except Exception as exc:  # noqa: BLE001 - reported per search
+            outcomes[name] = (False, f"{type(exc).__name__}: {exc}")
+
+    started = time.perf_counter()
+    threads = []
+    for name, kwargs in searches.items():
+        logger.info("Querying %s: '%s'", name, kwargs.get("query"))
+        thread = threading.Thread(target=run, args=(name, dict(kwargs)), name=f"search-{name}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    deadline = None if timeout is None else started + timeout
+    for thread in threads:
+        thread.join(None if deadline is None else max(0.0, deadline - time.perf_counter()))
+
+    batch = SearchBatch(elapsed=time.perf_counter() - started)
+    for name in searches:
+        if name in outcomes:
+            ok, value = outcomes[name]
+        else:
+            ok, value = False, f"timed out after {timeout:g}s"
+        if ok:
+            batch.results[name] = list(value or [])
+        else:
+            batch.results[name] = []
+            batch.errors[name] = value
+            logger.warning("Search '%s' failed: %s", name, value)
+    logger.debug("Ran %d searches in %.2fs", len(searches), batch.elapsed)
+    return batch
+
+
+def paged_search(
+    api: Any,
+    query: str,
+    page_size: int = 200,
+    max_results: int = 5000,
+    project_id: Optional[str] = None,
+    logger: Optional[logging.Logger] = None,
+) -> List[Dict]:
+    """
+    Fetch up to `max_results` matches of one query in `offset` pages.
+
+    Stops at the first short page. Memories repeated across pages (results
+    shifting while paging) are kept once. Clients whose `search` takes no
+    `offset` get a single request for `max_results` instead.
+
+    Example:
+        >>> memories = paged_search(api, "quarter:2025-Q3", page_size=200)
+    """
+    logger = logger or logging.getLogger("memory_search")
+    results: List[Dict] = []
+    seen = set()
+    offset = 0
+    pages = 0
+    while offset < max_results:
+        size = min(page_size, max_results - offset)
+        try:
+            page = api.search(query=query, limit=size, offset=offset, project_id=project_id)
+        except TypeError as exc:
+            if pages or "offset" not in str(exc):
+                raise
+            logger.debug("search() has no offset parameter; fetching %d results at once", max_results)
+            return list(api.search(query=query, limit=max_results, project_id=project_id) or [])
+        page = list(page or [])
+        pages += 1
+        for mem in page:
+            key = mem.get("id") or id(mem)
+            if key not in seen:
+                seen.add(key)
+                results.append(mem)
+        if len(page) < size:
+            break
+        offset += size
+    logger.debug("Paged search '%s': %d memories in %d pages", query, len(results), pages)
+    return results
+
+
+# Suffixes accepted after a plain keyword ("risk" matches "risks", "delayed").
+INFLECTION_SUFFIX = r"(?:s|es|ed|d|ing)?(?!\w)"
+
+
+class KeywordClassifier:
+    """
+    Single-pass, word-boundary-aware keyword bucketer.
+
+    A priority-ordered table of ``bucket -> keywords`` is compiled once into a
+    single regular expression shaped like a trie (shared prefixes are merged,
+    so the first character prunes most alternatives). One scan over the text
+    reports every bucket hit; first() instead runs short-circuiting substring
+    tests for the highest-priority bucket.
+
+    Keyword syntax (scan/matches):
+        - Matching is case-insensitive and anchored at word starts (and
+          word ends, unless the keyword is a stem).
+        - Plain keywords also match simple inflections (s/es/ed/d/ing).
+        - A trailing ``*`` marks a stem: ``escalat*`` matches "escalation".
+        - Spaces match any run of whitespace (``next step``).
+
+    Example:
+        >>> classifier = KeywordClassifier({"risks": ("risk", "escalat*")})
+        >>> classifier.first("Escalated to VP", default="notes")
+        'risks'
+    """
+
+    def __init__(self, table: Mapping[str, Sequence[str]]):
+        self.buckets: Tuple[str, ...] = tuple(table)
+        self._rank = {bucket: index for index, bucket in enumerate(self.buckets)}
+        owners: Dict[str, List[str]] = {}
+        trie: Dict = {}
+        # Per bucket, in priority order: the keyword cores first() tests for.
+        terms: List[Tuple[str, Tuple[str, ...]]] = []
+        for bucket, keywords in table.items():
+            cores: List[str] = []
+            for keyword in keywords:
+                stem = keyword.endswith("*")
+                core = " ".join(keyword.rstrip("*").lower().split())
+                if not core:
+                    continue
+                owners.setdefault(core, [])
+                if bucket not in owners[core]:
+                    owners[core].append(bucket)
+                if core not in cores:
+                    cores.append(core)
+                node = trie
+                for char in core:
+                    node = node.setdefault(char, {})
+                # A stem ending wins over an inflected one for the same core.
+                if stem or node.get(None) is None:
+                    node[None] = r"\w*" if stem else INFLECTION_SUFFIX
+            if cores:
+                terms.append((bucket, tuple(cores)))
+        self._owners = {
+            core: tuple(sorted(buckets, key=self._rank.__getitem__))
+            for core, buckets in owners.items()
+        }
+        self._resolved: Dict[str, Tuple[str, ...]] = {}
+        self._lengths = sorted({len(core) for core in self._owners}, reverse=True)
+        body = self._emit(trie) if trie else "(?!)"
+        # Anchoring on a consumed non-word character (text is scanned with a
+        # leading space) gives sre a charset prefix, so it skips through word
+        # characters in C and only tries the trie at word starts. Text is
+        # lowercased once up front; IGNORECASE makes sre slower per character.
+        self.pattern = re.compile(r"\W(" + body + ")")
+        self._terms = terms
+        # Identifies the compiled table, e.g. for caches of classification results.
+        # The "substring" tag covers first()'s matching rule, which the pattern
+        # does not describe.
+        self.fingerprint = hashlib.sha1(
+            (
+                "substring:" + self.pattern.pattern + repr(sorted(self._owners.items()))
+            ).encode("utf-8")
+        ).hexdigest()[:16]
+
+    @classmethod
+    def _emit(cls, node: Dict) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + cls._emit(child)
+            for char, child in sorted((k, v) for k, v in node.items() if k is not None)
+        ]
+        if node.get(None) is not None:
+            # Ending last so longer keywords sharing this prefix are tried first.
+            branches.append(node[None])
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    def _resolve(self, matched: str) -> Tuple[str, ...]:
+        """
+        Map matched text (keyword plus inflection/stem tail) back to the
+        buckets of its keyword; memoized because matches repeat heavily.
+        """
+        normalized = " ".join(matched.split())
+        buckets: Tuple[str, ...] = ()
+        for length in self._lengths:
+            if normalized[:length] in self._owners:
+                buckets = self._owners[normalized[:length]]
+                break
+        if len(self._resolved) < 65536:
+            self._resolved[matched] = buckets
+        return buckets
+
+    def scan(self, text: str) -> Dict[str, int]:
+        """Count keyword hits per bucket in one pass over `text`."""
+        counts: Dict[str, int] = {}
+        resolved = self._resolved
+        for matched in self.pattern.findall(" " + text.lower()):
+            buckets = resolved.get(matched)
+            if buckets is None:
+                buckets = self._resolve(matched)
+            for bucket in buckets:
+                counts[bucket] = counts.get(bucket, 0) + 1
+        return counts
+
+    def matches(self, text: str) -> List[str]:
+        """All buckets with at least one hit, in table priority order."""
+        return sorted(self.scan(text), key=self._rank.__getitem__)
+
+    def first(self, text: str, default: str) -> str:
+        """
+        Highest-priority bucket with a hit, or `default`.
+
+        Plain ``any(term in text)`` substring loops in table order: unlike
+        scan(), keywords are not held to word boundaries ("win" also hits
+        "window"). CPython's substring search runs in C and stops at the
+        first hit, which the regex engine cannot match per character, so
+        priority bucketing keeps the loops and leaves boundaries to scan().
+        """
+        contains = text.lower().__contains__
+        for bucket, cores in self._terms:
+            if any(map(contains, cores)):
+                return bucket
+        return default
+
+
+__all__ = [
+    "DEFAULT_SEARCH_TIMEOUT",
+    "IndexedJsonLog",
+    "KeywordClassifier",
+    "SearchBatch",
+    "configure_logging",
+    "ensure_memory_api",
+    "paged_search",
+    "parse_timestamp",
+    "read_json",
+    "run_searches",
+    "safe_filename",
+    "state_dir",
+    "write_json_atomic",
+]
@@ -0,0 +1,258 @@
+"""
+Extractive summaries of memory sections under a token budget.
+
+Used by the quarterly review and handoff scripts, whose sections would
+otherwise paste dozens of raw snippets into Claude's context. Each memory is
+split into sentences; sentences are weighted with TF-IDF over the section
+and ranked with TextRank on their cosine-similarity graph (centroid
+similarity for very large sections). Maximal marginal relevance then picks
+sentences in rank order while penalising overlap with what is already
+chosen, and drops near-duplicates outright, until the section's token
+budget is spent. Tokens are estimated like `budget_context.py` does
+(about four characters per token). Standard library only.
+
+License: Apache 2.0
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+AVERAGE_CHARS_PER_TOKEN = 4
+DEFAULT_DIVERSITY = 0.5
+# Sentences at least this similar to a selected one are never added.
+REDUNDANCY_THRESHOLD = 0.8
+# TextRank is quadratic in sentences; larger sections rank by centroid similarity.
+TEXTRANK_MAX_SENTENCES = 800
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+TEXTRANK_TOLERANCE = 1e-6
+# Opening sentences usually state what a note is about.
+LEAD_SENTENCE_BOOST = 1.15
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])|\s*\n+\s*")
+_WORD = re.compile(r"[a-z0-9][a-z0-9'-]*")
+# `key:value` tags (`quarter:2025-Q3`, `account:acme`) repeat across a section
+# and would otherwise dominate centrality; they are shown but not scored.
+_TAG = re.compile(r"(?<!\S)[a-z][\w-]*:\S+")
+STOPWORDS = frozenset(
+    """
+    a about after all also an and any are as at be been before being but by can could did do
+    does for from had has have he her his how i if in into is it its just may more most no not
+    of on or our out over she so some such than that the their them then there these they this
+    those to too under up us was we were what when where which while who will with would you your
+    """.split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, round(len(text) / AVERAGE_CHARS_PER_TOKEN))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [part.strip() for part in _SENTENCE_SPLIT.split(text or "") if part and part.strip()]
+
+
+def _terms(sentence: str) -> List[str]:
+    return [word for word in _WORD.findall(_TAG.sub(" ", sentence.lower())) if word not in STOPWORDS and len(word) > 1]
+
+
+def _cosine(left: Dict[str, float], right: Dict[str, float]) -> float:
+    if len(left) > len(right):
+        left, right = right, left
+    # Vectors are unit length, so the dot product is the cosine.
+    return sum(weight * right.get(term, 0.0) for term, weight in left.items())
+
+
+@dataclass
+class _Sentence:
+    memory: int
+    position: int
+    text: str
+    tokens: int
+    vector: Dict[str, float]
+    score: float = 0.0
+
+
+@dataclass
+class SummaryItem:
+    """Selected sentences of one memory, in their original order."""
+    memory_id: str
+    text: str
+
+
+@dataclass
+class Summary:
+    items: List[SummaryItem] = field(default_factory=list)
+    tokens: int = 0
+    source_tokens: int = 0
+    omitted: int = 0
+
+    def lines(self) -> List[str]:
+        """Markdown bullets, one per memory that kept at least one sentence."""
+        return [f"- [{item.memory_id}] {item.text}" for item in self.items]
+
+
+def _vectorise(entries: Sequence[Tuple[str, str]]) -> List[_Sentence]:
+    sentences: List[_Sentence] = []
+    counts: List[Counter] = []
+    for memory, (_, content) in enumerate(entries):
+        for position, text in enumerate(split_sentences(content)):
+            terms = Counter(_terms(text))
+            if not terms:
+                continue
+            sentences.append(_Sentence(memory, position, text, estimate_tokens(text), {}))
+            counts.append(terms)
+    frequency = Counter(term for terms in counts for term in terms)
+    total = len(counts)
+    for sentence, terms in zip(sentences, counts):
+        vector = {
+            term: (1.0 + math.log(count)) * math.log((1 + total) / (1 + frequency[term]) + 1.0)
+            for term, count in terms.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        sentence.vector = {term: weight / norm for term, weight in vector.items()}
+    return sentences
+
+
+def _rank(sentences: List[_Sentence]) -> None:
+    count = len(sentences)
+    if count <= TEXTRANK_MAX_SENTENCES:
+        # Only sentences sharing a term can be similar: pair them via an inverted index.
+        postings: Dict[str, List[int]] = {}
+        for index, sentence in enumerate(sentences):
+            for term in sentence.vector:
+                postings.setdefault(term, []).append(index)
+        edges: List[Dict[int, float]] = [{} for _ in sentences]
+        for index, sentence in enumerate(sentences):
+            neighbours = {other for term in sentence.vector for other in postings[term] if other > index}
+            for other in neighbours:
+                similarity = _cosine(sentence.vector, sentences[other].vector)
+                if similarity > 0.0:
+                    edges[index][other] = similarity
+                    edges[other][index] = similarity
+        strength = [sum(weights.values()) for weights in edges]
+        scores = [1.0 / count] * count
+        for _ in range(TEXTRANK_ITERATIONS):
+            updated = [
+                (1.0 - TEXTRANK_DAMPING) / count
+                + TEXTRANK_DAMPING * sum(scores[other] * weight / strength[other] for other, weight in edges[index].items())
+                for index in range(count)
+            ]
+            delta = sum(abs(new - old) for new, old in zip(updated, scores))
+            scores = updated
+            if delta < TEXTRANK_TOLERANCE:
+                break
+    else:
+        centroid: Dict[str, float] = {}
+        for sentence in sentences:
+            for term, weight in sentence.vector.items():
+                centroid[term] = centroid.get(term, 0.0) + weight
+        norm = math.sqrt(sum(weight * weight for weight in centroid.values())) or 1.0
+        centroid = {term: weight / norm for term, weight in centroid.items()}
+        scores = [_cosine(sentence.vector, centroid) for sentence in sentences]
+    top = max(scores) or 1.0
+    for sentence, score in zip(sentences, scores):
+        sentence.score = score / top * (LEAD_SENTENCE_BOOST if sentence.position == 0 else 1.0)
+
+
+def summarize(
+    entries: Sequence[Tuple[str, str]],
+    token_budget: int,
+    diversity: float = DEFAULT_DIVERSITY,
+) -> Summary:
+    """
+    Pick the most central, least redundant sentences that fit a budget.
+
+    Args:
+        entries: (memory id, content) pairs in display order
+        token_budget: Estimated tokens the rendered bullets may use
+        diversity: MMR trade-off; 1.0 ranks by centrality only, lower values
+            favour sentences unlike those already chosen
+
+    Returns:
+        Summary whose items keep the entries' order; `omitted` counts
+        memories with no sentence selected.
+
+    Example:
+        >>> summary = summarize([("m1", "Launch slipped. Beta opened to 40 accounts.")], 50)
+        >>> summary.lines()
+        ['- [m1] Launch slipped. Beta opened to 40 accounts.']
+    """
+    summary = Summary(source_tokens=sum(estimate_tokens(content or "") for _, content in entries))
+    sentences = _vectorise(entries)
+    if not sentences:
+        summary.omitted = len(entries)
+        return summary
+    _rank(sentences)
+
+    # Bullet prefix "- [id] " is paid once per memory.
+    prefix = [estimate_tokens(f"- [{memory_id}] ") for memory_id, _ in entries]
+    chosen: List[_Sentence] = []
+    used_memories = set()
+    spent = 0
+    order = sorted(range(len(sentences)), key=lambda index: sentences[index].score, reverse=True)
+    # Highest similarity of each sentence to anything chosen so far.
+    overlap = [0.0] * len(sentences)
+    alive = [True] * len(sentences)
+    while True:
+        room = token_budget - spent
+        best, best_value = None, None
+        for index in order:
+            if not alive[index]:
+                continue
+            sentence = sentences[index]
+            if sentence.tokens > room or overlap[index] >= REDUNDANCY_THRESHOLD:
+                alive[index] = False
+                continue
+            if sentence.tokens + (0 if sentence.memory in used_memories else prefix[sentence.memory]) > room:
+                continue
+            value = diversity * sentence.score - (1.0 - diversity) * overlap[index]
+            if best_value is None or value > best_value:
+                best, best_value = index, value
+            # Scores only fall from here on, so no later sentence can do better.
+            if best_value >= diversity * sentence.score:
+                break
+        if best is None:
+            break
+        picked = sentences[best]
+        alive[best] = False
+        spent += picked.tokens + (0 if picked.memory in used_memories else prefix[picked.memory])
+        chosen.append(picked)
+        used_memories.add(picked.memory)
+        for index in order:
+            if alive[index]:
+                overlap[index] = max(overlap[index], _cosine(picked.vector, sentences[index].vector))
+
+    if not chosen:
+        # Not even one sentence fits: truncate the top-ranked one.
+        top = max(sentences, key=lambda sentence: sentence.score)
+        room = max(1, token_budget - prefix[top.memory]) * AVERAGE_CHARS_PER_TOKEN
+        text = top.text if len(top.text) <= room else top.text[: max(0, room - 3)].rstrip() + "..."
+        top = _Sentence(top.memory, top.position, text, estimate_tokens(text), top.vector)
+        chosen, used_memories, spent = [top], {top.memory}, top.tokens + prefix[top.memory]
+
+    by_memory: Dict[int, List[_Sentence]] = {}
+    for sentence in chosen:
+        by_memory.setdefault(sentence.memory, []).append(sentence)
+    for memory in sorted(by_memory):
+        parts = sorted(by_memory[memory], key=lambda sentence: sentence.position)
+        summary.items.append(SummaryItem(str(entries[memory][0]), " ".join(part.text for part in parts)))
+    summary.tokens = spent
+    summary.omitted = len(entries) - len(used_memories)
+    return summary
+
+
+if __name__ == "__main__":  # pragma: no cover
+    notes = [
+        ("m1", "Checkout launch slipped two weeks. The payment provider certification is still pending."),
+        ("m2", "Payment provider certification is pending, so checkout launch moved by two weeks."),
+        ("m3", "Onboarding NPS rose to 61 after the guided setup shipped."),
+    ]
+    result = summarize(notes, token_budget=40)
+    print("\n".join(result.lines()))
+    print(f"~{result.tokens} of ~{result.source_tokens} tokens, {result.omitted} memories omitted")
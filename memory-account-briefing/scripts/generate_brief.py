@@ -6,19 +6,42 @@ Generate an executive-ready account briefing by querying the Cogniz Memory Platf
 from __future__ import annotations
 
 import argparse
+import heapq
 import json
 import logging
+import re
 import sys
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 ROOT_DIR = SCRIPT_DIR.parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from _shared import configure_logging, ensure_memory_api  # noqa: E402
+from _shared import (  # noqa: E402
+    KeywordClassifier,
+    configure_logging,
+    ensure_memory_api,
+    paged_search,
+    read_json,
+    safe_filename,
+    state_dir,
+    write_json_atomic,
+)
+from _memory_index import (  # noqa: E402
+    DEFAULT_SYNC_MAX_AGE_MINUTES,
+    MemoryIndex,
+    default_index_path,
+    search_with_index,
+)
+
+STATE_VERSION = 1
+STATE_FIELDS = ("id", "content", "category", "created_at")
+# A refresh that reaches this many memories is treated as truncated.
+REFRESH_MAX_MEMORIES = 10000
 
 
 KEYWORD_BUCKETS: Dict[str, Tuple[str, ...]] = {
@@ -28,7 +51,7 @@ KEYWORD_BUCKETS: Dict[str, Tuple[str, ...]] = {
         "delivered",
         "adopted",
         "positive",
-        "success",
+        "success*",
         "celebrate",
         "complete",
     ),
@@ -39,15 +62,16 @@ KEYWORD_BUCKETS: Dict[str, Tuple[str, ...]] = {
         "issue",
         "churn",
         "delay",
-        "escalat",
+        "escalat*",
         "downgrade",
     ),
     "actions": (
         "next step",
         "follow up",
+        "follow-up",
         "todo",
         "action",
-        "assign",
+        "assign*",
         "due",
         "schedule",
     ),
@@ -62,6 +86,34 @@ KEYWORD_BUCKETS: Dict[str, Tuple[str, ...]] = {
     ),
 }
 
+BUCKET_CLASSIFIER = KeywordClassifier(KEYWORD_BUCKETS)
+
+# Relevance ranking: weighted blend of recency, keyword density and source category.
+SCORE_WEIGHTS = {"recency": 0.5, "density": 0.3, "source": 0.2}
+CATEGORY_WEIGHTS: Dict[str, float] = {
+    "renewal-risks": 1.0,
+    "support-escalations": 0.9,
+    "sales-notes": 0.8,
+    "revenue-metrics": 0.8,
+    "meeting-notes": 0.6,
+    "usage-analytics": 0.6,
+}
+DEFAULT_CATEGORY_WEIGHT = 0.5
+DENSITY_SATURATION = 10
+
+# Near-duplicate detection over word-bigram shingles.
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+NEAR_DUPLICATE_JACCARD = 0.7
+# Universal hashes (a * h + b) mod p, one (a, b) per signature row.
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_PERMUTATIONS = (
+    (0x5BD1E9955BD1E99, 0x27D4EB2F165667B), (0x1B8735937FEB352, 0x2C1B3C6D297A2D3),
+    (0x68E31DA4A5C1F3B, 0x7A3B6C9D1E2F405), (0x3C6EF372FE94F82, 0x1F83D9ABFB41BD6),
+    (0x510E527FADE682D, 0x09B05688C2B3E6C), (0x6A09E667F3BCC90, 0x0BB67AE8584CAA7),
+    (0x4F1BBCDCBFA53E0, 0x12E6C2A7B4D8F19), (0x7C0A9E3B5D2F148, 0x36A8D4F2C1E9B57),
+)
+MINHASH_ROWS = 2
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -72,11 +124,16 @@ def parse_args() -> argparse.Namespace:
         required=True,
         help="Path to Cogniz configuration JSON (see config_template in memory manager).",
     )
-    parser.add_argument(
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument(
         "--account",
-        required=True,
         help="Account identifier used in memory tagging (e.g. account:acme-corp).",
     )
+    target.add_argument(
+        "--accounts-file",
+        type=Path,
+        help="Batch mode: file with one account identifier per line ('#' starts a comment).",
+    )
     parser.add_argument(
         "--lookback-days",
         type=int,
@@ -100,6 +157,77 @@ def parse_args() -> argparse.Namespace:
         default="markdown",
         help="Output format.",
     )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=10,
+        help="Maximum memories shown per section, ranked by relevance (0 = no limit).",
+    )
+    parser.add_argument(
+        "--half-life-days",
+        type=float,
+        default=14.0,
+        help="Recency half-life used when ranking memories.",
+    )
+    parser.add_argument(
+        "--no-dedupe",
+        action="store_true",
+        help="Keep near-duplicate memories instead of collapsing them.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Batch mode: directory for one briefing per account plus an index (required with --accounts-file).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Batch mode: number of accounts searched concurrently.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Batch mode: regenerate accounts already completed by an earlier (interrupted) run.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help=(
+            "Incrementally refresh the last briefing for this account: fetch only memories "
+            "created since the stored watermark and merge them into the saved state."
+        ),
+    )
+    parser.add_argument(
+        "--state-dir",
+        type=Path,
+        help="Directory for refresh state (defaults to ~/.cogniz/state/account-briefing).",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help=(
+            "Answer from the local memory index (see _memory_index.py), asking the API "
+            "only for memories created since the account was last synced."
+        ),
+    )
+    parser.add_argument(
+        "--index-path",
+        type=Path,
+        help=(
+            "Memory index database file, or an existing directory to hold index.sqlite3 "
+            "(defaults to ~/.cogniz/state/memory-index)."
+        ),
+    )
+    parser.add_argument(
+        "--index-max-age",
+        type=float,
+        default=DEFAULT_SYNC_MAX_AGE_MINUTES,
+        help=(
+            "Minutes after a sync during which --index reads skip the API top-up "
+            f"(default {DEFAULT_SYNC_MAX_AGE_MINUTES:g}; 0 tops up on every run)."
+        ),
+    )
     parser.add_argument(
         "--memory-api-path",
         help="Override path to the cogniz-memory-manager scripts directory.",
@@ -109,7 +237,18 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Enable verbose logging.",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.accounts_file and not args.output_dir:
+        parser.error("--output-dir is required with --accounts-file")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.index and args.refresh:
+        parser.error("--index and --refresh are alternative incremental modes; pass only one")
+    if args.top_k < 0:
+        parser.error("--top-k must be zero or positive")
+    if args.half_life_days <= 0:
+        parser.error("--half-life-days must be positive")
+    return args
 
 
 def build_query(account: str, lookback_days: int) -> str:
@@ -117,25 +256,247 @@ def build_query(account: str, lookback_days: int) -> str:
     return f"{account} date>={cutoff}"
 
 
+def build_since_query(account: str, watermark: str) -> str:
+    """Query for memories created on or after the watermark's day."""
+    return f"{account} date>={watermark[:10]}"
+
+
 def bucket_memory(content: str) -> str:
-    lowered = content.lower()
-    for bucket, keywords in KEYWORD_BUCKETS.items():
-        if any(term in lowered for term in keywords):
-            return bucket
-    return "notes"
+    return BUCKET_CLASSIFIER.first(content, default="notes")
 
 
-def summarise(memories: List[Dict]) -> Dict[str, List[Dict]]:
+def summarise(memories: List[Dict], buckets: Optional[Dict[str, str]] = None) -> Dict[str, List[Dict]]:
+    """Group memories by bucket, using precomputed `buckets` by memory ID where given."""
     summary: Dict[str, List[Dict]] = {bucket: [] for bucket in KEYWORD_BUCKETS}
     summary["notes"] = []
+    buckets = buckets or {}
     for item in memories:
-        content = item.get("content") or ""
-        bucket = bucket_memory(content)
+        bucket = buckets.get(str(item.get("id"))) or bucket_memory(item.get("content") or "")
         summary.setdefault(bucket, []).append(item)
     return summary
 
 
-def format_markdown(account: str, grouped: Dict[str, List[Dict]]) -> str:
+def state_path(account: str, directory: Optional[Path]) -> Path:
+    return state_dir("account-briefing", directory) / f"{safe_filename(account)}.json"
+
+
+def load_state(path: Path, account: str, lookback_days: int, logger: logging.Logger) -> Optional[Dict]:
+    state = read_json(path)
+    if not state:
+        return None
+    if state.get("version") != STATE_VERSION or state.get("account") != account:
+        logger.info("Discarding incompatible briefing state at %s", path)
+        return None
+    if lookback_days > state.get("lookback_days", 0):
+        # Stored state does not cover the older part of a wider window.
+        logger.info("Lookback widened to %d days; rebuilding briefing state", lookback_days)
+        return None
+    return state
+
+
+def save_state(path: Path, account: str, lookback_days: int, watermark: str, entries: List[Dict]) -> None:
+    write_json_atomic(
+        path,
+        {
+            "version": STATE_VERSION,
+            "account": account,
+            "lookback_days": lookback_days,
+            "watermark": watermark,
+            "memories": entries,
+        },
+    )
+
+
+def to_state_entry(mem: Dict, bucket: str) -> Dict:
+    entry = {field: mem.get(field) for field in STATE_FIELDS}
+    entry["bucket"] = bucket
+    return entry
+
+
+def merge_refresh(
+    previous: List[Dict],
+    fetched: List[Dict],
+    cutoff: str,
+) -> Tuple[List[Dict], int, int]:
+    """
+    Patch stored entries with newly fetched memories.
+
+    Only fetched memories are bucketed. A fetched memory replaces the stored
+    entry with the same ID, so edited memories are re-bucketed. Entries that
+    have aged out of the lookback window are dropped.
+
+    Returns:
+        (merged entries, number of new memories, number of expired entries)
+    """
+    refreshed = {
+        mem.get("id"): to_state_entry(mem, bucket_memory(mem.get("content") or ""))
+        for mem in fetched
+    }
+    kept = [entry for entry in previous if entry.get("id") not in refreshed]
+    added = len(refreshed) - (len(previous) - len(kept))
+    merged = []
+    expired = 0
+    for entry in kept + list(refreshed.values()):
+        created = entry.get("created_at")
+        if created and str(created)[:10] < cutoff:
+            expired += 1
+            continue
+        merged.append(entry)
+    return merged, added, expired
+
+
+def group_entries(entries: List[Dict]) -> Dict[str, List[Dict]]:
+    """Rebuild section groups from stored entries without re-classifying them."""
+    grouped: Dict[str, List[Dict]] = {bucket: [] for bucket in KEYWORD_BUCKETS}
+    grouped["notes"] = []
+    for entry in entries:
+        grouped.setdefault(entry.get("bucket") or "notes", []).append(entry)
+    return grouped
+
+
+def parse_created_at(value) -> Optional[datetime]:
+    """Parse an API timestamp into a naive UTC datetime (None when unusable)."""
+    if not value:
+        return None
+    text = str(value).strip().replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            parsed = datetime.strptime(text[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def score_memory(mem: Dict, section: str, now: datetime, half_life_days: float, lookback_days: int) -> float:
+    """
+    Relevance in [0, 1]: recency decay, keyword density for the section and
+    a weight for the category the memory was filed under.
+    """
+    created = parse_created_at(mem.get("created_at"))
+    age_days = (now - created).total_seconds() / 86400.0 if created else float(lookback_days)
+    recency = 0.5 ** (max(age_days, 0.0) / half_life_days)
+
+    content = mem.get("content") or ""
+    words = len(content.split())
+    hits = BUCKET_CLASSIFIER.scan(content).get(section, 0) if section in KEYWORD_BUCKETS else 0
+    # Saturates at one keyword per DENSITY_SATURATION words.
+    density = min(1.0, hits * DENSITY_SATURATION / words) if words else 0.0
+
+    source = CATEGORY_WEIGHTS.get(mem.get("category") or "", DEFAULT_CATEGORY_WEIGHT)
+    return (
+        SCORE_WEIGHTS["recency"] * recency
+        + SCORE_WEIGHTS["density"] * density
+        + SCORE_WEIGHTS["source"] * source
+    )
+
+
+def shingles(content: str) -> frozenset:
+    tokens = WORD_PATTERN.findall(content.lower())
+    if len(tokens) < 2:
+        return frozenset(tokens)
+    return frozenset(zip(tokens, tokens[1:]))
+
+
+def minhash_bands(features: frozenset) -> Tuple[Tuple[int, ...], ...]:
+    """MinHash signature split into bands; near-duplicates very likely share one."""
+    if not features:
+        return ()
+    prime = MINHASH_PRIME
+    hashes = [hash(feature) & prime for feature in features]
+    signature = [min((a * h + b) % prime for h in hashes) for a, b in MINHASH_PERMUTATIONS]
+    return tuple(
+        (index,) + tuple(signature[index * MINHASH_ROWS:(index + 1) * MINHASH_ROWS])
+        for index in range(len(MINHASH_PERMUTATIONS) // MINHASH_ROWS)
+    )
+
+
+def rank_section(
+    entries: List[Dict],
+    section: str,
+    top_k: int,
+    now: datetime,
+    half_life_days: float,
+    lookback_days: int,
+    dedupe: bool = True,
+) -> Tuple[List[Dict], int]:
+    """
+    Select the top-k memories of one section by relevance.
+
+    Scores are heapified in O(n) and popped best-first; each popped memory is
+    checked against the representatives already kept (MinHash band lookup,
+    confirmed by shingle Jaccard) and folded into the first one it nearly
+    duplicates. Popping stops as soon as ``top_k`` representatives are kept,
+    so the work after scoring is bounded by the section size, not sorted in full.
+
+    Returns:
+        (kept memories, each with 'score' and 'similar_ids', number omitted)
+    """
+    heap = [
+        (-score_memory(mem, section, now, half_life_days, lookback_days), index, mem)
+        for index, mem in enumerate(entries)
+    ]
+    heapq.heapify(heap)
+
+    kept: List[Dict] = []
+    kept_shingles: List[frozenset] = []
+    band_index: Dict[Tuple[int, ...], List[int]] = {}
+    exact_index: Dict[str, int] = {}
+    folded = 0
+    while heap and (top_k <= 0 or len(kept) < top_k):
+        negative_score, _, mem = heapq.heappop(heap)
+        content = mem.get("content") or ""
+        if dedupe:
+            normalized = " ".join(WORD_PATTERN.findall(content.lower()))
+            target = exact_index.get(normalized)
+            features = bands = None
+            if target is None:
+                features = shingles(content)
+                bands = minhash_bands(features)
+                for band in bands:
+                    for candidate in band_index.get(band, ()):
+                        other = kept_shingles[candidate]
+                        union = len(features | other)
+                        if union and len(features & other) / union >= NEAR_DUPLICATE_JACCARD:
+                            target = candidate
+                            break
+                    if target is not None:
+                        break
+            if target is not None:
+                kept[target]["similar_ids"].append(mem.get("id"))
+                folded += 1
+                continue
+            exact_index[normalized] = len(kept)
+            kept_shingles.append(features)
+            for band in bands:
+                band_index.setdefault(band, []).append(len(kept))
+        kept.append({**mem, "score": round(-negative_score, 4), "similar_ids": []})
+
+    omitted = len(entries) - len(kept) - folded
+    return kept, omitted
+
+
+def rank_grouped(grouped: Dict[str, List[Dict]], args: argparse.Namespace) -> Dict[str, Tuple[List[Dict], int]]:
+    now = datetime.utcnow()
+    return {
+        section: rank_section(
+            entries,
+            section,
+            args.top_k,
+            now,
+            args.half_life_days,
+            args.lookback_days,
+            dedupe=not args.no_dedupe,
+        )
+        for section, entries in grouped.items()
+        if entries
+    }
+
+
+def format_markdown(account: str, ranked: Dict[str, Tuple[List[Dict], int]]) -> str:
     lines = [
         f"# Account Briefing: {account}",
         "",
@@ -144,7 +505,7 @@ def format_markdown(account: str, grouped: Dict[str, List[Dict]]) -> str:
     ]
     order = ("highlights", "risks", "actions", "metrics", "notes")
     for section in order:
-        entries = grouped.get(section, [])
+        entries, omitted = ranked.get(section, ([], 0))
         if not entries:
             continue
         title = section.capitalize()
@@ -152,12 +513,16 @@ def format_markdown(account: str, grouped: Dict[str, List[Dict]]) -> str:
         for mem in entries:
             snippet = (mem.get("content") or "").strip().replace("\n", " ")
             memory_id = mem.get("id", "unknown")
-            lines.append(f"- [{memory_id}] {snippet[:220]}{'...' if len(snippet) > 220 else ''}")
+            similar = mem.get("similar_ids") or []
+            suffix = f" (+{len(similar)} similar)" if similar else ""
+            lines.append(f"- [{memory_id}] {snippet[:220]}{'...' if len(snippet) > 220 else ''}{suffix}")
+        if omitted:
+            lines.append(f"- _{omitted} lower-ranked memories omitted_")
         lines.append("")
     return "\n".join(lines).strip() + "\n"
 
 
-def format_json(account: str, grouped: Dict[str, List[Dict]]) -> str:
+def format_json(account: str, ranked: Dict[str, Tuple[List[Dict], int]]) -> str:
     payload = {
         "account": account,
         "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
@@ -168,16 +533,190 @@ def format_json(account: str, grouped: Dict[str, List[Dict]]) -> str:
                     "category": mem.get("category"),
                     "summary": (mem.get("content") or "").strip(),
                     "created_at": mem.get("created_at"),
+                    "score": mem.get("score"),
+                    "similar_ids": mem.get("similar_ids", []),
                 }
                 for mem in entries
             ]
-            for section, entries in grouped.items()
+            for section, (entries, _) in ranked.items()
             if entries
         },
+        "omitted": {section: omitted for section, (_, omitted) in ranked.items() if omitted},
     }
     return json.dumps(payload, indent=2)
 
 
+def generate_briefing(
+    api,
+    project_id,
+    account: str,
+    args: argparse.Namespace,
+    logger: logging.Logger,
+    index: Optional[MemoryIndex] = None,
+) -> Optional[Tuple[str, Dict[str, int]]]:
+    """
+    Build one account's briefing, honouring --refresh state or the memory index.
+
+    Returns:
+        (rendered briefing, per-section counts) or None when no memories match
+    """
+    run_started = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    state_file = state_path(account, args.state_dir) if args.refresh else None
+    state = load_state(state_file, account, args.lookback_days, logger) if state_file else None
+
+    if state:
+        query = build_since_query(account, state["watermark"])
+        logger.info("Refreshing since %s with query '%s' (limit=%s)", state["watermark"], query, args.limit)
+        fetched = paged_search(api, query, args.limit, REFRESH_MAX_MEMORIES, project_id, logger)
+        if len(fetched) >= REFRESH_MAX_MEMORIES:
+            # Keep the old watermark so the next refresh asks for this window again.
+            logger.warning("Refresh stopped at %d memories; keeping the previous watermark.", len(fetched))
+            run_started = state["watermark"]
+        cutoff = (datetime.utcnow() - timedelta(days=args.lookback_days)).strftime("%Y-%m-%d")
+        entries, added, expired = merge_refresh(state.get("memories", []), fetched, cutoff)
+        logger.info("Refresh added %d new memories, expired %d, kept %d", added, expired, len(entries))
+        grouped = group_entries(entries)
+    else:
+        if index is not None:
+            cutoff = (datetime.utcnow() - timedelta(days=args.lookback_days)).strftime("%Y-%m-%d")
+            memories = search_with_index(
+                index, api, account, project_id=project_id, since=cutoff, limit=args.limit, logger=logger
+            )
+            grouped = summarise(memories, index.buckets(account, memories, BUCKET_CLASSIFIER, "notes"))
+        else:
+            query = build_query(account=account, lookback_days=args.lookback_days)
+            logger.info("Searching memories with query '%s' (limit=%s)", query, args.limit)
+            if state_file:
+                # The first refresh build seeds the state, so it pages through the
+                # whole lookback window rather than stopping at --limit.
+                memories = paged_search(api, query, args.limit, REFRESH_MAX_MEMORIES, project_id, logger)
+                if len(memories) >= REFRESH_MAX_MEMORIES:
+                    # No earlier watermark to fall back to: save nothing, rebuild next time.
+                    logger.warning(
+                        "Initial refresh build stopped at %d memories; not saving refresh state.", len(memories)
+                    )
+                    state_file = None
+            else:
+                memories = api.search(query=query, project_id=project_id, limit=args.limit)
+            grouped = summarise(memories)
+        entries = [
+            to_state_entry(mem, bucket)
+            for bucket, items in grouped.items()
+            for mem in items
+        ]
+
+    if state_file:
+        save_state(state_file, account, args.lookback_days, run_started, entries)
+        logger.debug("Saved briefing state to %s", state_file)
+
+    if not entries:
+        return None
+
+    ranked = rank_grouped(grouped, args)
+    if args.format == "json":
+        output = format_json(account, ranked)
+    else:
+        output = format_markdown(account, ranked)
+    counts = {section: len(items) for section, items in grouped.items() if items}
+    return output, counts
+
+
+def read_accounts(path: Path) -> List[str]:
+    """Read account identifiers, skipping blanks, comments and duplicates."""
+    accounts: List[str] = []
+    seen = set()
+    for line in path.read_text(encoding="utf-8").splitlines():
+        account = line.split("#", 1)[0].strip()
+        if account and account not in seen:
+            seen.add(account)
+            accounts.append(account)
+    return accounts
+
+
+def format_index(manifest: Dict[str, Dict], accounts: List[str]) -> str:
+    lines = [
+        "# Account Briefings Index",
+        "",
+        f"Generated: {datetime.utcnow().isoformat(timespec='seconds')}Z",
+        "",
+        "| Account | Status | Briefing | Highlights | Risks | Actions | Metrics | Notes |",
+        "|---------|--------|----------|------------|-------|---------|---------|-------|",
+    ]
+    for account in accounts:
+        entry = manifest.get(account, {"status": "pending"})
+        counts = entry.get("counts", {})
+        link = f"[{entry['file']}]({entry['file']})" if entry.get("file") else "-"
+        cells = " | ".join(str(counts.get(section, 0)) for section in ("highlights", "risks", "actions", "metrics", "notes"))
+        lines.append(f"| {account} | {entry['status']} | {link} | {cells} |")
+    return "\n".join(lines) + "\n"
+
+
+def run_batch(
+    api,
+    project_id,
+    args: argparse.Namespace,
+    logger: logging.Logger,
+    index: Optional[MemoryIndex] = None,
+) -> None:
+    """
+    Generate briefings for every account in --accounts-file with one API client.
+
+    Progress is checkpointed to a manifest in --output-dir after each account,
+    so an interrupted run resumes with the accounts it has not finished.
+    """
+    accounts = read_accounts(args.accounts_file)
+    output_dir: Path = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / ".batch_manifest.json"
+    manifest: Dict[str, Dict] = {} if args.force else (read_json(manifest_path, {}) or {})
+    extension = "json" if args.format == "json" else "md"
+
+    pending = [
+        account
+        for account in accounts
+        if manifest.get(account, {}).get("status") not in ("done", "empty")
+    ]
+    logger.info(
+        "Batch: %d accounts, %d already complete, %d to generate with %d workers",
+        len(accounts),
+        len(accounts) - len(pending),
+        len(pending),
+        args.workers,
+    )
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(generate_briefing, api, project_id, account, args, logger, index): account
+            for account in pending
+        }
+        for future in as_completed(futures):
+            account = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:  # noqa: BLE001 - keep the batch going
+                failures += 1
+                logger.error("Briefing for %s failed: %s", account, exc)
+                manifest[account] = {"status": "failed", "error": str(exc)}
+            else:
+                if result is None:
+                    logger.warning("No memories found for %s.", account)
+                    manifest[account] = {"status": "empty"}
+                else:
+                    output, counts = result
+                    filename = f"{safe_filename(account)}.{extension}"
+                    (output_dir / filename).write_text(output, encoding="utf-8")
+                    manifest[account] = {"status": "done", "file": filename, "counts": counts}
+            # Checkpoint from the main thread only; workers never touch the manifest.
+            write_json_atomic(manifest_path, manifest)
+
+    (output_dir / "index.md").write_text(format_index(manifest, accounts), encoding="utf-8")
+    logger.info("Wrote %d briefings and index to %s", sum(1 for a in accounts if manifest.get(a, {}).get("status") == "done"), output_dir)
+    if failures:
+        logger.error("%d accounts failed; re-run the same command to retry them.", failures)
+        sys.exit(1)
+
+
 def main() -> None:
     args = parse_args()
     configure_logging(args.verbose)
@@ -194,20 +733,21 @@ def main() -> None:
         project_id=config.get("project_id"),
     )
 
-    query = build_query(account=args.account, lookback_days=args.lookback_days)
-    logger.info("Searching memories with query '%s' (limit=%s)", query, args.limit)
-    memories = api.search(query=query, project_id=config.get("project_id"), limit=args.limit)
+    index = MemoryIndex(default_index_path(args.index_path), args.index_max_age) if args.index else None
+    try:
+        if args.accounts_file:
+            run_batch(api, config.get("project_id"), args, logger, index)
+            return
+        result = generate_briefing(api, config.get("project_id"), args.account, args, logger, index)
+    finally:
+        if index is not None:
+            index.close()
 
-    if not memories:
+    if result is None:
         logger.warning("No memories found for the provided query.")
         return
 
-    grouped = summarise(memories)
-    if args.format == "json":
-        output = format_json(args.account, grouped)
-    else:
-        output = format_markdown(args.account, grouped)
-
+    output, _ = result
     print(output)
     if args.output:
         args.output.parent.mkdir(parents=True, exist_ok=True)
@@ -217,4 +757,3 @@ def main() -> None:
 
 if __name__ == "__main__":  # pragma: no cover
     main()
-
@@ -8,17 +8,53 @@ from __future__ import annotations
 
 import argparse
 import logging
+import re
 import sys
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 ROOT_DIR = SCRIPT_DIR.parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from _shared import configure_logging, ensure_memory_api  # noqa: E402
+from _shared import (  # noqa: E402
+    DEFAULT_SEARCH_TIMEOUT,
+    configure_logging,
+    ensure_memory_api,
+    parse_timestamp,
+    read_json,
+    run_searches,
+    safe_filename,
+    state_dir,
+    write_json_atomic,
+)
+from _memory_index import (  # noqa: E402
+    DEFAULT_SYNC_MAX_AGE_MINUTES,
+    MemoryIndex,
+    default_index_path,
+    read_scopes,
+    search_with_index,
+)
+
+NOTE_CATEGORIES = {
+    "discovery": "discovery-notes",
+    "progress": "onboarding-progress",
+    "blockers": "onboarding-blockers",
+}
+GENERAL_INDUSTRY = "general"
+DEFAULT_PLAYBOOK_TTL_HOURS = 24.0
+
+# A standalone `account:<id>` token (tag or inline); prose such as
+# "account: renewal at risk" is not an account reference.
+ACCOUNT_PATTERN = re.compile(r"(?<![^\s(\[])account:([a-z0-9](?:[\w.-]*\w)?)(?=$|[\s,;.)\]])", re.IGNORECASE)
+# Portfolio dashboard: blockers listed per account and the staleness threshold.
+BLOCKERS_PER_ACCOUNT = 2
+DEFAULT_STALE_DAYS = 14
 
 
 def parse_args() -> argparse.Namespace:
@@ -26,7 +62,30 @@ def parse_args() -> argparse.Namespace:
         description="Generate a Cogniz-backed onboarding plan."
     )
     parser.add_argument("--config", required=True, help="Path to Cogniz config JSON.")
-    parser.add_argument("--account", required=True, help="Account identifier or tag.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--account", help="Account identifier or tag.")
+    target.add_argument(
+        "--portfolio",
+        action="store_true",
+        help="Build one dashboard for every account with onboarding notes (one bulk search per note category).",
+    )
+    parser.add_argument(
+        "--accounts-file",
+        type=Path,
+        help="Portfolio: restrict the dashboard to these accounts (one per line); listed accounts without notes are shown too.",
+    )
+    parser.add_argument(
+        "--portfolio-limit",
+        type=int,
+        default=2000,
+        help="Portfolio: max memories fetched per note category.",
+    )
+    parser.add_argument(
+        "--stale-days",
+        type=int,
+        default=DEFAULT_STALE_DAYS,
+        help="Portfolio: flag accounts without any note for this many days.",
+    )
     parser.add_argument(
         "--industry",
         default="general",
@@ -43,6 +102,48 @@ def parse_args() -> argparse.Namespace:
         default=40,
         help="Max memories to fetch per query.",
     )
+    parser.add_argument(
+        "--playbook-ttl",
+        type=float,
+        default=DEFAULT_PLAYBOOK_TTL_HOURS,
+        help="Hours a cached industry playbook stays fresh (0 always refetches).",
+    )
+    parser.add_argument(
+        "--playbook-cache-dir",
+        type=Path,
+        help="Playbook cache directory (defaults to ~/.cogniz/state/customer-onboarding).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_SEARCH_TIMEOUT,
+        help="Seconds to wait for the concurrent playbook and account-note searches.",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help=(
+            "Answer from the local memory index (see _memory_index.py), asking the API "
+            "only for memories created since the account was last synced."
+        ),
+    )
+    parser.add_argument(
+        "--index-path",
+        type=Path,
+        help=(
+            "Memory index database file, or an existing directory to hold index.sqlite3 "
+            "(defaults to ~/.cogniz/state/memory-index)."
+        ),
+    )
+    parser.add_argument(
+        "--index-max-age",
+        type=float,
+        default=DEFAULT_SYNC_MAX_AGE_MINUTES,
+        help=(
+            "Minutes after a sync during which --index reads skip the API top-up "
+            f"(default {DEFAULT_SYNC_MAX_AGE_MINUTES:g}; 0 tops up on every run)."
+        ),
+    )
     parser.add_argument(
         "--memory-api-path",
         help="Override path to the cogniz-memory-manager scripts directory.",
@@ -52,42 +153,331 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Enable verbose logging.",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.playbook_ttl < 0:
+        parser.error("--playbook-ttl cannot be negative")
+    if args.timeout <= 0:
+        parser.error("--timeout must be positive")
+    if args.portfolio and args.index:
+        parser.error("--index applies to single-account plans")
+    if args.accounts_file and not args.portfolio:
+        parser.error("--accounts-file requires --portfolio")
+    if args.portfolio_limit < 1:
+        parser.error("--portfolio-limit must be positive")
+    return args
+
+
+def playbook_query(industry: str) -> str:
+    return f"category:onboarding-playbook industry:{industry}"
+
+
+class PlaybookCache:
+    """
+    Industry playbooks cached in-process and on disk for `ttl` seconds.
+
+    Playbooks are shared by every account in an industry, so a cached copy
+    serves all plans built within the TTL. Entries remember the search limit
+    and project they were fetched with and are only reused for requests
+    they fully cover.
+    """
+
+    _memo: Dict[Tuple[str, str], Dict] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, directory: Path, ttl: float, project_id: Optional[str] = None):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.project_id = project_id or ""
+
+    def _path(self, industry: str) -> Path:
+        return self.directory / f"{safe_filename(f'{self.project_id}-{industry}')}.json"
+
+    def get(self, industry: str, limit: int) -> Optional[List[Dict]]:
+        if self.ttl <= 0:
+            return None
+        key = (self.project_id, industry)
+        with self._lock:
+            entry = self._memo.get(key)
+        if entry is None:
+            entry = read_json(self._path(industry))
+            if not isinstance(entry, dict):
+                return None
+        if time.time() - entry.get("fetched_at", 0) > self.ttl:
+            return None
+        memories = entry.get("memories") or []
+        if entry.get("limit", 0) < limit and len(memories) >= entry.get("limit", 0):
+            return None  # the cached search was capped below what is asked for now
+        with self._lock:
+            self._memo[key] = entry
+        return memories[:limit]
 
+    def put(self, industry: str, limit: int, memories: List[Dict]) -> None:
+        entry = {"fetched_at": time.time(), "limit": limit, "memories": memories}
+        with self._lock:
+            self._memo[(self.project_id, industry)] = entry
+        if self.ttl > 0:
+            write_json_atomic(self._path(industry), entry)
 
-def fetch_playbooks(api, industry: str, limit: int, logger: logging.Logger) -> List[Dict]:
-    query = f"category:onboarding-playbook industry:{industry}"
-    logger.info("Fetching onboarding playbooks with query '%s'", query)
-    results = api.search(query=query, limit=limit, project_id=api.project_id)
-    if not results and industry != "general":
-        fallback = "category:onboarding-playbook industry:general"
-        logger.warning("No playbooks found for industry '%s'. Falling back to '%s'.", industry, fallback)
-        results = api.search(query=fallback, limit=limit, project_id=api.project_id)
-    return results
 
+def fetch_plan_inputs(
+    api,
+    account: str,
+    industry: str,
+    limit: int,
+    logger: logging.Logger,
+    cache: Optional[PlaybookCache] = None,
+    index: Optional[MemoryIndex] = None,
+    timeout: Optional[float] = DEFAULT_SEARCH_TIMEOUT,
+) -> Tuple[List[Dict], Dict[str, List[Dict]], Dict[str, str]]:
+    """
+    Fetch playbooks and account notes in one concurrent round trip.
 
-def fetch_account_notes(api, account: str, limit: int, logger: logging.Logger) -> Dict[str, List[Dict]]:
-    queries = {
-        "discovery": f"account:{account} category:discovery-notes",
-        "progress": f"account:{account} category:onboarding-progress",
-        "blockers": f"account:{account} category:onboarding-blockers",
+    Playbooks come from the cache when fresh. Otherwise the industry search
+    runs alongside the note searches, together with a speculative search
+    for the general playbook, so an industry without a playbook does not
+    cost a second round trip.
+
+    Returns:
+        (playbooks, notes by label, errors by failed search name)
+    """
+    playbooks: Dict[str, List[Dict]] = {}
+    wanted = [industry] if industry == GENERAL_INDUSTRY else [industry, GENERAL_INDUSTRY]
+    for name in wanted:
+        cached = cache.get(name, limit) if cache is not None else None
+        if cached is not None:
+            logger.debug("Using cached '%s' playbooks", name)
+            playbooks[name] = cached
+    if playbooks.get(industry):
+        wanted = []  # the industry playbook is known; no fallback needed
+    searches = {
+        f"{name} playbook": {"query": playbook_query(name), "limit": limit, "project_id": api.project_id}
+        for name in wanted
+        if name not in playbooks
+    }
+    if index is None:
+        for label, category in NOTE_CATEGORIES.items():
+            searches[f"{label} notes"] = {
+                "query": f"account:{account} category:{category}",
+                "limit": limit,
+                "project_id": api.project_id,
+            }
+    batch = run_searches(api, searches, timeout, logger) if searches else None
+    errors = dict(batch.errors) if batch else {}
+    for name in wanted:
+        search = f"{name} playbook"
+        if batch and search in batch.results and search not in batch.errors:
+            playbooks[name] = batch.results[search]
+            if cache is not None:
+                cache.put(name, limit, playbooks[name])
+
+    selected = playbooks.get(industry) or []
+    if not selected and industry != GENERAL_INDUSTRY:
+        logger.warning("No playbooks found for industry '%s'. Falling back to '%s'.", industry, GENERAL_INDUSTRY)
+        selected = playbooks.get(GENERAL_INDUSTRY) or []
+
+    if index is not None:
+        notes = fetch_account_notes(api, account, limit, logger, index, timeout)
+    else:
+        notes = {label: batch.results[f"{label} notes"] for label in NOTE_CATEGORIES}
+    return selected, notes, errors
+
+
+def fetch_account_notes(
+    api,
+    account: str,
+    limit: int,
+    logger: logging.Logger,
+    index: Optional[MemoryIndex] = None,
+    timeout: Optional[float] = DEFAULT_SEARCH_TIMEOUT,
+) -> Dict[str, List[Dict]]:
+    if index is not None:
+        # One indexed scope read replaces the three category searches.
+        memories = search_with_index(
+            index,
+            api,
+            f"account:{account}",
+            project_id=api.project_id,
+            categories=tuple(NOTE_CATEGORIES.values()),
+            limit=limit * len(NOTE_CATEGORIES),
+            logger=logger,
+        )
+        by_category: Dict[str, List[Dict]] = {}
+        for mem in memories:
+            by_category.setdefault(mem.get("category"), []).append(mem)
+        return {label: by_category.get(category, [])[:limit] for label, category in NOTE_CATEGORIES.items()}
+
+    searches = {
+        label: {"query": f"account:{account} category:{category}", "limit": limit, "project_id": api.project_id}
+        for label, category in NOTE_CATEGORIES.items()
+    }
+    return run_searches(api, searches, timeout, logger).results
+
+
+@dataclass
+class AccountStatus:
+    """Onboarding activity for one account in the portfolio dashboard."""
+    account: str
+    counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(NOTE_CATEGORIES, 0))
+    last_update: str = ""
+    blockers: List[Dict] = field(default_factory=list)
+
+    def days_since_update(self, now: datetime) -> Optional[float]:
+        """Days since the newest note; None (shown as stale) without a readable timestamp."""
+        updated = parse_timestamp(self.last_update)
+        if updated is None:
+            return None
+        return (now - updated).total_seconds() / 86400.0
+
+
+def normalise_account(value: str) -> str:
+    """`Account:Acme` and `acme` both become `acme`."""
+    value = value.strip().lower()
+    return value[len("account:"):].strip() if value.startswith("account:") else value
+
+
+def memory_account(mem: Dict) -> Optional[str]:
+    """Account a memory is about: `account:` tag, metadata, then an `account:<id>` token in content."""
+    for tag in mem.get("tags") or ():
+        match = ACCOUNT_PATTERN.fullmatch(str(tag).strip())
+        if match:
+            return match.group(1).lower()
+    metadata = mem.get("metadata") or {}
+    if isinstance(metadata, dict):
+        for key in ("account", "account_id"):
+            if metadata.get(key):
+                return normalise_account(str(metadata[key]))
+    match = ACCOUNT_PATTERN.search(mem.get("content") or "")
+    return match.group(1).lower() if match else None
+
+
+def partition_by_account(
+    notes: Dict[str, List[Dict]],
+    accounts: Optional[List[str]] = None,
+) -> Dict[str, AccountStatus]:
+    """
+    Split bulk note results into per-account status in one pass.
+
+    With `accounts` (`acme` or `account:acme`), only those accounts are kept
+    (and all of them are returned, even without notes); otherwise every
+    account seen is.
+    """
+    statuses: Dict[str, AccountStatus] = {}
+    allowed = None
+    if accounts is not None:
+        allowed = dict.fromkeys(normalise_account(account) for account in accounts)
+        statuses = {account: AccountStatus(account) for account in allowed}
+    for label, memories in notes.items():
+        for mem in memories:
+            account = memory_account(mem)
+            if account is None or (allowed is not None and account not in allowed):
+                continue
+            status = statuses.get(account)
+            if status is None:
+                status = statuses[account] = AccountStatus(account)
+            status.counts[label] += 1
+            # Normalised so epoch and `YYYY/MM/DD` values order correctly against ISO ones.
+            created_at = parse_timestamp(mem.get("created_at"))
+            if created_at is not None:
+                stamp = created_at.isoformat(timespec="seconds") + "Z"
+                if stamp > status.last_update:
+                    status.last_update = stamp
+            if label == "blockers":
+                status.blockers.append(mem)
+                if len(status.blockers) > BLOCKERS_PER_ACCOUNT:
+                    status.blockers.sort(key=lambda item: str(item.get("created_at") or ""), reverse=True)
+                    del status.blockers[BLOCKERS_PER_ACCOUNT:]
+    return statuses
+
+
+def fetch_portfolio_notes(
+    api,
+    limit: int,
+    logger: logging.Logger,
+    timeout: Optional[float] = DEFAULT_SEARCH_TIMEOUT,
+) -> Tuple[Dict[str, List[Dict]], Dict[str, str]]:
+    """One concurrent bulk search per note category, across all accounts."""
+    searches = {
+        label: {"query": f"category:{category}", "limit": limit, "project_id": api.project_id}
+        for label, category in NOTE_CATEGORIES.items()
     }
-    results = {}
-    for label, query in queries.items():
-        logger.info("Fetching %s notes with query '%s'", label, query)
-        results[label] = api.search(query=query, limit=limit, project_id=api.project_id)
-    return results
+    batch = run_searches(api, searches, timeout, logger)
+    for label, memories in batch.results.items():
+        if len(memories) >= limit:
+            logger.warning("%s search hit --portfolio-limit %d; older notes may be missing.", label, limit)
+    return batch.results, batch.errors
+
+
+def format_portfolio(
+    statuses: Dict[str, AccountStatus],
+    stale_days: int,
+    search_errors: Optional[Dict[str, str]] = None,
+    now: Optional[datetime] = None,
+) -> str:
+    now = now or datetime.utcnow()
+    ages = {account: status.days_since_update(now) for account, status in statuses.items()}
+    stale = {account for account, age in ages.items() if age is None or age > stale_days}
+    blocked = [status for status in statuses.values() if status.counts["blockers"]]
+    lines = [
+        "# Onboarding Portfolio",
+        "",
+        f"Generated: {now.isoformat(timespec='seconds')}Z",
+        f"Accounts: {len(statuses)} | With blockers: {len(blocked)} | Stale (>{stale_days} days): {len(stale)}",
+    ]
+    for name, error in (search_errors or {}).items():
+        lines.append(f"> Partial dashboard: the {name} search failed ({error}).")
+    lines.extend([
+        "",
+        "| Account | Discovery | Progress | Blockers | Last update | Days | Status |",
+        "|---------|-----------|----------|----------|-------------|------|--------|",
+    ])
+    # Most blockers first, then the longest silence.
+    ordered = sorted(
+        statuses.values(),
+        key=lambda status: (-status.counts["blockers"], -(ages[status.account] if ages[status.account] is not None else 1e9)),
+    )
+    for status in ordered:
+        age = ages[status.account]
+        flags = []
+        if status.counts["blockers"]:
+            flags.append("blocked")
+        if status.account in stale:
+            flags.append("stale")
+        lines.append(
+            f"| {status.account} | {status.counts['discovery']} | {status.counts['progress']} | "
+            f"{status.counts['blockers']} | {status.last_update[:10] or '-'} | "
+            f"{'-' if age is None else f'{age:.0f}'} | {', '.join(flags) or 'on track'} |"
+        )
 
+    lines.extend(["", "## Latest Blockers"])
+    if blocked:
+        for status in ordered:
+            if not status.blockers:
+                continue
+            lines.append(f"### {status.account}")
+            for mem in status.blockers:
+                snippet = (mem.get("content") or "").strip().replace("\n", " ")
+                lines.append(f"- [{mem.get('id', 'unknown')}] {snippet[:160]}{'...' if len(snippet) > 160 else ''}")
+    else:
+        lines.append("- No blockers logged across the portfolio.")
+    return "\n".join(lines).strip() + "\n"
 
-def format_plan(account: str, industry: str, playbooks: List[Dict], notes: Dict[str, List[Dict]]) -> str:
+
+def format_plan(
+    account: str,
+    industry: str,
+    playbooks: List[Dict],
+    notes: Dict[str, List[Dict]],
+    search_errors: Optional[Dict[str, str]] = None,
+) -> str:
     lines = [
         f"# Onboarding Plan: {account}",
         "",
         f"Generated: {datetime.utcnow().isoformat(timespec='seconds')}Z",
         f"Industry Template: {industry}",
-        "",
-        "## Playbook References",
     ]
+    for name, error in (search_errors or {}).items():
+        lines.append(f"> Partial plan: the {name} search failed ({error}).")
+    lines.extend(["", "## Playbook References"])
     if playbooks:
         for mem in playbooks[:3]:
             snippet = (mem.get("content") or "").strip().split("\n")[0]
@@ -137,6 +527,14 @@ def format_plan(account: str, industry: str, playbooks: List[Dict], notes: Dict[
     return "\n".join(lines).strip() + "\n"
 
 
+def write_output(text: str, output: Optional[Path], logger: logging.Logger) -> None:
+    print(text)
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(text, encoding="utf-8")
+        logger.info("Saved onboarding output to %s", output)
+
+
 def main() -> None:
     args = parse_args()
     configure_logging(args.verbose)
@@ -153,15 +551,32 @@ def main() -> None:
         project_id=config.get("project_id"),
     )
 
-    playbooks = fetch_playbooks(api, args.industry, args.limit, logger)
-    notes = fetch_account_notes(api, args.account, args.limit, logger)
-    plan = format_plan(args.account, args.industry, playbooks, notes)
+    if args.portfolio:
+        notes, errors = fetch_portfolio_notes(api, args.portfolio_limit, logger, args.timeout)
+        if len(errors) == len(NOTE_CATEGORIES):
+            logger.error("All searches failed; no dashboard written.")
+            sys.exit(1)
+        accounts = read_scopes(args.accounts_file) if args.accounts_file else None
+        statuses = partition_by_account(notes, accounts)
+        logger.info("Partitioned %d notes into %d accounts", sum(map(len, notes.values())), len(statuses))
+        write_output(format_portfolio(statuses, args.stale_days, errors), args.output, logger)
+        return
 
-    print(plan)
-    if args.output:
-        args.output.parent.mkdir(parents=True, exist_ok=True)
-        args.output.write_text(plan, encoding="utf-8")
-        logger.info("Saved onboarding plan to %s", args.output)
+    cache = PlaybookCache(
+        state_dir("customer-onboarding", args.playbook_cache_dir) / "playbooks",
+        args.playbook_ttl * 3600.0,
+        config.get("project_id"),
+    )
+    if args.index:
+        with MemoryIndex(default_index_path(args.index_path), args.index_max_age) as index:
+            playbooks, notes, errors = fetch_plan_inputs(
+                api, args.account, args.industry, args.limit, logger, cache, index, args.timeout
+            )
+    else:
+        playbooks, notes, errors = fetch_plan_inputs(
+            api, args.account, args.industry, args.limit, logger, cache, timeout=args.timeout
+        )
+    write_output(format_plan(args.account, args.industry, playbooks, notes, errors), args.output, logger)
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -11,14 +11,39 @@ import logging
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 ROOT_DIR = SCRIPT_DIR.parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from _shared import configure_logging, ensure_memory_api  # noqa: E402
+from _shared import KeywordClassifier, configure_logging, ensure_memory_api, paged_search  # noqa: E402
+from _memory_index import (  # noqa: E402
+    DEFAULT_SYNC_MAX_AGE_MINUTES,
+    MemoryIndex,
+    default_index_path,
+    search_with_index,
+)
+from _summarize import summarize  # noqa: E402
+from handoff_manifest import (  # noqa: E402
+    HandoffManifest,
+    build_manifest,
+    manifest_path,
+    newer_than,
+    resolve_items,
+)
+
+# A --delta fetch is paged up to this many memories; reaching it aborts the run.
+DELTA_MAX_MEMORIES = 5000
+
+# Priority-ordered: a note mentioning both a task and a risk is listed as a task.
+SECTION_CLASSIFIER = KeywordClassifier(
+    {
+        "tasks": ("todo", "next step", "follow up", "action", "owner"),
+        "risks": ("risk", "blocker", "issue", "blocked", "dependenc*"),
+    }
+)
 
 
 def parse_args() -> argparse.Namespace:
@@ -44,6 +69,52 @@ def parse_args() -> argparse.Namespace:
         type=Path,
         help="Optional path to write the handoff packet (Markdown).",
     )
+    parser.add_argument(
+        "--section-token-budget",
+        type=int,
+        help=(
+            "Summarise each section extractively to about this many tokens instead of "
+            "listing a raw snippet per memory."
+        ),
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help=(
+            "Build on the previous packet's manifest: fetch only newer memories, carry "
+            "unresolved tasks and risks forward and list what changed."
+        ),
+    )
+    parser.add_argument(
+        "--manifest-dir",
+        type=Path,
+        help="Directory for handoff manifests (default: ~/.cogniz/state/project-handoff).",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help=(
+            "Answer from the local memory index (see _memory_index.py), asking the API "
+            "only for memories created since the project was last synced."
+        ),
+    )
+    parser.add_argument(
+        "--index-path",
+        type=Path,
+        help=(
+            "Memory index database file, or an existing directory to hold index.sqlite3 "
+            "(defaults to ~/.cogniz/state/memory-index)."
+        ),
+    )
+    parser.add_argument(
+        "--index-max-age",
+        type=float,
+        default=DEFAULT_SYNC_MAX_AGE_MINUTES,
+        help=(
+            "Minutes after a sync during which --index reads skip the API top-up "
+            f"(default {DEFAULT_SYNC_MAX_AGE_MINUTES:g}; 0 tops up on every run)."
+        ),
+    )
     parser.add_argument(
         "--memory-api-path",
         help="Override path to the cogniz-memory-manager scripts directory.",
@@ -53,15 +124,67 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Enable verbose logging.",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.section_token_budget is not None and args.section_token_budget < 1:
+        parser.error("--section-token-budget must be positive")
+    return args
 
 
-def build_query(project: str, lookback_days: int) -> str:
-    cutoff = (datetime.utcnow() - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+def build_query(project: str, lookback_days: int, since: Optional[str] = None) -> str:
+    cutoff = since or (datetime.utcnow() - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
     return f"project:{project} date>={cutoff}"
 
 
-def format_packet(project: str, memories: List[Dict]) -> str:
+SECTION_TITLES = {"state": "## Current State", "tasks": "## Outstanding Tasks", "risks": "## Risks and Blockers"}
+
+
+def group_memories(memories: List[Dict]) -> Dict[str, List[Dict]]:
+    grouped: Dict[str, List[Dict]] = {section: [] for section in SECTION_TITLES}
+    for mem in memories:
+        content = (mem.get("content") or "").strip().replace("\n", " ")
+        grouped[SECTION_CLASSIFIER.first(content, default="state")].append(mem)
+    return grouped
+
+
+def _snippet(content: str, width: int = 200) -> str:
+    content = (content or "").strip().replace("\n", " ")
+    return f"{content[:width]}{'...' if len(content) > width else ''}"
+
+
+def format_changes(
+    previous: HandoffManifest,
+    grouped: Dict[str, List[Dict]],
+    carried: Dict[str, List[Dict]],
+    resolved: List[Tuple[str, Dict, str]],
+) -> List[str]:
+    """The "What Changed Since Last Handoff" section of a delta packet."""
+    new_total = sum(len(entries) for entries in grouped.values())
+    lines = [
+        "## What Changed Since Last Handoff",
+        "",
+        f"Previous packet: {previous.generated_at} (memories up to {previous.watermark or 'n/a'})",
+        "",
+        f"- New memories: {new_total} ("
+        + ", ".join(f"{section} {len(entries)}" for section, entries in grouped.items())
+        + ")",
+        f"- Resolved since last handoff: {len(resolved)}",
+    ]
+    for section, item, resolver in resolved:
+        lines.append(f"  - [{item.get('id', 'unknown')}] ({section}) {_snippet(item.get('content'), 120)} - resolved by [{resolver}]")
+    lines.append(
+        "- Still open from earlier packets: "
+        + ", ".join(f"{len(carried.get(section, []))} {section}" for section in ("tasks", "risks"))
+    )
+    return lines + [""]
+
+
+def format_packet(
+    project: str,
+    memories: List[Dict],
+    token_budget: Optional[int] = None,
+    carried: Optional[Dict[str, List[Dict]]] = None,
+    changes: Optional[List[str]] = None,
+) -> str:
     header = [
         f"# Handoff Packet: {project}",
         "",
@@ -69,22 +192,26 @@ def format_packet(project: str, memories: List[Dict]) -> str:
         "",
     ]
 
-    state_lines = ["## Current State", ""]
-    tasks_lines = ["## Outstanding Tasks", ""]
-    risk_lines = ["## Risks and Blockers", ""]
-
-    for mem in memories:
-        content = (mem.get("content") or "").strip().replace("\n", " ")
-        memory_id = mem.get("id", "unknown")
-        lowered = content.lower()
-        if any(word in lowered for word in ("todo", "next step", "follow up", "action", "owner")):
-            tasks_lines.append(f"- [{memory_id}] {content[:200]}{'...' if len(content) > 200 else ''}")
-        elif any(word in lowered for word in ("risk", "blocker", "issue", "blocked", "dependency")):
-            risk_lines.append(f"- [{memory_id}] {content[:200]}{'...' if len(content) > 200 else ''}")
+    grouped = group_memories(memories)
+    carried = carried or {}
+    sections = header + list(changes or [])
+    for section, title in SECTION_TITLES.items():
+        sections += [title, ""]
+        entries = grouped[section] + carried.get(section, [])
+        if token_budget and entries:
+            summary = summarize([(mem.get("id", "unknown"), mem.get("content") or "") for mem in entries], token_budget)
+            sections += summary.lines()
+            if summary.omitted:
+                sections.append(
+                    f"- _{summary.omitted} of {len(entries)} memories not shown (~{summary.source_tokens} tokens in full)_"
+                )
         else:
-            state_lines.append(f"- [{memory_id}] {content[:200]}{'...' if len(content) > 200 else ''}")
-
-    sections = header + state_lines + [""] + tasks_lines + [""] + risk_lines
+            for mem in grouped[section]:
+                sections.append(f"- [{mem.get('id', 'unknown')}] {_snippet(mem.get('content'))}")
+            for mem in carried.get(section, []):
+                since = (mem.get("created_at") or "")[:10] or "an earlier packet"
+                sections.append(f"- [{mem.get('id', 'unknown')}] {_snippet(mem.get('content'))} _(open since {since})_")
+        sections.append("")
     return "\n".join(sections).strip() + "\n"
 
 
@@ -104,15 +231,65 @@ def main() -> None:
         project_id=config.get("project_id"),
     )
 
-    query = build_query(args.project, args.lookback_days)
-    logger.info("Searching memories with query '%s' (limit=%s)", query, args.limit)
-    memories = api.search(query=query, project_id=config.get("project_id"), limit=args.limit)
+    manifest_file = manifest_path(args.project, config.get("project_id"), args.manifest_dir)
+    previous = HandoffManifest.load(manifest_file) if args.delta else None
+    if args.delta and previous is None:
+        logger.info("No previous handoff manifest at %s; building a full packet.", manifest_file)
+    since = previous.watermark[:10] if previous and previous.watermark else None
+    fetch_limit = DELTA_MAX_MEMORIES if previous else args.limit
+
+    if args.index:
+        cutoff = since or (datetime.utcnow() - timedelta(days=args.lookback_days)).strftime("%Y-%m-%d")
+        with MemoryIndex(default_index_path(args.index_path), args.index_max_age) as index:
+            memories = search_with_index(
+                index,
+                api,
+                f"project:{args.project}",
+                project_id=config.get("project_id"),
+                since=cutoff,
+                limit=fetch_limit,
+                logger=logger,
+            )
+    else:
+        query = build_query(args.project, args.lookback_days, since)
+        logger.info("Searching memories with query '%s' (limit=%s)", query, fetch_limit)
+        if previous:
+            memories = paged_search(api, query, args.limit, DELTA_MAX_MEMORIES, config.get("project_id"), logger)
+        else:
+            memories = api.search(query=query, project_id=config.get("project_id"), limit=args.limit)
 
-    if not memories:
+    carried: Dict[str, List[Dict]] = {}
+    changes = None
+    if previous:
+        if len(memories) >= DELTA_MAX_MEMORIES:
+            # Advancing the watermark past a truncated fetch would lose memories for good.
+            logger.error(
+                "Delta fetch stopped at %d memories; the manifest was not updated. "
+                "Run without --delta to rebuild the packet from --lookback-days.",
+                len(memories),
+            )
+            sys.exit(1)
+        memories = newer_than(memories, previous)
+        carried, resolved = resolve_items(previous.open_items, memories)
+        changes = format_changes(previous, group_memories(memories), carried, resolved)
+        logger.info(
+            "%d new memories since %s; %d items resolved, %d still open",
+            len(memories),
+            previous.watermark or previous.generated_at,
+            len(resolved),
+            sum(len(items) for items in carried.values()),
+        )
+    elif not memories:
         logger.warning("No memories found for the provided project and lookback window.")
         return
 
-    packet = format_packet(args.project, memories)
+    packet = format_packet(args.project, memories, args.section_token_budget, carried, changes)
+    # Only a full build can be truncated here; a truncated --delta fetch exits above.
+    truncated = previous is None and len(memories) >= args.limit
+    if truncated:
+        logger.warning("Search hit --limit %d; the next --delta run starts from the oldest memory seen.", args.limit)
+    build_manifest(args.project, previous, group_memories(memories), carried, logger, truncated).save(manifest_file)
+    logger.debug("Saved handoff manifest to %s", manifest_file)
     print(packet)
     if args.output:
         args.output.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,213 @@
+"""
+Manifest of the last handoff packet built for a project.
+
+`create_handoff.py` records which memories went into each section, the
+newest `created_at` it saw (the watermark) and the full text of the open
+tasks and risks. With `--delta` the next run fetches only memories newer
+than the watermark, carries the open items forward and drops those a newer
+memory resolves: one that uses a resolution keyword and either references
+the item's memory id (`[<id>]` or `memory:<id>`) or shares one of its
+`task:`/`risk:`/`issue:`/`ticket:` tags.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPT_DIR.parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from _shared import KeywordClassifier, read_json, safe_filename, state_dir, write_json_atomic  # noqa: E402
+
+MANIFEST_VERSION = 1
+# Sections whose unresolved items carry over to the next packet.
+CARRIED_SECTIONS = ("tasks", "risks")
+# Oldest carried items are dropped beyond this many per section.
+MAX_CARRIED = 200
+ITEM_TAG_PREFIXES = ("task:", "risk:", "issue:", "ticket:")
+
+RESOLUTION_CLASSIFIER = KeywordClassifier(
+    {
+        "resolved": (
+            "resolved",
+            "done",
+            "completed",
+            "closed",
+            "fixed",
+            "mitigated",
+            "unblocked",
+            "no longer blocked",
+            "shipped",
+        )
+    }
+)
+# Explicit memory references only: `[m-42]` or `memory:m-42`. Bare words and
+# numbers ("closed 42 tickets") never name an item.
+_MEMORY_REF = re.compile(
+    r"\[([A-Za-z0-9][\w:-]*)\]|(?<![\w:])memory:([A-Za-z0-9](?:[\w-]*[A-Za-z0-9])?)",
+    re.IGNORECASE,
+)
+
+
+def manifest_path(project: str, project_id: Optional[str], override: Optional[Path] = None) -> Path:
+    directory = state_dir("project-handoff", override) / safe_filename(project_id or "default")
+    return directory / f"{safe_filename(project)}.json"
+
+
+def item_tags(mem: Dict) -> Set[str]:
+    """Lower-cased `task:`/`risk:`/`issue:`/`ticket:` tags and inline tokens."""
+    tokens = [str(tag) for tag in mem.get("tags") or ()] + (mem.get("content") or "").split()
+    return {
+        token.lower().rstrip(".,;)")
+        for token in tokens
+        if token.lower().startswith(ITEM_TAG_PREFIXES) and len(token.split(":", 1)[1].strip(".,;)")) > 0
+    }
+
+
+def memory_references(content: str) -> Set[str]:
+    """Lower-cased memory ids referenced as `[<id>]` or `memory:<id>` in `content`."""
+    return {(bracketed or tagged).lower() for bracketed, tagged in _MEMORY_REF.findall(content)}
+
+
+@dataclass
+class HandoffManifest:
+    """Sections and open items of one generated packet."""
+    project: str
+    generated_at: str = ""
+    watermark: str = ""
+    sections: Dict[str, List[str]] = field(default_factory=dict)
+    open_items: Dict[str, List[Dict]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["HandoffManifest"]:
+        payload = read_json(path)
+        if not isinstance(payload, dict) or payload.get("v") != MANIFEST_VERSION:
+            return None
+        open_items = {
+            section: [
+                {"id": mem_id, "created_at": created_at, "content": content, "tags": tags}
+                for mem_id, created_at, content, tags in rows
+            ]
+            for section, rows in payload.get("open", {}).items()
+        }
+        return cls(payload["project"], payload["generated_at"], payload["watermark"], payload["sections"], open_items)
+
+    def save(self, path: Path) -> None:
+        write_json_atomic(
+            path,
+            {
+                "v": MANIFEST_VERSION,
+                "project": self.project,
+                "generated_at": self.generated_at,
+                "watermark": self.watermark,
+                "sections": self.sections,
+                "open": {
+                    section: [
+                        [mem.get("id", "unknown"), mem.get("created_at") or "", mem.get("content") or "", list(mem.get("tags") or ())]
+                        for mem in items
+                    ]
+                    for section, items in self.open_items.items()
+                },
+            },
+        )
+
+    def known_ids(self) -> Set[str]:
+        known = {mem_id for ids in self.sections.values() for mem_id in ids}
+        known.update(str(mem.get("id")) for items in self.open_items.values() for mem in items)
+        return known
+
+
+def newer_than(memories: Iterable[Dict], manifest: HandoffManifest) -> List[Dict]:
+    """Memories created after the watermark that the previous packet did not list."""
+    known = manifest.known_ids()
+    return [
+        mem
+        for mem in memories
+        if str(mem.get("id")) not in known and (not mem.get("created_at") or mem["created_at"] > manifest.watermark)
+    ]
+
+
+def resolve_items(
+    open_items: Dict[str, List[Dict]],
+    memories: List[Dict],
+) -> Tuple[Dict[str, List[Dict]], List[Tuple[str, Dict, str]]]:
+    """
+    Split carried items into still-open ones and those closed by new memories.
+
+    Returns:
+        (open items per section, [(section, item, resolving memory id), ...])
+    """
+    by_reference: Dict[str, str] = {}
+    for mem in memories:
+        content = mem.get("content") or ""
+        if not RESOLUTION_CLASSIFIER.matches(content):
+            continue
+        resolver = str(mem.get("id", "unknown"))
+        for reference in item_tags(mem) | memory_references(content):
+            by_reference.setdefault(reference, resolver)
+
+    still_open: Dict[str, List[Dict]] = {}
+    resolved: List[Tuple[str, Dict, str]] = []
+    for section, items in open_items.items():
+        still_open[section] = []
+        for item in items:
+            references = item_tags(item)
+            if item.get("id"):
+                references.add(str(item["id"]).lower())
+            resolver = next((by_reference[ref] for ref in references if ref in by_reference), None)
+            if resolver is None:
+                still_open[section].append(item)
+            else:
+                resolved.append((section, item, resolver))
+    return still_open, resolved
+
+
+def build_manifest(
+    project: str,
+    previous: Optional[HandoffManifest],
+    grouped: Dict[str, List[Dict]],
+    open_items: Dict[str, List[Dict]],
+    logger: Optional[logging.Logger] = None,
+    truncated: bool = False,
+) -> HandoffManifest:
+    """
+    Manifest for the packet just built from `grouped` new memories plus the
+    still-open carried `open_items`.
+
+    New tasks and risks stay open unless they report a resolution themselves
+    or another new memory resolves them. When the fetch was `truncated`, the
+    watermark stays at the oldest memory seen, so the next `--delta` run
+    fetches whatever was cut off (memories already listed are skipped by ID).
+    """
+    memories = [mem for entries in grouped.values() for mem in entries]
+    timestamps = [mem["created_at"] for mem in memories if mem.get("created_at")]
+    newest = max(timestamps, default="")
+    if truncated and timestamps:
+        newest = min(timestamps)
+    watermark = max(previous.watermark if previous else "", newest)
+    new_open, _ = resolve_items({section: grouped.get(section, []) for section in CARRIED_SECTIONS}, memories)
+    carried: Dict[str, List[Dict]] = {}
+    for section in CARRIED_SECTIONS:
+        fresh = [mem for mem in new_open[section] if not RESOLUTION_CLASSIFIER.matches(mem.get("content") or "")]
+        items = fresh + open_items.get(section, [])
+        if len(items) > MAX_CARRIED:
+            (logger or logging.getLogger("project_handoff")).warning(
+                "Carrying only the newest %d open %s; %d older ones dropped.", MAX_CARRIED, section, len(items) - MAX_CARRIED
+            )
+            items = items[:MAX_CARRIED]
+        carried[section] = items
+    return HandoffManifest(
+        project=project,
+        generated_at=datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        watermark=watermark,
+        sections={section: [str(mem.get("id", "unknown")) for mem in entries] for section, entries in grouped.items()},
+        open_items=carried,
+    )
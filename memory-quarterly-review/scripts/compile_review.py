@@ -8,17 +8,29 @@ from __future__ import annotations
 
 import argparse
 import logging
+import re
 import sys
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 ROOT_DIR = SCRIPT_DIR.parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from _shared import configure_logging, ensure_memory_api  # noqa: E402
+from _amounts import coerce_value  # noqa: E402
+from _shared import configure_logging, ensure_memory_api, paged_search  # noqa: E402
+from _summarize import summarize  # noqa: E402
+from quarter_snapshots import (  # noqa: E402
+    DEFAULT_GRACE_DAYS,
+    QuarterSnapshots,
+    is_closed,
+    parse_quarter,
+    previous_quarter,
+    snapshot_dir,
+)
 
 DEFAULT_CATEGORIES = (
     "okr-updates",
@@ -28,6 +40,32 @@ DEFAULT_CATEGORIES = (
     "risk-log",
 )
 
+SECTION_TITLES = {
+    "okr-updates": "Goals vs Outcomes",
+    "metrics-digest": "Key Metrics",
+    "launch-notes": "Product and Launch Highlights",
+    "customer-story": "Customer Impact",
+    "risk-log": "Risks and Mitigations",
+}
+
+# Categories whose `label: value` figures are aligned across quarters.
+COMPARED_CATEGORIES = ("okr-updates", "metrics-digest")
+IGNORED_MEASURES = frozenset({"quarter", "date", "year", "id"})
+
+_VALUE = (
+    r"(?P<sign>[-+])?\$?\s*(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<suffix>k|mm|m|b)?"
+    r"(?P<unit>\s*%|x)?(?![\w-]|\.\d)"
+)
+# A colon between two digits is a time or ratio ("Meeting at 10:30", "3:1"), not a separator.
+_SEPARATOR = r"\s*(?:=|(?<!\d):|:(?!\d))\s*"
+# "Net revenue retention: 112%" at the start of a clause ...
+_PHRASE_MEASURE = re.compile(
+    r"^\s*[-*]?\s*(?P<label>[A-Za-z][\w&/()' ]{0,60}?)" + _SEPARATOR + _VALUE, re.IGNORECASE
+)
+# ... or "mrr: 5,000" / "nrr=112%" anywhere.
+_WORD_MEASURE = re.compile(r"(?<![\w:])(?P<label>[A-Za-z][\w-]*)" + _SEPARATOR + _VALUE, re.IGNORECASE)
+_CLAUSE_SPLIT = re.compile(r"[\n;|]+|,\s+|\.\s+|\s+-\s+")
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -47,6 +85,52 @@ def parse_args() -> argparse.Namespace:
         default=50,
         help="Max memories per category.",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Fetch the whole quarter with one paged query and split it by category locally.",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=200,
+        help="Bulk mode: memories per page.",
+    )
+    parser.add_argument(
+        "--max-memories",
+        type=int,
+        default=5000,
+        help="Bulk mode: stop paging after this many memories.",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Also compile the previous quarter and show OKR and metric deltas against it.",
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        type=Path,
+        help="Directory for closed-quarter snapshots (default: ~/.cogniz/state/quarterly-review/snapshots).",
+    )
+    parser.add_argument(
+        "--no-snapshots",
+        action="store_true",
+        help="Always fetch, even for closed quarters, and store nothing.",
+    )
+    parser.add_argument(
+        "--grace-days",
+        type=int,
+        default=DEFAULT_GRACE_DAYS,
+        help="Days after a quarter ends before it is treated as closed and snapshotted.",
+    )
+    parser.add_argument(
+        "--section-token-budget",
+        type=int,
+        help=(
+            "Summarise each section extractively to about this many tokens instead of "
+            "listing a raw snippet per memory."
+        ),
+    )
     parser.add_argument(
         "--output",
         type=Path,
@@ -61,7 +145,19 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Enable verbose logging.",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.page_size < 1 or args.max_memories < 1:
+        parser.error("--page-size and --max-memories must be positive")
+    if args.section_token_budget is not None and args.section_token_budget < 1:
+        parser.error("--section-token-budget must be positive")
+    if args.grace_days < 0:
+        parser.error("--grace-days must be zero or positive")
+    if args.compare:
+        try:
+            parse_quarter(args.quarter)
+        except ValueError as exc:
+            parser.error(f"--compare needs a YYYY-Qn quarter: {exc}")
+    return args
 
 
 def gather_memories(api, quarter: str, categories: List[str], limit: int, logger: logging.Logger) -> Dict[str, List[Dict]]:
@@ -73,7 +169,227 @@ def gather_memories(api, quarter: str, categories: List[str], limit: int, logger
     return collected
 
 
-def format_outline(quarter: str, memories: Dict[str, List[Dict]]) -> str:
+def memory_categories(mem: Dict) -> Iterable[str]:
+    """The memory's category plus any `category:` tags."""
+    category = mem.get("category")
+    if category:
+        yield str(category).lower()
+    for tag in mem.get("tags") or ():
+        tag = str(tag)
+        if tag[:9].lower() == "category:":
+            yield tag[9:].strip().lower()
+
+
+def partition_by_category(
+    memories: List[Dict],
+    categories: List[str],
+    limit: int,
+) -> Tuple[Dict[str, List[Dict]], int]:
+    """
+    Split one bulk result into the requested categories in a single pass.
+
+    A memory lands in every requested category it carries (its `category`
+    field or `category:` tags), keeping result order, up to `limit` each.
+
+    Returns:
+        (memories per category, number of memories placed in several categories)
+    """
+    wanted = {category.lower(): category for category in categories}
+    collected: Dict[str, List[Dict]] = {category: [] for category in categories}
+    shared = 0
+    for mem in memories:
+        placed = 0
+        for key in dict.fromkeys(memory_categories(mem)):
+            category = wanted.get(key)
+            if category is not None and len(collected[category]) < limit:
+                collected[category].append(mem)
+                placed += 1
+        shared += placed > 1
+    return collected, shared
+
+
+def gather_memories_bulk(
+    api,
+    quarter: str,
+    categories: List[str],
+    limit: int,
+    logger: logging.Logger,
+    page_size: int = 200,
+    max_memories: int = 5000,
+) -> Tuple[Dict[str, List[Dict]], bool]:
+    """
+    One paged `quarter:` scan instead of one search per category.
+
+    Returns:
+        (memories per category, whether the scan stopped at `max_memories`)
+    """
+    query = f"quarter:{quarter}"
+    logger.info("Fetching quarter %s in pages of %d with query '%s'", quarter, page_size, query)
+    memories = paged_search(api, query, page_size, max_memories, api.project_id, logger)
+    truncated = len(memories) >= max_memories
+    if truncated:
+        logger.warning("Bulk scan stopped at --max-memories %d; some memories may be missing.", max_memories)
+    collected, shared = partition_by_category(memories, categories, limit)
+    logger.info(
+        "Partitioned %d memories into %d categories (%d in several categories)",
+        len(memories),
+        sum(1 for entries in collected.values() if entries),
+        shared,
+    )
+    return collected, truncated
+
+
+def fetch_sections(
+    api,
+    quarter: str,
+    categories: List[str],
+    args: argparse.Namespace,
+    logger: logging.Logger,
+) -> Tuple[Dict[str, List[Dict]], bool]:
+    """Sections for a quarter plus whether a bulk scan was cut short."""
+    if args.bulk:
+        return gather_memories_bulk(api, quarter, categories, args.limit, logger, args.page_size, args.max_memories)
+    return gather_memories(api, quarter, categories, args.limit, logger), False
+
+
+def load_quarter(
+    api,
+    quarter: str,
+    args: argparse.Namespace,
+    logger: logging.Logger,
+    store: Optional[QuarterSnapshots],
+) -> Dict[str, List[Dict]]:
+    """
+    Sections for one quarter: closed quarters come from their snapshot,
+    fetching (and then storing) only categories the snapshot lacks. A bulk
+    scan cut short by --max-memories is used but never snapshotted.
+    """
+    closed = store is not None and is_closed(quarter, grace_days=args.grace_days)
+    cached: Dict[str, List[Dict]] = {}
+    if closed:
+        snapshot = store.load(quarter)
+        if snapshot and snapshot.limit >= args.limit:
+            cached = snapshot.memories
+            logger.info("Using snapshot of closed quarter %s taken %s", quarter, snapshot.taken_at)
+    missing = [category for category in args.categories if category not in cached]
+    fetched, truncated = fetch_sections(api, quarter, missing, args, logger) if missing else ({}, False)
+    if closed and missing and truncated:
+        logger.warning("Not storing a snapshot of %s from a truncated scan; raise --max-memories.", quarter)
+    elif closed and missing:
+        path = store.save(quarter, fetched, args.limit)
+        logger.info("Stored snapshot of closed quarter %s in %s", quarter, path)
+    return {
+        category: list(cached.get(category, fetched.get(category)) or [])[: args.limit]
+        for category in args.categories
+    }
+
+
+@dataclass
+class Measure:
+    """One `label: value` figure reported in a quarter."""
+    value: float
+    text: str
+    percent: bool
+    memory_id: str
+    created_at: str
+
+
+def normalise_key(label: str) -> str:
+    """`Net-Revenue Retention's` -> `net revenue retention`."""
+    return " ".join(re.sub(r"'s\b|[^a-z0-9%]+", " ", label.lower()).split())
+
+
+def _measure(match: re.Match, mem: Dict) -> Tuple[str, Measure]:
+    value = coerce_value(match.group("number"), match.group("suffix"))
+    if match.group("sign") == "-":
+        value = -value
+    text = match.string[match.end("label"):match.end()].lstrip(" \t:=")
+    measure = Measure(value, text, "%" in (match.group("unit") or ""), str(mem.get("id", "unknown")), mem.get("created_at") or "")
+    return normalise_key(match.group("label")), measure
+
+
+def extract_measures(mem: Dict) -> Dict[str, Measure]:
+    """Labelled figures in a memory, keyed by normalised label."""
+    found: Dict[str, Measure] = {}
+    for clause in _CLAUSE_SPLIT.split(mem.get("content") or ""):
+        start = 0
+        match = _PHRASE_MEASURE.match(clause)
+        if match:
+            key, measure = _measure(match, mem)
+            found.setdefault(key, measure)
+            start = match.end()
+        for match in _WORD_MEASURE.finditer(clause, start):
+            key, measure = _measure(match, mem)
+            found.setdefault(key, measure)
+    for key in IGNORED_MEASURES & found.keys():
+        del found[key]
+    return found
+
+
+def collect_measures(entries: List[Dict]) -> Dict[str, Measure]:
+    """Latest figure per key across a section's memories."""
+    latest: Dict[str, Measure] = {}
+    for mem in entries:
+        for key, measure in extract_measures(mem).items():
+            current = latest.get(key)
+            if current is None or measure.created_at > current.created_at:
+                latest[key] = measure
+    return latest
+
+
+def _format_delta(previous: Measure, current: Measure) -> str:
+    if previous.percent != current.percent:
+        return "n/a"
+    delta = current.value - previous.value
+    if current.percent:
+        return f"{delta:+,.1f} pts"
+    text = f"{delta:+,.0f}" if abs(delta) >= 100 else f"{delta:+,.2f}".rstrip("0").rstrip(".")
+    if previous.value:
+        text += f" ({delta / abs(previous.value) * 100:+.1f}%)"
+    return text
+
+
+def format_comparison(
+    quarter: str,
+    previous: str,
+    current_memories: Dict[str, List[Dict]],
+    previous_memories: Dict[str, List[Dict]],
+) -> str:
+    """Section counts plus OKR/metric figures aligned by normalised label."""
+    lines = [f"## Quarter over Quarter: {quarter} vs {previous}", "", f"| Section | {previous} | {quarter} |", "|---|---|---|"]
+    for category in dict.fromkeys([*current_memories, *previous_memories]):
+        title = SECTION_TITLES.get(category, category)
+        lines.append(
+            f"| {title} | {len(previous_memories.get(category, []))} | {len(current_memories.get(category, []))} |"
+        )
+    lines.append("")
+
+    for category in COMPARED_CATEGORIES:
+        if category not in current_memories and category not in previous_memories:
+            continue
+        now = collect_measures(current_memories.get(category, []))
+        before = collect_measures(previous_memories.get(category, []))
+        if not now and not before:
+            continue
+        lines.append(f"### {SECTION_TITLES[category]}")
+        lines.append(f"| Measure | {previous} | {quarter} | Change |")
+        lines.append("|---|---|---|---|")
+        for key in sorted(now.keys() & before.keys()):
+            lines.append(f"| {key} | {before[key].text} | {now[key].text} | {_format_delta(before[key], now[key])} |")
+        for key in sorted(now.keys() - before.keys()):
+            lines.append(f"| {key} | - | {now[key].text} | new |")
+        for key in sorted(before.keys() - now.keys()):
+            lines.append(f"| {key} | {before[key].text} | - | not reported |")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def format_outline(
+    quarter: str,
+    memories: Dict[str, List[Dict]],
+    comparison: Optional[str] = None,
+    token_budget: Optional[int] = None,
+) -> str:
     lines = [
         f"# Quarterly Review Outline: {quarter}",
         "",
@@ -81,24 +397,28 @@ def format_outline(quarter: str, memories: Dict[str, List[Dict]]) -> str:
         "",
     ]
 
-    sections = {
-        "okr-updates": "Goals vs Outcomes",
-        "metrics-digest": "Key Metrics",
-        "launch-notes": "Product and Launch Highlights",
-        "customer-story": "Customer Impact",
-        "risk-log": "Risks and Mitigations",
-    }
-
-    for category, title in sections.items():
+    for category, title in SECTION_TITLES.items():
         entries = memories.get(category, [])
         if not entries:
             continue
         lines.append(f"## {title}")
+        if token_budget:
+            summary = summarize([(mem.get("id", "unknown"), mem.get("content") or "") for mem in entries], token_budget)
+            lines.extend(summary.lines())
+            if summary.omitted:
+                lines.append(
+                    f"- _{summary.omitted} of {len(entries)} memories not shown (~{summary.source_tokens} tokens in full)_"
+                )
+            lines.append("")
+            continue
         for mem in entries:
             snippet = (mem.get("content") or "").strip().replace("\n", " ")
             lines.append(f"- [{mem.get('id', 'unknown')}] {snippet[:220]}{'...' if len(snippet) > 220 else ''}")
         lines.append("")
 
+    if comparison:
+        lines.append(comparison)
+
     return "\n".join(lines).strip() + "\n"
 
 
@@ -118,8 +438,14 @@ def main() -> None:
         project_id=config.get("project_id"),
     )
 
-    memories = gather_memories(api, args.quarter, args.categories, args.limit, logger)
-    outline = format_outline(args.quarter, memories)
+    store = None if args.no_snapshots else QuarterSnapshots(snapshot_dir(api.project_id, args.snapshot_dir))
+    memories = load_quarter(api, args.quarter, args, logger, store)
+    comparison = None
+    if args.compare:
+        previous = previous_quarter(args.quarter)
+        previous_memories = load_quarter(api, previous, args, logger, store)
+        comparison = format_comparison(args.quarter, previous, memories, previous_memories)
+    outline = format_outline(args.quarter, memories, comparison, args.section_token_budget)
 
     print(outline)
     if args.output:
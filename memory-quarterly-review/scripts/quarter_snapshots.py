@@ -0,0 +1,135 @@
+"""
+Immutable local snapshots of closed quarters for `compile_review.py`.
+
+Once a quarter is over (plus a grace period for late write-ups) its memories
+no longer change, so the first compile after closing stores the fetched
+sections as one compact JSON file per quarter and project. Later runs,
+including `--compare` against the previous quarter, read that file instead
+of searching again; only the live quarter is ever fetched.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPT_DIR.parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from _shared import read_json, safe_filename, state_dir, write_json_atomic  # noqa: E402
+
+SNAPSHOT_VERSION = 1
+DEFAULT_GRACE_DAYS = 14
+QUARTER_PATTERN = re.compile(r"^(\d{4})-Q([1-4])$", re.IGNORECASE)
+
+
+def parse_quarter(label: str) -> Tuple[int, int]:
+    """Split `2025-Q3` into (2025, 3); raises ValueError for other labels."""
+    match = QUARTER_PATTERN.match(label.strip())
+    if not match:
+        raise ValueError(f"Quarter label must look like 2025-Q3, got {label!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def previous_quarter(label: str) -> str:
+    year, quarter = parse_quarter(label)
+    return f"{year - 1}-Q4" if quarter == 1 else f"{year}-Q{quarter - 1}"
+
+
+def quarter_end(label: str) -> datetime:
+    """First instant after the quarter (UTC, naive)."""
+    year, quarter = parse_quarter(label)
+    return datetime(year + 1, 1, 1) if quarter == 4 else datetime(year, quarter * 3 + 1, 1)
+
+
+def is_closed(label: str, now: Optional[datetime] = None, grace_days: int = DEFAULT_GRACE_DAYS) -> bool:
+    """
+    Whether a quarter's memories can be treated as final.
+
+    Labels that are not `YYYY-Qn` are never closed, so they are always fetched.
+    """
+    try:
+        end = quarter_end(label)
+    except ValueError:
+        return False
+    return (now or datetime.utcnow()) >= end + timedelta(days=grace_days)
+
+
+def snapshot_dir(project_id: Optional[str], override: Optional[Path] = None) -> Path:
+    return state_dir("quarterly-review", override) / "snapshots" / safe_filename(project_id or "default")
+
+
+@dataclass
+class QuarterSnapshot:
+    """Sections of one closed quarter as fetched when it was first compiled."""
+    quarter: str
+    taken_at: str
+    limit: int
+    memories: Dict[str, List[Dict]] = field(default_factory=dict)
+
+
+class QuarterSnapshots:
+    """One write-once JSON file per closed quarter."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.logger = logging.getLogger("quarterly_review")
+
+    def path(self, quarter: str) -> Path:
+        return self.directory / f"{safe_filename(quarter.upper())}.json"
+
+    def load(self, quarter: str) -> Optional[QuarterSnapshot]:
+        payload = read_json(self.path(quarter))
+        if not isinstance(payload, dict) or payload.get("v") != SNAPSHOT_VERSION:
+            return None
+        memories = {
+            category: [
+                {"id": mem_id, "created_at": created_at, "category": category, "content": content}
+                for mem_id, created_at, content in rows
+            ]
+            for category, rows in payload.get("categories", {}).items()
+        }
+        return QuarterSnapshot(payload["quarter"], payload["taken_at"], payload["limit"], memories)
+
+    def save(self, quarter: str, memories: Dict[str, List[Dict]], limit: int) -> Path:
+        """
+        Store a closed quarter's sections.
+
+        Only `id`, `created_at` and `content` are kept per memory, which is
+        all the outline and the comparison read. Categories already in an
+        existing snapshot are kept as they were; new ones are added.
+        """
+        existing = self.load(quarter)
+        categories = {
+            category: [
+                [mem.get("id", "unknown"), mem.get("created_at") or "", mem.get("content") or ""]
+                for mem in entries
+            ]
+            for category, entries in memories.items()
+        }
+        if existing and existing.limit >= limit:
+            for category, entries in existing.memories.items():
+                categories[category] = [
+                    [mem["id"], mem["created_at"], mem["content"]] for mem in entries
+                ]
+            limit = existing.limit
+        path = self.path(quarter)
+        write_json_atomic(
+            path,
+            {
+                "v": SNAPSHOT_VERSION,
+                "quarter": quarter.upper(),
+                "taken_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+                "limit": limit,
+                "categories": categories,
+            },
+        )
+        self.logger.debug("Stored snapshot of %s at %s", quarter, path)
+        return path
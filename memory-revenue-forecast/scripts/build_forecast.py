@@ -6,28 +6,44 @@ Build baseline, conservative, and stretch revenue scenarios using Cogniz memorie
 from __future__ import annotations
 
 import argparse
-import json
 import logging
-import re
 import sys
+from array import array
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from statistics import mean
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 ROOT_DIR = SCRIPT_DIR.parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from _shared import configure_logging, ensure_memory_api  # noqa: E402
-
-AMOUNT_KEY_PATTERN = re.compile(
-    r"(arr|mrr|revenue|amount|value|uplift|delta)\s*[:=]\s*\$?\s*([\d,]+(?:\.\d+)?)\s*(k|m|mm|b)?",
-    re.IGNORECASE,
+from _shared import (  # noqa: E402
+    DEFAULT_SEARCH_TIMEOUT,
+    KeywordClassifier,
+    configure_logging,
+    ensure_memory_api,
+    paged_search,
+    run_searches,
+    state_dir,
+)
+from _amounts import AmountCache, default_cache_path, extract_with  # noqa: E402
+from forecast_simulation import PERCENTILES, format_simulation, simulate_forecast  # noqa: E402
+from forecast_snapshots import SnapshotStore, backtest, build_snapshot, format_backtest  # noqa: E402
+
+# Metric memories read for a backtest (two years of daily snapshots fit).
+BACKTEST_MAX_MEMORIES = 5000
+
+# Priority-ordered stage keywords; notes matching none are "pipeline".
+STAGE_CLASSIFIER = KeywordClassifier(
+    {
+        "churn": ("churn", "downgrade", "attrition", "cancel*"),
+        "best_case": ("best case", "stretch", "upside", "whitespace"),
+        "committed": ("commit*", "signed", "contract*", "closed won", "billing start"),
+        "expansion": ("expansion", "upsell", "add-on", "upgrade"),
+    }
 )
-VALUE_PATTERN = re.compile(r"\$?\s*([\d,]+(?:\.\d+)?)\s*(k|m|mm|b)?", re.IGNORECASE)
 
 
 def parse_args() -> argparse.Namespace:
@@ -62,6 +78,63 @@ def parse_args() -> argparse.Namespace:
         default=80,
         help="Maximum results for each search query.",
     )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_SEARCH_TIMEOUT,
+        help="Seconds to wait for the metrics and pipeline searches, which run concurrently.",
+    )
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help="Add a Monte Carlo forecast (P10/P50/P90 MRR per month) from stage probabilities.",
+    )
+    parser.add_argument(
+        "--trials",
+        type=int,
+        help=(
+            "Monte Carlo trials (default 100,000 with NumPy, 5,000 without, "
+            "scaled down for large pipelines; see forecast_simulation.py)."
+        ),
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed for reproducible simulations.",
+    )
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Do not record this run in the forecast snapshot store.",
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        type=Path,
+        help="Snapshot store directory (defaults to ~/.cogniz/state/revenue-forecast).",
+    )
+    parser.add_argument(
+        "--backtest",
+        action="store_true",
+        help="Score stored snapshots against realised MRR from --metrics-query instead of forecasting.",
+    )
+    parser.add_argument(
+        "--since",
+        help="Backtest: first snapshot date to include (YYYY-MM-DD).",
+    )
+    parser.add_argument(
+        "--until",
+        help="Backtest: last snapshot date to include (YYYY-MM-DD).",
+    )
+    parser.add_argument(
+        "--no-amount-cache",
+        action="store_true",
+        help="Parse every memory again instead of using the shared amount cache.",
+    )
+    parser.add_argument(
+        "--amount-cache",
+        type=Path,
+        help="Amount cache file or directory (defaults to ~/.cogniz/state/amount-cache).",
+    )
     parser.add_argument(
         "--memory-api-path",
         help="Override path to the cogniz-memory-manager scripts directory.",
@@ -71,137 +144,157 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Enable verbose logging.",
     )
-    return parser.parse_args()
-
-
-def coerce_value(raw: str, suffix: Optional[str]) -> float:
-    value = float(raw.replace(",", ""))
-    if suffix:
-        suffix = suffix.lower()
-        if suffix == "k":
-            value *= 1_000
-        elif suffix in {"m", "mm"}:
-            value *= 1_000_000
-        elif suffix == "b":
-            value *= 1_000_000_000
-    return value
+    args = parser.parse_args()
+    if args.horizon < 1:
+        parser.error("--horizon must be at least 1")
+    if args.trials is not None and args.trials < 1:
+        parser.error("--trials must be positive")
+    if args.timeout <= 0:
+        parser.error("--timeout must be positive")
+    return args
 
 
-def parse_json_amounts(content: str) -> List[float]:
-    """Attempt to read JSON objects/dicts for numeric fields."""
-    matches: List[float] = []
-    try:
-        data = json.loads(content)
-    except json.JSONDecodeError:
-        return matches
-
-    def collect(obj):
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                if isinstance(value, (int, float)) and key.lower() in {"arr", "mrr", "revenue", "amount"}:
-                    matches.append(float(value))
-                else:
-                    collect(value)
-        elif isinstance(obj, list):
-            for item in obj:
-                collect(item)
-
-    collect(data)
-    return matches
-
-
-def extract_amounts(content: str) -> Tuple[List[float], bool]:
-    """Return numeric amounts and flag whether detection was heuristic."""
-    amounts = parse_json_amounts(content)
-    heuristic = False
-
-    if not amounts:
-        for match in AMOUNT_KEY_PATTERN.finditer(content):
-            heuristic = True
-            amounts.append(coerce_value(match.group(2), match.group(3)))
-
-    if not amounts:
-        for match in VALUE_PATTERN.finditer(content):
-            heuristic = True
-            value = coerce_value(match.group(1), match.group(2))
-            if value:
-                amounts.append(value)
-
-    return amounts, heuristic
+def detect_stage(content: str) -> str:
+    return STAGE_CLASSIFIER.first(content, default="pipeline")
 
 
-def detect_stage(content: str) -> str:
-    lowered = content.lower()
-    if any(term in lowered for term in ("churn", "downgrade", "attrition", "cancel")):
-        return "churn"
-    if any(term in lowered for term in ("best case", "stretch", "upside", "whitespace")):
-        return "best_case"
-    if any(term in lowered for term in ("commit", "signed", "contract", "closed won", "billing start")):
-        return "committed"
-    if any(term in lowered for term in ("expansion", "upsell", "add-on", "upgrade")):
-        return "expansion"
-    return "pipeline"
-
-
-def summarise_amounts(memories: Iterable[Dict], logger: logging.Logger) -> Tuple[float, List[str]]:
-    total = 0.0
+def summarise_amounts(
+    memories: Sequence[Dict],
+    logger: logging.Logger,
+    cache: Optional[AmountCache] = None,
+) -> Tuple[float, List[str]]:
+    memories = list(memories)
+    batch = extract_with(cache, [mem.get("content") or "" for mem in memories])
     warnings = []
-    for mem in memories:
-        content = (mem.get("content") or "")
-        amounts, heuristic = extract_amounts(content)
-        if not amounts:
+    for index, mem in enumerate(memories):
+        if not batch.found(index):
             warnings.append(mem.get("id", "unknown"))
-            continue
-        total += mean(amounts)
-        if heuristic:
+        elif batch.heuristic[index]:
             logger.debug("Heuristic amount extraction used for memory %s", mem.get("id"))
-    return total, warnings
+    return batch.total(), warnings
 
 
-def main() -> None:
-    args = parse_args()
-    configure_logging(args.verbose)
-    logger = logging.getLogger("revenue_forecast")
-
-    CognizMemoryAPI, load_config, manager_path = ensure_memory_api(SCRIPT_DIR, args.memory_api_path)
-    logger.debug("Using Cogniz memory manager from %s", manager_path)
-
-    config = load_config(args.config)
-    logger.debug("Loaded base_url=%s project_id=%s", config.get("base_url"), config.get("project_id"))
-    api = CognizMemoryAPI(
-        base_url=config["base_url"],
-        api_key=config["api_key"],
-        project_id=config.get("project_id"),
-    )
-
-    logger.info("Fetching baseline metrics with query '%s'", args.metrics_query)
-    baseline_results = api.search(
-        query=args.metrics_query,
-        project_id=config.get("project_id"),
-        limit=args.limit,
-    )
-    logger.info("Fetching pipeline notes with query '%s'", args.pipeline_query)
-    pipeline_results = api.search(
-        query=args.pipeline_query,
-        project_id=config.get("project_id"),
-        limit=args.limit,
-    )
+def stage_inputs(
+    stage_groups: Dict[str, List[Dict]],
+    cache: Optional[AmountCache] = None,
+) -> Dict[str, Tuple[List[str], array]]:
+    """Memory IDs and per-memory mean amounts (NaN when none was found) for each stage."""
+    inputs: Dict[str, Tuple[List[str], array]] = {}
+    for stage, memories in stage_groups.items():
+        batch = extract_with(cache, [mem.get("content") or "" for mem in memories])
+        inputs[stage] = ([mem.get("id", "unknown") for mem in memories], batch.means)
+    return inputs
+
+
+def metric_amounts(
+    memories: Sequence[Dict],
+    cache: Optional[AmountCache] = None,
+) -> Tuple[List[Tuple[str, float]], List[str]]:
+    """
+    (created_at, mean amount) of each metric memory with an amount, oldest
+    first (undated ones before dated ones), and the IDs of those without one.
+    """
+    memories = list(memories)
+    batch = extract_with(cache, [mem.get("content") or "" for mem in memories])
+    values: List[Tuple[str, float]] = []
+    missing: List[str] = []
+    for index, mem in enumerate(memories):
+        if batch.found(index):
+            values.append((str(mem.get("created_at") or ""), batch.means[index]))
+        else:
+            missing.append(mem.get("id", "unknown"))
+    values.sort(key=lambda value: value[0])
+    return values, missing
+
+
+def baseline_from_metrics(
+    memories: Sequence[Dict],
+    cache: Optional[AmountCache] = None,
+) -> Tuple[float, List[str]]:
+    """
+    Baseline MRR: the amount in the latest metric memory. Metric memories
+    are MRR readings, so adding several of them up would count MRR twice.
+    """
+    values, missing = metric_amounts(memories, cache)
+    return (values[-1][1] if values else 0.0), missing
+
+
+def realised_mrr(memories: Sequence[Dict], cache: Optional[AmountCache] = None) -> Dict[str, float]:
+    """
+    Realised MRR per `YYYY-MM`: the latest metric memory of each month,
+    the same reading `baseline_from_metrics` takes as a forecast's baseline.
+    """
+    realised: Dict[str, float] = {}
+    for created_at, amount in metric_amounts(memories, cache)[0]:
+        if created_at:
+            realised[created_at[:7]] = amount
+    return realised
+
+
+def run_backtest(
+    api,
+    project_id,
+    args: argparse.Namespace,
+    logger: logging.Logger,
+    cache: Optional[AmountCache] = None,
+) -> None:
+    store = SnapshotStore(state_dir("revenue-forecast", args.snapshot_dir))
+    if not len(store):
+        logger.warning("No forecast snapshots in %s yet; run forecasts without --no-snapshot first.", store.directory)
+        return
+    logger.info("Fetching realised metrics in pages of %d with query '%s'", args.limit, args.metrics_query)
+    try:
+        metrics = paged_search(api, args.metrics_query, args.limit, BACKTEST_MAX_MEMORIES, project_id, logger)
+    except Exception as exc:  # noqa: BLE001 - reported and fatal
+        logger.error("Cannot backtest without realised metrics: %s", exc)
+        sys.exit(1)
+    if len(metrics) >= BACKTEST_MAX_MEMORIES:
+        logger.warning("Realised metrics stopped at %d memories; older months may be missing.", len(metrics))
+    realised = realised_mrr(metrics, cache)
+    result = backtest(store.between(args.since, args.until), realised)
+    print(format_backtest(result, len(realised)))
+
+
+def run_forecast(
+    api,
+    project_id,
+    args: argparse.Namespace,
+    logger: logging.Logger,
+    cache: Optional[AmountCache] = None,
+) -> None:
+    generated_at = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    searches = {
+        "metrics": {"query": args.metrics_query, "project_id": project_id, "limit": args.limit},
+        "pipeline": {"query": args.pipeline_query, "project_id": project_id, "limit": args.limit},
+    }
+    batch = run_searches(api, searches, args.timeout, logger)
+    if len(batch.errors) == len(searches):
+        logger.error("All searches failed; no forecast produced.")
+        sys.exit(1)
+    baseline_results = batch.results["metrics"]
+    pipeline_results = batch.results["pipeline"]
 
     stage_groups: Dict[str, List[Dict]] = defaultdict(list)
-    for mem in pipeline_results:
-        stage_groups[detect_stage(mem.get("content") or "")].append(mem)
+    if cache is not None:
+        _, stages = cache.extract(
+            [mem.get("content") or "" for mem in pipeline_results], STAGE_CLASSIFIER, "pipeline"
+        )
+    else:
+        stages = [detect_stage(mem.get("content") or "") for mem in pipeline_results]
+    for mem, stage in zip(pipeline_results, stages):
+        stage_groups[stage].append(mem)
 
     baseline_mrr = args.baseline_mrr
     baseline_warnings: List[str] = []
     if baseline_mrr is None and baseline_results:
-        baseline_mrr, baseline_warnings = summarise_amounts(baseline_results, logger)
-        logger.debug("Baseline MRR inferred as %.2f from %d memories", baseline_mrr, len(baseline_results))
+        baseline_mrr, baseline_warnings = baseline_from_metrics(baseline_results, cache)
+        logger.debug("Baseline MRR taken as %.2f from the latest of %d memories", baseline_mrr, len(baseline_results))
 
     baseline_mrr = baseline_mrr or 0.0
-    committed, committed_warnings = summarise_amounts(stage_groups["committed"], logger)
-    best_case, best_case_warnings = summarise_amounts(stage_groups["best_case"], logger)
-    churn, churn_warnings = summarise_amounts(stage_groups["churn"], logger)
-    expansion, expansion_warnings = summarise_amounts(stage_groups["expansion"], logger)
+    committed, committed_warnings = summarise_amounts(stage_groups["committed"], logger, cache)
+    best_case, best_case_warnings = summarise_amounts(stage_groups["best_case"], logger, cache)
+    churn, churn_warnings = summarise_amounts(stage_groups["churn"], logger, cache)
+    expansion, expansion_warnings = summarise_amounts(stage_groups["expansion"], logger, cache)
 
     conservative = baseline_mrr + committed - churn
     standard = baseline_mrr + committed + 0.5 * expansion - churn
@@ -214,8 +307,11 @@ def main() -> None:
         f"Best Case Uplift: ${best_case:,.2f}\n"
         f"Expected Churn: -${churn:,.2f}\n"
     )
+    for name, error in batch.errors.items():
+        print(f"Partial inputs: the {name} search failed ({error}).")
     print(header)
 
+    scenarios: Dict[str, List[float]] = {"conservative": [], "baseline": [], "stretch": []}
     print("Forecast Summary (MRR)")
     print(f"{'Period':<12}{'Conservative':>15}{'Baseline':>15}{'Stretch':>15}")
     for month in range(1, args.horizon + 1):
@@ -223,9 +319,46 @@ def main() -> None:
         cons_val = baseline_mrr + ((conservative - baseline_mrr) / max(args.horizon, 1)) * month
         base_val = baseline_mrr + ((standard - baseline_mrr) / max(args.horizon, 1)) * month
         stretch_val = baseline_mrr + ((stretch - baseline_mrr) / max(args.horizon, 1)) * month
+        scenarios["conservative"].append(cons_val)
+        scenarios["baseline"].append(base_val)
+        scenarios["stretch"].append(stretch_val)
         print(f"{label:<12}{cons_val:>15,.2f}{base_val:>15,.2f}{stretch_val:>15,.2f}")
 
-    print("\nGenerated:", datetime.utcnow().isoformat(timespec="seconds"), "Z")
+    inputs = stage_inputs(stage_groups, cache)
+    simulation = None
+    if args.simulate:
+        result = simulate_forecast(
+            baseline_mrr,
+            {stage: means for stage, (_, means) in inputs.items()},
+            args.horizon,
+            trials=args.trials,
+            seed=args.seed,
+        )
+        print("")
+        print(format_simulation(result))
+        simulation = {
+            f"p{int(q)}": [bands[position] for bands in result.percentiles]
+            for position, q in enumerate(PERCENTILES)
+        }
+
+    if not args.no_snapshot and batch.errors:
+        logger.warning("Not recording a snapshot from partial inputs.")
+    elif not args.no_snapshot:
+        store = SnapshotStore(state_dir("revenue-forecast", args.snapshot_dir))
+        store.append(
+            build_snapshot(
+                generated_at,
+                args.horizon,
+                baseline_mrr,
+                [mem.get("id", "unknown") for mem in baseline_results],
+                inputs,
+                scenarios,
+                simulation,
+            )
+        )
+        logger.debug("Recorded forecast snapshot %d in %s", len(store), store.directory)
+
+    print("\nGenerated:", generated_at[:-1], "Z")
     print("Review stage breakdown below and cross-check with source memories.\n")
 
     for stage, memories in stage_groups.items():
@@ -252,6 +385,34 @@ def main() -> None:
     warn("expansion", expansion_warnings)
 
 
+def main() -> None:
+    args = parse_args()
+    configure_logging(args.verbose)
+    logger = logging.getLogger("revenue_forecast")
+
+    CognizMemoryAPI, load_config, manager_path = ensure_memory_api(SCRIPT_DIR, args.memory_api_path)
+    logger.debug("Using Cogniz memory manager from %s", manager_path)
+
+    config = load_config(args.config)
+    logger.debug("Loaded base_url=%s project_id=%s", config.get("base_url"), config.get("project_id"))
+    api = CognizMemoryAPI(
+        base_url=config["base_url"],
+        api_key=config["api_key"],
+        project_id=config.get("project_id"),
+    )
+
+    cache = None if args.no_amount_cache else AmountCache(default_cache_path(args.amount_cache))
+    try:
+        if args.backtest:
+            run_backtest(api, config.get("project_id"), args, logger, cache)
+        else:
+            run_forecast(api, config.get("project_id"), args, logger, cache)
+    finally:
+        if cache is not None:
+            logger.debug("Amount cache: %d hits, %d misses (%s)", cache.hits, cache.misses, cache.path)
+            cache.close()
+
+
 if __name__ == "__main__":  # pragma: no cover
     main()
 
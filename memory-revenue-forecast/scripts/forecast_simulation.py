@@ -0,0 +1,232 @@
+"""
+Monte Carlo MRR simulation for the revenue forecast.
+
+Every pipeline memory with an amount is treated as a deal. In each trial a
+deal closes with its stage's probability and, if it does, its monthly amount
+starts in a random month of the stage's timing window and stays for the rest
+of the horizon. Churn deals subtract instead of add. Percentiles of the
+simulated MRR are reported per month.
+
+NumPy runs the trials as vectorized chunks. Without it, a pure-Python engine
+on `array` buffers runs fewer trials by default.
+
+Run time grows with trials x deals, so the default trial count shrinks as the
+pipeline grows to keep a run near a fixed budget of trial x deal cells (about
+0.8s with NumPy, 1-2s in pure Python). It never drops below a floor that
+keeps P10/P90 stable, so pipelines past roughly 2,000 deals (NumPy) or 1,000
+deals (pure Python) take proportionally longer. Pass `trials` to override.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional acceleration
+    np = None
+
+
+@dataclass(frozen=True)
+class StageModel:
+    """Close probability and start-month window (inclusive) for a stage."""
+    probability: float
+    first_month: int
+    last_month: int
+    sign: float = 1.0
+
+
+# Stages from detect_stage(); "pipeline" notes carry too little signal to simulate.
+STAGE_MODEL: Dict[str, StageModel] = {
+    "committed": StageModel(probability=0.9, first_month=1, last_month=2),
+    "expansion": StageModel(probability=0.5, first_month=1, last_month=4),
+    "best_case": StageModel(probability=0.25, first_month=2, last_month=6),
+    "churn": StageModel(probability=0.6, first_month=1, last_month=3, sign=-1.0),
+}
+
+# Realised deal size varies around the noted amount by up to +/- this fraction.
+AMOUNT_SPREAD = 0.2
+PERCENTILES = (10.0, 50.0, 90.0)
+DEFAULT_TRIALS_NUMPY = 100_000
+DEFAULT_TRIALS_PYTHON = 5_000
+# Default runs stay within this many trial x deal cells, down to the floor.
+TRIAL_CELL_BUDGET_NUMPY = 20_000_000
+TRIAL_CELL_BUDGET_PYTHON = 1_000_000
+MIN_TRIALS_NUMPY = 10_000
+MIN_TRIALS_PYTHON = 1_000
+# Trial x deal cells per vectorized chunk; small chunks stay cache-resident.
+CHUNK_CELLS = 250_000
+
+
+@dataclass
+class SimulationResult:
+    """Per-month MRR percentiles from a simulation run."""
+    trials: int
+    engine: str
+    elapsed_seconds: float
+    baseline_mrr: float
+    percentiles: List[Tuple[float, ...]] = field(default_factory=list)
+    means: List[float] = field(default_factory=list)
+
+
+def _deal_vectors(
+    stage_amounts: Mapping[str, Sequence[float]],
+    horizon: int,
+    model: Mapping[str, StageModel],
+) -> Tuple[List[float], List[float], List[int], List[int]]:
+    """Flatten stages into per-deal (signed amount, probability, first, last month)."""
+    amounts: List[float] = []
+    probabilities: List[float] = []
+    firsts: List[int] = []
+    lasts: List[int] = []
+    for stage, values in stage_amounts.items():
+        spec = model.get(stage)
+        if spec is None or spec.probability <= 0:
+            continue
+        first = min(max(spec.first_month, 1), horizon)
+        last = min(max(spec.last_month, first), horizon)
+        for value in values:
+            if value != value or not value:  # NaN or zero: nothing to simulate
+                continue
+            amounts.append(spec.sign * value)
+            probabilities.append(spec.probability)
+            firsts.append(first)
+            lasts.append(last)
+    return amounts, probabilities, firsts, lasts
+
+
+def default_trials(deal_count: int) -> int:
+    """Engine default trial count, scaled down for large pipelines to stay within the cell budget."""
+    if np is not None:
+        ceiling, budget, floor = DEFAULT_TRIALS_NUMPY, TRIAL_CELL_BUDGET_NUMPY, MIN_TRIALS_NUMPY
+    else:
+        ceiling, budget, floor = DEFAULT_TRIALS_PYTHON, TRIAL_CELL_BUDGET_PYTHON, MIN_TRIALS_PYTHON
+    return max(floor, min(ceiling, budget // max(deal_count, 1)))
+
+
+def _simulate_numpy(baseline, deals, horizon, trials, seed):
+    amounts, probabilities, firsts, lasts = (np.asarray(column) for column in deals)
+    rng = np.random.default_rng(seed)
+    months = np.empty((trials, horizon), dtype=np.float64)
+    count = len(amounts)
+    if not count:
+        months.fill(baseline)
+    else:
+        # One uniform draw per trial x deal: u < p decides the close, and for a
+        # closed deal u / p is again uniform, so its integer part (scaled by the
+        # window length) picks the start month and its fractional part the size.
+        probabilities = probabilities.astype(np.float32)
+        scale = ((lasts - firsts + 1) / probabilities).astype(np.float32)
+        max_offset = (lasts - firsts).astype(np.intp)
+        chunk = max(1, CHUNK_CELLS // count)
+        row_base = np.arange(chunk)[:, None] * (horizon + 1) + firsts
+        for start in range(0, trials, chunk):
+            rows = min(chunk, trials - start)
+            draws = rng.random((rows, count), dtype=np.float32)
+            scaled = draws * scale
+            offsets = np.minimum(scaled.astype(np.intp), max_offset)
+            factor = (1.0 - AMOUNT_SPREAD) + (2.0 * AMOUNT_SPREAD) * (scaled - offsets)
+            weights = np.where(draws < probabilities, amounts * factor, 0.0)
+            # Scatter each deal into its start month, then cumulate over months.
+            cells = (row_base[:rows] + offsets).ravel()
+            steps = np.bincount(cells, weights=weights.ravel(), minlength=rows * (horizon + 1))
+            months[start:start + rows] = baseline + np.cumsum(steps.reshape(rows, horizon + 1), axis=1)[:, 1:]
+    percentiles = np.percentile(months, PERCENTILES, axis=0)
+    return (
+        [tuple(float(value) for value in percentiles[:, month]) for month in range(horizon)],
+        [float(value) for value in months.mean(axis=0)],
+    )
+
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile (NumPy's default method)."""
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _simulate_python(baseline, deals, horizon, trials, seed):
+    amounts, probabilities, firsts, lasts = deals
+    rng = random.Random(seed)
+    uniform = rng.random
+    randint = rng.randint
+    spread = AMOUNT_SPREAD
+    columns = [array("d", bytes(8 * trials)) for _ in range(horizon)]
+    deal_specs = list(zip(amounts, probabilities, firsts, lasts))
+    for trial in range(trials):
+        steps = [0.0] * (horizon + 1)
+        for amount, probability, first, last in deal_specs:
+            if uniform() < probability:
+                steps[randint(first, last)] += amount * (1.0 + spread * (2.0 * uniform() - 1.0))
+        running = baseline
+        for month in range(horizon):
+            running += steps[month + 1]
+            columns[month][trial] = running
+    percentiles = []
+    means = []
+    for column in columns:
+        ordered = sorted(column)
+        percentiles.append(tuple(_percentile(ordered, q) for q in PERCENTILES))
+        means.append(math.fsum(column) / trials)
+    return percentiles, means
+
+
+def simulate_forecast(
+    baseline_mrr: float,
+    stage_amounts: Mapping[str, Sequence[float]],
+    horizon: int,
+    trials: Optional[int] = None,
+    seed: Optional[int] = None,
+    model: Optional[Mapping[str, StageModel]] = None,
+) -> SimulationResult:
+    """
+    Simulate monthly MRR over the horizon.
+
+    Args:
+        baseline_mrr: Starting MRR
+        stage_amounts: Monthly deal amounts per detected stage
+        horizon: Number of months to simulate (>= 1)
+        trials: Trial count (default_trials() for the deal count when omitted)
+        seed: Seed for reproducible runs
+        model: Stage probabilities/timing (defaults to STAGE_MODEL)
+
+    Returns:
+        SimulationResult with P10/P50/P90 and mean MRR per month
+    """
+    if horizon < 1:
+        raise ValueError("horizon must be at least 1 month")
+    deals = _deal_vectors(stage_amounts, horizon, model or STAGE_MODEL)
+    engine = "numpy" if np is not None else "python"
+    if trials is None:
+        trials = default_trials(len(deals[0]))
+    if trials < 1:
+        raise ValueError("trials must be positive")
+
+    started = time.perf_counter()
+    runner = _simulate_numpy if np is not None else _simulate_python
+    percentiles, means = runner(baseline_mrr, deals, horizon, trials, seed)
+    return SimulationResult(
+        trials=trials,
+        engine=engine,
+        elapsed_seconds=time.perf_counter() - started,
+        baseline_mrr=baseline_mrr,
+        percentiles=percentiles,
+        means=means,
+    )
+
+
+def format_simulation(result: SimulationResult) -> str:
+    lines = [
+        f"Monte Carlo Forecast (MRR, {result.trials:,} trials, {result.engine}, {result.elapsed_seconds:.2f}s)",
+        f"{'Period':<12}{'P10':>15}{'P50':>15}{'P90':>15}{'Mean':>15}",
+    ]
+    for month, (bands, mean) in enumerate(zip(result.percentiles, result.means), start=1):
+        low, median, high = bands
+        lines.append(f"{'Month ' + str(month):<12}{low:>15,.2f}{median:>15,.2f}{high:>15,.2f}{mean:>15,.2f}")
+    return "\n".join(lines)
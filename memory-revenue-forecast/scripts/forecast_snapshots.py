@@ -0,0 +1,159 @@
+"""
+Append-only store of forecast runs and a backtest against realised MRR.
+
+Each run is one compact JSON line in `snapshots.jsonl`. A companion
+`snapshots.idx` holds one `generated_at<TAB>offset<TAB>length` line per
+snapshot. Date-range lookups bisect the index and seek straight to the lines
+they need, so a backtest over years of daily snapshots never parses the rest
+of the log.
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPT_DIR.parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from _shared import IndexedJsonLog  # noqa: E402
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_LOG = "snapshots.jsonl"
+SNAPSHOT_INDEX = "snapshots.idx"
+
+
+def _rounded(values: Sequence[Optional[float]]) -> List[Optional[float]]:
+    return [None if value is None or value != value else round(value, 2) for value in values]
+
+
+def month_key(timestamp: str, offset: int = 0) -> str:
+    """`YYYY-MM` of an ISO timestamp shifted by `offset` calendar months."""
+    year, month = int(timestamp[:4]), int(timestamp[5:7])
+    index = year * 12 + (month - 1) + offset
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class SnapshotStore(IndexedJsonLog):
+    """Append-only forecast snapshots with a date index."""
+
+    def __init__(self, directory: Path):
+        super().__init__(directory, SNAPSHOT_LOG, SNAPSHOT_INDEX, "generated_at")
+
+    def append(self, snapshot: Mapping) -> None:
+        self.append_record(snapshot)
+
+
+def build_snapshot(
+    generated_at: str,
+    horizon: int,
+    baseline_mrr: float,
+    baseline_ids: Sequence[str],
+    stage_inputs: Mapping[str, Tuple[Sequence[str], Sequence[Optional[float]]]],
+    scenarios: Mapping[str, Sequence[float]],
+    simulation: Optional[Mapping[str, Sequence[float]]] = None,
+) -> Dict:
+    """Assemble the compact snapshot record for one forecast run."""
+    snapshot = {
+        "v": SNAPSHOT_VERSION,
+        "generated_at": generated_at,
+        "horizon": horizon,
+        "baseline_mrr": round(baseline_mrr, 2),
+        "inputs": {
+            "baseline_ids": list(baseline_ids),
+            "stages": {
+                stage: {"ids": list(ids), "amounts": _rounded(amounts)}
+                for stage, (ids, amounts) in stage_inputs.items()
+                if ids
+            },
+        },
+        "outputs": {"scenarios": {name: _rounded(values) for name, values in scenarios.items()}},
+    }
+    if simulation:
+        snapshot["outputs"]["simulation"] = {name: _rounded(values) for name, values in simulation.items()}
+    return snapshot
+
+
+@dataclass
+class SeriesScore:
+    """Accuracy of one forecast series (scenario or percentile) across snapshots."""
+    points: int = 0
+    abs_pct_error: float = 0.0
+    signed_error: float = 0.0
+
+    def add(self, forecast: float, actual: float) -> None:
+        if not actual:
+            return
+        self.points += 1
+        self.abs_pct_error += abs(forecast - actual) / abs(actual)
+        self.signed_error += forecast - actual
+
+    @property
+    def mape(self) -> float:
+        return 100.0 * self.abs_pct_error / self.points if self.points else math.nan
+
+    @property
+    def bias(self) -> float:
+        return self.signed_error / self.points if self.points else math.nan
+
+
+@dataclass
+class BacktestResult:
+    snapshots: int = 0
+    scores: Dict[str, SeriesScore] = field(default_factory=dict)
+    interval_points: int = 0
+    interval_hits: int = 0
+
+    @property
+    def coverage(self) -> float:
+        return 100.0 * self.interval_hits / self.interval_points if self.interval_points else math.nan
+
+
+def backtest(snapshots: Iterator[Dict], realised: Mapping[str, float]) -> BacktestResult:
+    """
+    Score snapshots against realised MRR keyed by `YYYY-MM`.
+
+    Forecast month N of a snapshot is compared with the calendar month N
+    months after the snapshot's own month. P10-P90 coverage is reported for
+    snapshots that include a simulation.
+    """
+    result = BacktestResult()
+    for snapshot in snapshots:
+        result.snapshots += 1
+        generated_at = snapshot["generated_at"]
+        outputs = snapshot.get("outputs", {})
+        series = dict(outputs.get("scenarios", {}))
+        simulation = outputs.get("simulation") or {}
+        if "p50" in simulation:
+            series["p50"] = simulation["p50"]
+        for month in range(1, snapshot.get("horizon", 0) + 1):
+            actual = realised.get(month_key(generated_at, month))
+            if actual is None:
+                continue
+            for name, values in series.items():
+                if month <= len(values) and values[month - 1] is not None:
+                    result.scores.setdefault(name, SeriesScore()).add(values[month - 1], actual)
+            low, high = simulation.get("p10"), simulation.get("p90")
+            if low and high and month <= len(low) and month <= len(high):
+                result.interval_points += 1
+                result.interval_hits += int(low[month - 1] <= actual <= high[month - 1])
+    return result
+
+
+def format_backtest(result: BacktestResult, months_with_actuals: int) -> str:
+    lines = [
+        f"Backtest: {result.snapshots} snapshots, {months_with_actuals} months of realised MRR",
+        f"{'Series':<14}{'Points':>8}{'MAPE %':>10}{'Bias':>16}",
+    ]
+    for name, score in result.scores.items():
+        lines.append(f"{name:<14}{score.points:>8}{score.mape:>10.1f}{score.bias:>16,.2f}")
+    if not result.scores:
+        lines.append("No snapshot months overlap realised metrics yet.")
+    if result.interval_points:
+        lines.append(f"P10-P90 coverage: {result.coverage:.1f}% of {result.interval_points} months")
+    return "\n".join(lines)
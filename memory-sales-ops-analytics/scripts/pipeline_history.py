@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Local history of pipeline snapshots and diffs between any two of them.
+
+`pipeline_snapshot.py` appends one compact record per run holding every
+deal's stage, stage-entry time and amount. Records for a quarter/segment
+scope live in an append-only `history.jsonl`; `history.idx` holds one
+`taken_at<TAB>offset<TAB>length` line per record, so picking two snapshots
+is a bisect plus two seeks. Diffing needs neither API access nor
+re-classification of notes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPT_DIR.parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from _shared import IndexedJsonLog, configure_logging, parse_timestamp, safe_filename, state_dir  # noqa: E402
+
+HISTORY_VERSION = 1
+HISTORY_LOG = "history.jsonl"
+HISTORY_INDEX = "history.idx"
+WON_STAGE = "closed_won"
+
+
+def scope_label(quarter: Optional[str], segment: Optional[str]) -> str:
+    """Name of the history a snapshot belongs to (one per quarter/segment filter)."""
+    return f"quarter={quarter or 'all'},segment={segment or 'all'}"
+
+
+def history_dir(quarter: Optional[str], segment: Optional[str], override: Optional[Path] = None) -> Path:
+    return state_dir("sales-ops", override) / "history" / safe_filename(scope_label(quarter, segment))
+
+
+def days_between(start: str, end: str) -> Optional[float]:
+    """Days from one timestamp to another; None when either is missing or unparseable."""
+    start_time, end_time = parse_timestamp(start), parse_timestamp(end)
+    if start_time is None or end_time is None:
+        return None
+    return (end_time - start_time).total_seconds() / 86400.0
+
+
+@dataclass
+class DealState:
+    """A deal's position in one snapshot."""
+    stage: str
+    since: str
+    amount: Optional[float] = None
+
+
+class PipelineHistory(IndexedJsonLog):
+    """Append-only per-deal stage maps with a time index."""
+
+    def __init__(self, directory: Path):
+        super().__init__(directory, HISTORY_LOG, HISTORY_INDEX, "taken_at")
+
+    @property
+    def times(self) -> List[str]:
+        return self.keys
+
+    def load(self, position: int) -> Tuple[str, Dict[str, DealState]]:
+        record = self.read(position)
+        deals = {
+            key: DealState(stage, since, amount)
+            for key, (stage, since, amount) in record["deals"].items()
+        }
+        return record["taken_at"], deals
+
+    def append(self, taken_at: str, deals: Dict[str, DealState]) -> None:
+        """
+        Record a snapshot. A deal whose stage did not change since the
+        previous snapshot keeps that snapshot's stage-entry time.
+        """
+        previous = self.load(len(self) - 1)[1] if len(self) else {}
+        compact = {}
+        for key, state in deals.items():
+            before = previous.get(key)
+            since = before.since if before is not None and before.stage == state.stage else state.since
+            amount = None if state.amount is None else round(state.amount, 2)
+            compact[key] = [state.stage, since or taken_at, amount]
+        self.append_record({"v": HISTORY_VERSION, "taken_at": taken_at, "deals": compact})
+
+
+@dataclass
+class PipelineDiff:
+    """Changes between two snapshots of the same scope."""
+    from_at: str
+    to_at: str
+    transitions: Counter = field(default_factory=Counter)
+    moved: List[Tuple[str, str, str, Optional[float]]] = field(default_factory=list)
+    added: Counter = field(default_factory=Counter)
+    removed: Counter = field(default_factory=Counter)
+    won_amount: float = 0.0
+    time_in_stage: Dict[str, float] = field(default_factory=dict)
+    exit_days: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def days(self) -> float:
+        return days_between(self.from_at, self.to_at) or 0.0
+
+    @property
+    def velocity(self) -> Optional[Tuple[float, float]]:
+        """(stage changes per week, closed-won amount per week); None under a day apart"""
+        if self.days < 1.0:
+            return None
+        weeks = self.days / 7.0
+        return len(self.moved) / weeks, self.won_amount / weeks
+
+
+def diff_snapshots(
+    from_at: str,
+    before: Dict[str, DealState],
+    to_at: str,
+    after: Dict[str, DealState],
+) -> PipelineDiff:
+    """
+    Compare two per-deal stage maps with hash lookups (linear in deals).
+
+    `time_in_stage` is the mean age of each stage's deals at `to_at`;
+    `exit_days` is the mean time deals spent in a stage before leaving it.
+    Deals whose stage-entry time cannot be parsed are counted but left out
+    of both averages.
+    """
+    result = PipelineDiff(from_at, to_at)
+    exits: Dict[str, List[float]] = defaultdict(list)
+    for key, state in after.items():
+        previous = before.get(key)
+        if previous is None:
+            result.added[state.stage] += 1
+        elif previous.stage != state.stage:
+            result.transitions[(previous.stage, state.stage)] += 1
+            spent = days_between(previous.since, state.since)
+            result.moved.append((key, previous.stage, state.stage, spent))
+            if spent is not None:
+                exits[previous.stage].append(spent)
+            if state.stage == WON_STAGE and state.amount:
+                result.won_amount += state.amount
+    for key, state in before.items():
+        if key not in after:
+            result.removed[state.stage] += 1
+
+    ages: Dict[str, List[float]] = defaultdict(list)
+    for state in after.values():
+        age = days_between(state.since, to_at)
+        if age is not None:
+            ages[state.stage].append(age)
+    result.time_in_stage = {stage: sum(values) / len(values) for stage, values in ages.items()}
+    result.exit_days = {stage: sum(values) / len(values) for stage, values in exits.items()}
+    return result
+
+
+def deal_states(deals: Iterable, taken_at: str) -> Dict[str, DealState]:
+    """Per-deal stage map for `PipelineHistory.append` from aggregated deals."""
+    return {
+        deal.key: DealState(deal.stage, deal.stage_at or deal.first_seen or taken_at, deal.amount)
+        for deal in deals
+    }
+
+
+def _title(stage: str) -> str:
+    return stage.replace("_", " ").title()
+
+
+def format_diff(diff: PipelineDiff, scope: str, max_deals: int = 25) -> str:
+    lines = [
+        "# Pipeline Changes",
+        "",
+        f"Scope: {scope}",
+        f"From: {diff.from_at}",
+        f"To: {diff.to_at} ({diff.days:.1f} days)",
+        "",
+        "## Stage Transitions",
+    ]
+    if diff.transitions:
+        for (source, target), count in diff.transitions.most_common():
+            lines.append(f"- {_title(source)} -> {_title(target)}: {count}")
+    else:
+        lines.append("- No deals changed stage.")
+    added = sum(diff.added.values())
+    removed = sum(diff.removed.values())
+    if added:
+        lines.append(f"- New deals: {added} ({', '.join(f'{_title(s)} {n}' for s, n in diff.added.most_common())})")
+    if removed:
+        lines.append(f"- No longer in scope: {removed} ({', '.join(f'{_title(s)} {n}' for s, n in diff.removed.most_common())})")
+
+    lines.extend(["", "## Velocity"])
+    velocity = diff.velocity
+    if velocity is None:
+        lines.append(f"- {len(diff.moved)} stage changes, ${diff.won_amount:,.0f} closed won (snapshots under a day apart)")
+    else:
+        per_week, won_per_week = velocity
+        lines.append(f"- Stage changes per week: {per_week:.1f}")
+        lines.append(f"- Closed-won amount per week: ${won_per_week:,.0f} (${diff.won_amount:,.0f} total)")
+    for stage, days in sorted(diff.exit_days.items()):
+        lines.append(f"- Days in {_title(stage)} before moving on: {days:.1f}")
+
+    lines.extend(["", "## Time in Stage (as of To)"])
+    for stage, days in sorted(diff.time_in_stage.items(), key=lambda item: -item[1]):
+        lines.append(f"- {_title(stage)}: {days:.1f} days on average")
+
+    if diff.moved:
+        lines.extend(["", "## Moved Deals"])
+        ordered = sorted(diff.moved, key=lambda item: (item[2], item[0]))
+        for key, source, target, spent in ordered[:max_deals]:
+            after = f" after {spent:.0f} days" if spent is not None else ""
+            lines.append(f"- {key}: {_title(source)} -> {_title(target)}{after}")
+        if len(ordered) > max_deals:
+            lines.append(f"- ... {len(ordered) - max_deals} more")
+    return "\n".join(lines) + "\n"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="List stored pipeline snapshots or diff two of them (no API access needed)."
+    )
+    parser.add_argument("--quarter", help="Quarter filter the snapshots were taken with.")
+    parser.add_argument("--segment", help="Segment filter the snapshots were taken with.")
+    parser.add_argument(
+        "--diff",
+        nargs="*",
+        metavar="DATE",
+        help="Diff snapshots at or before FROM and TO (ISO date/time prefixes). "
+             "One date diffs it against the latest; none diffs the last two.",
+    )
+    parser.add_argument("--list", action="store_true", help="List stored snapshots.")
+    parser.add_argument("--max-deals", type=int, default=25, help="Moved deals to list in the diff.")
+    parser.add_argument("--history-dir", type=Path, help="State directory (defaults to ~/.cogniz/state/sales-ops).")
+    parser.add_argument("--output", type=Path, help="Optional path to write the diff (Markdown).")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging.")
+    args = parser.parse_args()
+    if args.diff is not None and len(args.diff) > 2:
+        parser.error("--diff takes at most two dates")
+    if args.diff is None and not args.list:
+        args.diff = []
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    configure_logging(args.verbose)
+    logger = logging.getLogger("pipeline_history")
+
+    scope = scope_label(args.quarter, args.segment)
+    history = PipelineHistory(history_dir(args.quarter, args.segment, args.history_dir))
+    if args.list:
+        for taken_at in history.times:
+            print(taken_at)
+        logger.info("%d snapshots for %s in %s", len(history), scope, history.directory)
+        if args.diff is None:
+            return
+
+    dates = args.diff or []
+    if len(dates) == 2:
+        positions = [history.position_at(dates[0]), history.position_at(dates[1])]
+    elif len(dates) == 1:
+        positions = [history.position_at(dates[0]), history.position_at()]
+    else:
+        positions = [history.position_at(before=1), history.position_at()]
+    if None in positions or positions[0] == positions[1]:
+        logger.error("Need two distinct snapshots for %s (have %d); run pipeline_snapshot.py again later.", scope, len(history))
+        sys.exit(1)
+
+    from_at, before = history.load(positions[0])
+    to_at, after = history.load(positions[1])
+    report = format_diff(diff_snapshots(from_at, before, to_at, after), scope, args.max_deals)
+    print(report)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(report, encoding="utf-8")
+        logger.info("Saved diff to %s", args.output)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -7,18 +7,90 @@ from __future__ import annotations
 
 import argparse
 import logging
+import re
 import sys
 from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 ROOT_DIR = SCRIPT_DIR.parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from _shared import configure_logging, ensure_memory_api  # noqa: E402
+from _shared import (  # noqa: E402
+    DEFAULT_SEARCH_TIMEOUT,
+    KeywordClassifier,
+    configure_logging,
+    ensure_memory_api,
+    run_searches,
+)
+from _amounts import AmountCache, default_cache_path, extract_batch  # noqa: E402
+from pipeline_history import PipelineHistory, deal_states, history_dir  # noqa: E402
+
+# Priority-ordered stage keywords; notes matching none are "active".
+STAGE_CLASSIFIER = KeywordClassifier(
+    {
+        "closed_won": ("closed won", "signed", "contract start", "won"),
+        "stalled": ("stalled", "blocked", "stuck", "awaiting"),
+        "expansion": ("expansion", "upsell", "add-on", "upgrade"),
+        "churn": ("churn", "downgrade", "cancel*", "at risk"),
+    }
+)
+DEFAULT_STAGE = "active"
+STAGE_ORDER = ("active", "stalled", "expansion", "churn", "closed_won")
+
+# `deal:<id>` / `account:<id>` tag tokens in lower-cased tags or content. The
+# value must follow the colon directly and the token must stand alone, so prose
+# such as "account: renewal at risk" is not read as an identifier.
+DEAL_REF_PATTERN = re.compile(r"(?<![^\s(\[])(deal|account):([a-z0-9](?:[\w.-]*\w)?)(?=$|[\s,;.)\]])")
+DEAL_METADATA_KEYS = ("deal_id", "deal")
+ACCOUNT_METADATA_KEYS = ("account_id", "account")
+
+
+@dataclass
+class Deal:
+    """All notes about one deal, reduced to its latest stage and amount."""
+    key: str
+    stage: str = DEFAULT_STAGE
+    stage_at: str = ""
+    first_seen: str = ""
+    updated_at: str = ""
+    amount: Optional[float] = None
+    amount_at: str = ""
+    memories: List[Dict] = field(default_factory=list)
+
+    @property
+    def latest(self) -> Dict:
+        return max(self.memories, key=lambda mem: str(mem.get("created_at") or ""))
+
+
+def deal_key(mem: Dict[str, Any], content: str) -> str:
+    """
+    Identify the deal a note is about.
+
+    Order: metadata deal id, `deal:` tag or tag-shaped token in the content,
+    then the same for the account (notes without a deal id roll up per
+    account), and finally the memory id so unattributed notes stay separate.
+    """
+    metadata = mem.get("metadata") or {}
+    if isinstance(metadata, dict):
+        for key in DEAL_METADATA_KEYS:
+            if metadata.get(key):
+                return f"deal:{str(metadata[key]).lower()}"
+    account = None
+    for source in (" ".join(mem.get("tags") or ()).lower(), content):
+        for kind, value in DEAL_REF_PATTERN.findall(source):
+            if kind == "deal":
+                return f"deal:{value}"
+            account = account or value
+    if account is None and isinstance(metadata, dict):
+        account = next((str(metadata[key]).lower() for key in ACCOUNT_METADATA_KEYS if metadata.get(key)), None)
+    if account:
+        return f"account:{account}"
+    return f"memory:{mem.get('id', 'unknown')}"
 
 
 def parse_args() -> argparse.Namespace:
@@ -45,6 +117,44 @@ def parse_args() -> argparse.Namespace:
         type=Path,
         help="Optional path to write the snapshot (Markdown).",
     )
+    parser.add_argument(
+        "--max-rows-per-stage",
+        type=int,
+        default=50,
+        help="Detail rows listed per stage and for usage signals before an 'N more' line (0 = all).",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=0,
+        help="Split --output into numbered files of at most this many lines (0 = single file).",
+    )
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Do not record this snapshot's per-deal stages for pipeline_history.py diffs.",
+    )
+    parser.add_argument(
+        "--history-dir",
+        type=Path,
+        help="Snapshot history state directory (defaults to ~/.cogniz/state/sales-ops).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_SEARCH_TIMEOUT,
+        help="Seconds to wait for the pipeline and usage searches, which run concurrently.",
+    )
+    parser.add_argument(
+        "--no-amount-cache",
+        action="store_true",
+        help="Parse every memory again instead of using the shared amount cache.",
+    )
+    parser.add_argument(
+        "--amount-cache",
+        type=Path,
+        help="Amount cache file or directory (defaults to ~/.cogniz/state/amount-cache).",
+    )
     parser.add_argument(
         "--memory-api-path",
         help="Override path to the cogniz-memory-manager scripts directory.",
@@ -54,7 +164,16 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Enable verbose logging.",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.timeout <= 0:
+        parser.error("--timeout must be positive")
+    if args.max_rows_per_stage < 0:
+        parser.error("--max-rows-per-stage cannot be negative")
+    if args.page_size < 0:
+        parser.error("--page-size cannot be negative")
+    if args.page_size and not args.output:
+        parser.error("--page-size requires --output")
+    return args
 
 
 def build_pipeline_query(args: argparse.Namespace) -> str:
@@ -73,59 +192,199 @@ def build_usage_query(args: argparse.Namespace) -> str:
     return " ".join(terms)
 
 
-def categorise_pipeline(memories: List[Dict]) -> Dict[str, List[Dict]]:
-    groups: Dict[str, List[Dict]] = defaultdict(list)
-    for mem in memories:
-        content = (mem.get("content") or "").lower()
-        if any(term in content for term in ("closed won", "signed", "contract start", "won")):
-            groups["closed_won"].append(mem)
-        elif any(term in content for term in ("stalled", "blocked", "stuck", "awaiting")):
-            groups["stalled"].append(mem)
-        elif any(term in content for term in ("expansion", "upsell", "add-on", "upgrade")):
-            groups["expansion"].append(mem)
-        elif any(term in content for term in ("churn", "downgrade", "cancel", "at risk")):
-            groups["churn"].append(mem)
-        else:
-            groups["active"].append(mem)
-    return groups
-
-
-def format_snapshot(pipeline_groups: Dict[str, List[Dict]], usage_memories: List[Dict], args: argparse.Namespace) -> str:
-    lines = [
-        "# Sales Ops Snapshot",
-        "",
-        f"Generated: {datetime.utcnow().isoformat(timespec='seconds')}Z",
-    ]
+def aggregate_deals(
+    memories: List[Dict],
+    cache: Optional[AmountCache] = None,
+) -> Dict[str, Deal]:
+    """
+    Group deal notes by deal in one pass over the notes.
+
+    Each deal takes the stage of its most recent note with a stage signal
+    (notes matching no stage keyword never override one) and the amount of
+    its most recent note that mentions an amount.
+
+    Returns:
+        Deals keyed by `deal:<id>`, `account:<id>` or `memory:<id>`
+    """
+    contents = [mem.get("content") or "" for mem in memories]
+    if cache is not None:
+        batch, stages = cache.extract(contents, STAGE_CLASSIFIER, DEFAULT_STAGE)
+    else:
+        batch = extract_batch(contents)
+        stages = [STAGE_CLASSIFIER.first(content, default=DEFAULT_STAGE) for content in contents]
+    deals: Dict[str, Deal] = {}
+    for index, (mem, content, stage) in enumerate(zip(memories, contents, stages)):
+        key = deal_key(mem, content.lower())
+        deal = deals.get(key)
+        if deal is None:
+            deal = deals[key] = Deal(key)
+        deal.memories.append(mem)
+        created_at = str(mem.get("created_at") or "")
+        deal.updated_at = max(deal.updated_at, created_at)
+        if created_at and (not deal.first_seen or created_at < deal.first_seen):
+            deal.first_seen = created_at
+        if stage != DEFAULT_STAGE and created_at >= deal.stage_at:
+            deal.stage, deal.stage_at = stage, created_at
+        if batch.found(index) and (deal.amount is None or created_at > deal.amount_at):
+            deal.amount, deal.amount_at = batch.means[index], created_at
+    return deals
+
+
+def categorise_pipeline(
+    memories: List[Dict],
+    cache: Optional[AmountCache] = None,
+) -> Tuple[Dict[str, List[Deal]], Dict[str, float]]:
+    """
+    Group deals by their latest stage and total deal amounts per stage.
+
+    Returns:
+        (deals per stage, most recent first; summed deal amounts per stage)
+    """
+    groups: Dict[str, List[Deal]] = defaultdict(list)
+    totals: Dict[str, float] = defaultdict(float)
+    for deal in aggregate_deals(memories, cache).values():
+        groups[deal.stage].append(deal)
+        if deal.amount is not None:
+            totals[deal.stage] += deal.amount
+    for deals in groups.values():
+        deals.sort(key=lambda deal: deal.updated_at, reverse=True)
+    return groups, totals
+
+
+def _snippet(mem: Dict) -> str:
+    snippet = (mem.get("content") or "").strip().replace("\n", " ")
+    return f"{snippet[:200]}{'...' if len(snippet) > 200 else ''}"
+
+
+def _more(hidden: int, noun: str) -> str:
+    return f"- ... {hidden} more {noun} (raise --max-rows-per-stage, or 0 for all)"
+
+
+def iter_snapshot_lines(
+    pipeline_groups: Dict[str, List[Deal]],
+    usage_memories: List[Dict],
+    args: argparse.Namespace,
+    stage_amounts: Optional[Dict[str, float]] = None,
+    search_errors: Optional[Dict[str, str]] = None,
+    generated_at: Optional[str] = None,
+    max_rows: int = 0,
+) -> Iterator[str]:
+    """
+    Yield the snapshot Markdown line by line.
+
+    Detail rows are capped at `max_rows` per stage (and for usage signals)
+    with an "N more" line, so output size does not grow with `--limit`.
+    0 lists everything.
+    """
+    search_errors = search_errors or {}
+    yield "# Sales Ops Snapshot"
+    yield ""
+    yield f"Generated: {generated_at or datetime.utcnow().isoformat(timespec='seconds') + 'Z'}"
     if args.quarter:
-        lines.append(f"Quarter: {args.quarter}")
+        yield f"Quarter: {args.quarter}"
     if args.segment:
-        lines.append(f"Segment: {args.segment}")
-    lines.append("")
+        yield f"Segment: {args.segment}"
+    for name, error in search_errors.items():
+        yield f"> Partial snapshot: the {name} search failed ({error})."
+    yield ""
 
-    lines.append("## Pipeline Overview")
-    for stage in ("active", "stalled", "expansion", "churn", "closed_won"):
-        count = len(pipeline_groups.get(stage, []))
-        lines.append(f"- {stage.replace('_', ' ').title()}: {count}")
+    yield "## Pipeline Overview"
+    for stage in STAGE_ORDER:
+        deals = pipeline_groups.get(stage, [])
+        notes = sum(len(deal.memories) for deal in deals)
+        amount = (stage_amounts or {}).get(stage)
+        suffix = f" (${amount:,.0f})" if amount else ""
+        yield (
+            f"- {stage.replace('_', ' ').title()}: {len(deals)} deal{'' if len(deals) == 1 else 's'}, "
+            f"{notes} note{'' if notes == 1 else 's'}{suffix}"
+        )
 
-    lines.extend(["", "## Pipeline Details"])
-    for stage, memories in pipeline_groups.items():
-        if not memories:
+    yield ""
+    yield "## Pipeline Details"
+    for stage, deals in pipeline_groups.items():
+        if not deals:
             continue
-        lines.append(f"### {stage.replace('_', ' ').title()}")
-        for mem in memories:
-            snippet = (mem.get("content") or "").strip().replace("\n", " ")
-            lines.append(f"- [{mem.get('id', 'unknown')}] {snippet[:200]}{'...' if len(snippet) > 200 else ''}")
-        lines.append("")
-
-    lines.append("## Usage Signals")
-    if usage_memories:
-        for mem in usage_memories:
-            snippet = (mem.get("content") or "").strip().replace("\n", " ")
-            lines.append(f"- [{mem.get('id', 'unknown')}] {snippet[:200]}{'...' if len(snippet) > 200 else ''}")
+        yield f"### {stage.replace('_', ' ').title()}"
+        shown = deals[:max_rows] if max_rows else deals
+        for deal in shown:
+            latest = deal.latest
+            extra = f" (+{len(deal.memories) - 1} earlier)" if len(deal.memories) > 1 else ""
+            yield f"- {deal.key} [{latest.get('id', 'unknown')}]{extra} {_snippet(latest)}"
+        if len(deals) > len(shown):
+            yield _more(len(deals) - len(shown), "deals")
+        yield ""
+
+    yield "## Usage Signals"
+    if "usage" in search_errors:
+        yield "- Usage analytics unavailable (search failed)."
+    elif usage_memories:
+        shown = usage_memories[:max_rows] if max_rows else usage_memories
+        for mem in shown:
+            yield f"- [{mem.get('id', 'unknown')}] {_snippet(mem)}"
+        if len(usage_memories) > len(shown):
+            yield _more(len(usage_memories) - len(shown), "usage memories")
     else:
-        lines.append("- No usage analytics memories match the query.")
+        yield "- No usage analytics memories match the query."
+
+
+def format_snapshot(*args, **kwargs) -> str:
+    """Whole snapshot as one string (see `iter_snapshot_lines`)."""
+    return "\n".join(iter_snapshot_lines(*args, **kwargs)).strip() + "\n"
 
-    return "\n".join(lines).strip() + "\n"
+
+class SnapshotWriter:
+    """
+    Stream lines to stdout and, optionally, to an output file.
+
+    With a page size, the file output is split into `<stem>-001<suffix>`,
+    `<stem>-002<suffix>`, ... of at most that many lines (plus a short page
+    header and footer), so no single file grows unbounded.
+    """
+
+    def __init__(self, output: Optional[Path] = None, page_size: int = 0, echo: bool = True):
+        self.output = output
+        self.page_size = page_size
+        self.echo = echo
+        self.pages: List[Path] = []
+        self._handle = None
+        self._lines = 0
+        if output:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            self._open()
+
+    def _page_path(self, number: int) -> Path:
+        return self.output.with_name(f"{self.output.stem}-{number:03d}{self.output.suffix}")
+
+    def _open(self) -> None:
+        path = self._page_path(len(self.pages) + 1) if self.page_size else self.output
+        self._handle = path.open("w", encoding="utf-8")
+        self.pages.append(path)
+        self._lines = 0
+        if len(self.pages) > 1:
+            self._handle.write(f"# Sales Ops Snapshot (page {len(self.pages)})\n\n")
+
+    def write(self, line: str) -> None:
+        if self.echo:
+            sys.stdout.write(line + "\n")
+        if self._handle is None:
+            return
+        if self.page_size and self._lines >= self.page_size:
+            self._handle.write(f"\n_Continued in {self._page_path(len(self.pages) + 1).name}_\n")
+            self._handle.close()
+            self._open()
+        self._handle.write(line + "\n")
+        self._lines += 1
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
 
 def main() -> None:
@@ -144,30 +403,42 @@ def main() -> None:
         project_id=config.get("project_id"),
     )
 
-    pipeline_query = build_pipeline_query(args)
-    usage_query = build_usage_query(args)
+    project_id = config.get("project_id")
+    searches = {
+        "pipeline": {"query": build_pipeline_query(args), "limit": args.limit, "project_id": project_id},
+        "usage": {"query": build_usage_query(args), "limit": args.limit, "project_id": project_id},
+    }
+    batch = run_searches(api, searches, args.timeout, logger)
+    if len(batch.errors) == len(searches):
+        logger.error("All searches failed; no snapshot written.")
+        sys.exit(1)
+    pipeline_memories = batch.results["pipeline"]
+    usage_memories = batch.results["usage"]
 
-    logger.info("Querying pipeline memories: '%s'", pipeline_query)
-    pipeline_memories = api.search(
-        query=pipeline_query,
-        limit=args.limit,
-        project_id=config.get("project_id"),
+    cache = None if args.no_amount_cache else AmountCache(default_cache_path(args.amount_cache))
+    try:
+        groups, stage_amounts = categorise_pipeline(pipeline_memories, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    generated_at = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    if not args.no_history and "pipeline" in batch.errors:
+        logger.warning("Not recording pipeline history from a failed pipeline search.")
+    elif not args.no_history:
+        history = PipelineHistory(history_dir(args.quarter, args.segment, args.history_dir))
+        deals = [deal for stage_deals in groups.values() for deal in stage_deals]
+        history.append(generated_at, deal_states(deals, generated_at))
+        logger.debug("Recorded pipeline snapshot %d in %s", len(history), history.directory)
+    lines = iter_snapshot_lines(
+        groups, usage_memories, args, stage_amounts, batch.errors, generated_at, args.max_rows_per_stage
     )
-    logger.info("Querying usage analytics: '%s'", usage_query)
-    usage_memories = api.search(
-        query=usage_query,
-        limit=args.limit,
-        project_id=config.get("project_id"),
-    )
-
-    groups = categorise_pipeline(pipeline_memories)
-    snapshot = format_snapshot(groups, usage_memories, args)
-    print(snapshot)
-
-    if args.output:
-        args.output.parent.mkdir(parents=True, exist_ok=True)
-        args.output.write_text(snapshot, encoding="utf-8")
-        logger.info("Saved snapshot to %s", args.output)
+    with SnapshotWriter(args.output, args.page_size) as writer:
+        for line in lines:
+            writer.write(line)
+    if len(writer.pages) == 1:
+        logger.info("Saved snapshot to %s", writer.pages[0])
+    elif writer.pages:
+        logger.info("Saved snapshot to %d pages: %s ... %s", len(writer.pages), writer.pages[0], writer.pages[-1].name)
 
 
 if __name__ == "__main__":  # pragma: no cover
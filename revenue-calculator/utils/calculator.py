@@ -0,0 +1,740 @@
+"""
+Revenue Calculator for Cogniz Memory Platform
+
+Computes SaaS revenue metrics (MRR/ARR movements, churn, unit economics and
+growth) from a log of subscription events.
+
+Each event records a customer's MRR level from a date onward:
+``customer_id, date, mrr, plan``; an ``mrr`` of 0 is a cancellation.
+Events are held as parallel columns, collapsed to one level per customer and
+month, and turned into MRR movements by a single sort-and-scan pass. Monthly
+series are then built with bucketed sums and prefix sums, so every metric is
+a lookup into precomputed arrays. NumPy is used when installed.
+"""
+
+import csv
+import json
+import math
+import re
+import sqlite3
+from array import array
+from dataclasses import dataclass, asdict
+from datetime import date, datetime
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:  # Optional: vectorized sort-and-scan when NumPy is installed
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None
+
+
+# Accepted column names for each event field (first match in the first row wins)
+COLUMN_ALIASES = {
+    'customer_id': ('customer_id', 'customer', 'account_id', 'subscription_id'),
+    'date': ('date', 'event_date', 'month', 'created_at'),
+    'mrr': ('mrr', 'amount', 'monthly_amount'),
+    'plan': ('plan', 'plan_name', 'tier'),
+}
+
+# Monthly flows built from the movements; all indexed by month offset
+FLOWS = (
+    'mrr', 'customers',
+    'new_mrr', 'expansion_mrr', 'contraction_mrr', 'churned_mrr', 'reactivation_mrr',
+    'new_customers', 'churned_customers', 'reactivated_customers',
+)
+
+SUPPORTED_SOURCES = ('csv', 'database', 'sqlite', 'records')
+
+# Sorts after every real month index; marks customers never active
+_NO_COHORT = 1 << 40
+
+_MONTH_RE = re.compile(r'^(\d{4})-(\d{2})$')
+_QUARTER_RE = re.compile(r'^(\d{4})-Q([1-4])$', re.IGNORECASE)
+_LAST_N_RE = re.compile(r'^last_(\d+)_months$')
+
+
+@dataclass
+class MRRMovement:
+    """MRR movement breakdown for one month"""
+    month: str
+    mrr: float
+    arr: float
+    customers: int
+    new_mrr: float
+    expansion_mrr: float
+    contraction_mrr: float
+    churned_mrr: float
+    reactivation_mrr: float
+    net_new_mrr: float
+    new_customers: int
+    churned_customers: int
+    mom_growth_percent: Optional[float]
+
+
+def month_index(value: Any) -> int:
+    """Map a date, datetime or 'YYYY-MM[-DD...]' string to year * 12 + month - 1."""
+    if isinstance(value, (date, datetime)):
+        return value.year * 12 + value.month - 1
+    text = str(value).strip()
+    try:
+        return int(text[:4]) * 12 + int(text[5:7]) - 1
+    except ValueError:
+        raise ValueError(f"Unrecognised event date: {value!r}") from None
+
+
+def month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _resolve_columns(row: Dict[str, Any]) -> Dict[str, str]:
+    """Pick the column name used for each field, based on the first row."""
+    return {
+        field: next((name for name in aliases if name in row), aliases[0])
+        for field, aliases in COLUMN_ALIASES.items()
+    }
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    if value is None or isinstance(value, float) and not math.isfinite(value):
+        return None
+    return round(value, digits)
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return numerator / denominator if denominator else None
+
+
+class RevenueCalculator:
+    """Main revenue metrics engine over subscription events"""
+
+    def __init__(self, db_config: Optional[Dict] = None):
+        """
+        Initialize calculator
+
+        Args:
+            db_config: Source configuration: 'path' (CSV or SQLite file),
+                'table' or 'query' for SQLite, and optional 'cac' and
+                'gross_margin' defaults for unit economics
+        """
+        self.db_config = db_config or {}
+        self._reset()
+
+    def _reset(self) -> None:
+        self.stats = {
+            'events_loaded': 0,
+            'customers': 0,
+            'months': 0,
+            'updates': 0,
+        }
+        self._customer_codes: Dict[str, int] = {}
+        self._plan_codes: Dict[str, int] = {'': 0}
+        # Per-customer state as of the latest applied month
+        self._level = array('d')
+        self._plan = array('q')
+        self._cohort = array('q')  # signup month index, -1 until first active
+        # Per-month flows; 'mrr' and 'customers' hold deltas until _finalise()
+        self._flows: Dict[str, Any] = {}
+        self._plan_flows: Dict[str, Any] = {}  # 'mrr' / 'customers': plans x months
+        self._cohort_flows: Dict[str, Any] = {}  # 'mrr' / 'customers': cohorts x ages
+        self._series: Dict[str, Sequence[float]] = {}
+        self._plan_series: Dict[str, Any] = {}
+        self._cohort_series: Dict[str, Any] = {}
+        self.first_month = 0
+        self.months = 0
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def load_data(self, source: str = 'database', data: Optional[Iterable[Dict[str, Any]]] = None,
+                  path: Optional[str] = None) -> int:
+        """
+        Load subscription events and precompute monthly series
+
+        Args:
+            source: 'csv', 'database'/'sqlite' or 'records'
+            data: Event dictionaries (for 'records')
+            path: File path (defaults to db_config['path'])
+
+        Returns:
+            Number of events loaded
+        """
+        rows = self._read(source, data, path)
+        self._reset()
+        return self._apply(self._columns(rows), incremental=False)
+
+    def update(self, source: str = 'records', data: Optional[Iterable[Dict[str, Any]]] = None,
+               path: Optional[str] = None) -> int:
+        """
+        Apply events for months after the latest loaded month
+
+        Only per-customer state and the monthly/cohort arrays are touched,
+        so a new month costs time proportional to its own events. Restating
+        earlier months requires a full load_data().
+
+        Returns:
+            Number of events applied
+        """
+        if not self.months:
+            return self.load_data(source, data, path)
+        applied = self._apply(self._columns(self._read(source, data, path)), incremental=True)
+        self.stats['updates'] += 1
+        return applied
+
+    def _read(self, source: str, data: Optional[Iterable[Dict[str, Any]]], path: Optional[str]) -> List[Dict[str, Any]]:
+        if source == 'records':
+            return list(data or [])
+        if source == 'csv':
+            return self._read_csv(path or self.db_config.get('path'))
+        if source in ('database', 'sqlite'):
+            return self._read_sqlite(path or self.db_config.get('path'))
+        raise ValueError(
+            f"Unsupported source '{source}'. Export subscriptions to CSV or SQLite; "
+            f"supported sources: {', '.join(SUPPORTED_SOURCES)}"
+        )
+
+    @staticmethod
+    def _read_csv(path: Optional[str]) -> List[Dict[str, Any]]:
+        if not path:
+            raise ValueError("CSV source requires a path")
+        with open(path, newline='', encoding='utf-8') as handle:
+            return list(csv.DictReader(handle))
+
+    def _read_sqlite(self, path: Optional[str]) -> List[Dict[str, Any]]:
+        if not path:
+            raise ValueError("Database source requires db_config['path'] to a SQLite file")
+        query = self.db_config.get('query') or f"SELECT * FROM {self.db_config.get('table', 'subscription_events')}"
+        connection = sqlite3.connect(path)
+        try:
+            connection.row_factory = sqlite3.Row
+            return [dict(row) for row in connection.execute(query)]
+        finally:
+            connection.close()
+
+    def _columns(self, rows: Iterable[Dict[str, Any]]) -> Tuple[array, array, array, array]:
+        """Factorize rows into parallel (customer, month, mrr, plan) columns."""
+        customer_codes = self._customer_codes
+        plan_codes = self._plan_codes
+        month_codes: Dict[Any, int] = {}
+        customers = array('q')
+        months = array('q')
+        levels = array('d')
+        plans = array('q')
+        columns = None
+        for row in rows:
+            if columns is None:
+                columns = _resolve_columns(row)
+                customer_key, date_key = columns['customer_id'], columns['date']
+                mrr_key, plan_key = columns['mrr'], columns['plan']
+            customer = row.get(customer_key)
+            when = row.get(date_key)
+            if customer is None or when is None or when == '':
+                continue
+            # Dates repeat heavily (one value per billing day); parse each once.
+            month = month_codes.get(when)
+            if month is None:
+                month = month_codes[when] = month_index(when)
+            customer = str(customer)
+            plan = str(row.get(plan_key) or '')
+            customers.append(customer_codes.setdefault(customer, len(customer_codes)))
+            months.append(month)
+            levels.append(float(row.get(mrr_key) or 0.0))
+            plans.append(plan_codes.setdefault(plan, len(plan_codes)))
+
+        # New customers start inactive, on no plan, without a cohort.
+        added = len(customer_codes) - len(self._level)
+        if added:
+            self._level.extend([0.0] * added)
+            self._plan.extend([0] * added)
+            self._cohort.extend([-1] * added)
+        self.stats['customers'] = len(customer_codes)
+        return customers, months, levels, plans
+
+    # ------------------------------------------------------------------
+    # Sort-and-scan core
+    # ------------------------------------------------------------------
+
+    def _apply(self, columns: Tuple[array, array, array, array], incremental: bool) -> int:
+        """Fold a batch of events into customer state and the monthly flows."""
+        customer, month, level, plan = columns
+        if not len(customer):
+            if not incremental:
+                self._finalise()
+            return 0
+        low, high = min(month), max(month)
+        if incremental and low < self.first_month + self.months:
+            raise ValueError(
+                f"update() only accepts months after {month_label(self.first_month + self.months - 1)}; "
+                f"use load_data() to restate earlier months"
+            )
+        if not self.months:
+            self.first_month = low
+        self._grow(high - self.first_month + 1)
+        if np is not None:
+            self._apply_numpy(customer, month, level, plan)
+        else:
+            self._apply_python(customer, month, level, plan)
+        self.stats['events_loaded'] += len(customer)
+        self._finalise()
+        return len(customer)
+
+    def _grow(self, months: int) -> None:
+        """Extend flow arrays to `months` months and the current plan count."""
+        months = max(months, self.months)
+        plans = len(self._plan_codes)
+        names = ('mrr', 'customers')
+        if np is not None:
+            def pad(values, rows):
+                if values is None:
+                    return np.zeros((rows, months)) if rows else np.zeros(months)
+                if values.ndim == 1:
+                    return np.pad(values, (0, months - values.shape[0]))
+                return np.pad(values, ((0, rows - values.shape[0]), (0, months - values.shape[1])))
+            for name in FLOWS:
+                self._flows[name] = pad(self._flows.get(name), 0)
+            for name in names:
+                self._plan_flows[name] = pad(self._plan_flows.get(name), plans)
+                self._cohort_flows[name] = pad(self._cohort_flows.get(name), months)
+        else:
+            def pad(rows_list, rows):
+                rows_list = rows_list or []
+                for row in rows_list:
+                    row.extend([0.0] * (months - len(row)))
+                rows_list.extend([0.0] * months for _ in range(rows - len(rows_list)))
+                return rows_list
+            for name in FLOWS:
+                self._flows[name] = pad([self._flows.get(name, [])], 1)[0]
+            for name in names:
+                self._plan_flows[name] = pad(self._plan_flows.get(name), plans)
+                self._cohort_flows[name] = pad(self._cohort_flows.get(name), months)
+        self.months = months
+        self.stats['months'] = months
+
+    def _apply_numpy(self, customer, month, level, plan) -> None:
+        customer = np.asarray(customer, dtype=np.int64)
+        month = np.asarray(month, dtype=np.int64)
+        level = np.asarray(level, dtype=np.float64)
+        plan = np.asarray(plan, dtype=np.int64)
+
+        # Sort by customer and month (stable on input order), then keep the
+        # last event of each customer-month.
+        order = np.lexsort((np.arange(len(month)), month, customer))
+        customer, month, level, plan = customer[order], month[order], level[order], plan[order]
+        last = np.ones(len(month), dtype=bool)
+        last[:-1] = (customer[1:] != customer[:-1]) | (month[1:] != month[:-1])
+        customer, month, level, plan = customer[last], month[last], level[last], plan[last]
+
+        # Pair every level with the previous one: the stored state for a
+        # customer's first row in the batch, the row before otherwise.
+        state_level = np.frombuffer(self._level, dtype=np.float64)
+        state_plan = np.frombuffer(self._plan, dtype=np.int64)
+        state_cohort = np.frombuffer(self._cohort, dtype=np.int64)
+        first = np.ones(len(month), dtype=bool)
+        first[1:] = customer[1:] != customer[:-1]
+        starts = np.flatnonzero(first)
+        ends = np.append(starts[1:], len(month)) - 1
+        group = np.cumsum(first) - 1
+        prev_level = np.where(first, state_level[customer], np.roll(level, 1))
+        prev_plan = np.where(first, state_plan[customer], np.roll(plan, 1))
+
+        # Signup month: the stored one, else the first active month in the batch.
+        group_customers = customer[starts]
+        first_active = np.minimum.reduceat(np.where(level > 0, month, _NO_COHORT), starts)
+        known = state_cohort[group_customers]
+        group_cohort = np.where(known >= 0, known, first_active)
+        cohort = group_cohort[group]
+
+        size = self.months
+        offset = month - self.first_month
+        was, now = prev_level > 0, level > 0
+        delta = level - prev_level
+        started, stopped, kept = ~was & now, was & ~now, was & now
+        signup = started & (month == cohort)
+
+        def bucket(mask, weights=None):
+            return np.bincount(offset[mask], weights=None if weights is None else weights[mask], minlength=size)
+
+        flows = self._flows
+        flows['new_mrr'] += bucket(signup, level)
+        flows['reactivation_mrr'] += bucket(started & ~signup, level)
+        flows['expansion_mrr'] += bucket(kept & (delta > 0), delta)
+        flows['contraction_mrr'] += bucket(kept & (delta < 0), -delta)
+        flows['churned_mrr'] += bucket(stopped, prev_level)
+        flows['new_customers'] += bucket(signup)
+        flows['reactivated_customers'] += bucket(started & ~signup)
+        flows['churned_customers'] += bucket(stopped)
+        flows['mrr'] += np.bincount(offset, weights=delta, minlength=size)
+        flows['customers'] += bucket(started) - bucket(stopped)
+
+        # Plan mix: a level moves out of its old plan and into the new one.
+        plans = len(self._plan_codes)
+        cells, prev_cells = plan * size + offset, prev_plan * size + offset
+        for name, inflow, outflow in (('mrr', level, prev_level), ('customers', now, was)):
+            moved = (np.bincount(cells, weights=inflow, minlength=plans * size)
+                     - np.bincount(prev_cells, weights=outflow, minlength=plans * size))
+            self._plan_flows[name] += moved.reshape(plans, size)
+
+        # Cohorts: changes land in (signup month, months since signup) cells.
+        in_cohort = (cohort != _NO_COHORT) & (month >= cohort)
+        cells = ((cohort - self.first_month) * size + (month - cohort))[in_cohort]
+        for name, weights in (('mrr', delta), ('customers', now.astype(float) - was)):
+            moved = np.bincount(cells, weights=weights[in_cohort], minlength=size * size)
+            self._cohort_flows[name] += moved.reshape(size, size)
+
+        state_level[group_customers] = level[ends]
+        state_plan[group_customers] = plan[ends]
+        state_cohort[group_customers] = np.where(group_cohort == _NO_COHORT, -1, group_cohort)
+
+    def _apply_python(self, customer, month, level, plan) -> None:
+        count = len(month)
+        order = sorted(range(count), key=lambda i: (customer[i], month[i], i))
+        flows = self._flows
+        plan_mrr, plan_heads = self._plan_flows['mrr'], self._plan_flows['customers']
+        cohort_mrr, cohort_heads = self._cohort_flows['mrr'], self._cohort_flows['customers']
+        state_level, state_plan, state_cohort = self._level, self._plan, self._cohort
+        for position, i in enumerate(order):
+            nxt = order[position + 1] if position + 1 < count else None
+            if nxt is not None and customer[nxt] == customer[i] and month[nxt] == month[i]:
+                continue  # a later event in the same month supersedes this one
+            code, m, after, new_plan = customer[i], month[i], level[i], plan[i]
+            before, old_plan = state_level[code], state_plan[code]
+            slot = m - self.first_month
+            signup = False
+            if before <= 0 < after and state_cohort[code] < 0:
+                state_cohort[code] = m
+                signup = True
+            flows['mrr'][slot] += after - before
+            plan_mrr[new_plan][slot] += after
+            plan_mrr[old_plan][slot] -= before
+            plan_heads[new_plan][slot] += after > 0
+            plan_heads[old_plan][slot] -= before > 0
+            if before <= 0 < after:
+                flows['customers'][slot] += 1
+                kind = 'new' if signup else 'reactivation'
+                flows[f'{kind}_mrr'][slot] += after
+                flows['new_customers' if signup else 'reactivated_customers'][slot] += 1
+            elif after <= 0 < before:
+                flows['customers'][slot] -= 1
+                flows['churned_mrr'][slot] += before
+                flows['churned_customers'][slot] += 1
+            elif after > before > 0:
+                flows['expansion_mrr'][slot] += after - before
+            elif before > after > 0:
+                flows['contraction_mrr'][slot] += before - after
+            cohort = state_cohort[code]
+            if cohort >= 0:
+                row, age = cohort - self.first_month, m - cohort
+                cohort_mrr[row][age] += after - before
+                cohort_heads[row][age] += (after > 0) - (before > 0)
+            state_level[code], state_plan[code] = after, new_plan
+
+    def _finalise(self) -> None:
+        """Cumulate deltas into month-end MRR, customers, plan mix and cohort tables."""
+        if not self.months:
+            self._series = {name: [] for name in FLOWS}
+            return
+        if np is not None:
+            series = {name: self._flows[name] for name in FLOWS}
+            series['mrr'] = np.cumsum(self._flows['mrr'])
+            series['customers'] = np.cumsum(self._flows['customers'])
+            self._series = series
+            self._plan_series = {name: np.cumsum(values, axis=1) for name, values in self._plan_flows.items()}
+            self._cohort_series = {name: np.cumsum(values, axis=1) for name, values in self._cohort_flows.items()}
+            return
+        series = dict(self._flows)
+        series['mrr'] = list(accumulate(self._flows['mrr']))
+        series['customers'] = list(accumulate(self._flows['customers']))
+        self._series = series
+        self._plan_series = {name: [list(accumulate(row)) for row in rows] for name, rows in self._plan_flows.items()}
+        self._cohort_series = {name: [list(accumulate(row)) for row in rows] for name, rows in self._cohort_flows.items()}
+
+    # ------------------------------------------------------------------
+    # Period helpers
+    # ------------------------------------------------------------------
+
+    def _slot(self, month: Optional[str] = None) -> int:
+        """Offset of a 'YYYY-MM' month (default: latest month in the data)."""
+        if not self.months:
+            raise ValueError("No subscription data loaded")
+        if month is None:
+            return self.months - 1
+        slot = month_index(month) - self.first_month
+        if not 0 <= slot < self.months:
+            raise ValueError(f"{month} is outside the loaded data ({month_label(self.first_month)}"
+                             f" to {month_label(self.first_month + self.months - 1)})")
+        return slot
+
+    def _period_slots(self, period: str) -> Tuple[int, int, str]:
+        """Resolve a period to inclusive month offsets and a label."""
+        latest = self.months - 1
+        if period in ('last_month', 'this_month'):
+            start = end = latest
+        elif period == 'last_quarter':
+            end = latest
+            start = max(0, end - 2)
+        elif _LAST_N_RE.match(period):
+            end = latest
+            start = max(0, end - int(_LAST_N_RE.match(period).group(1)) + 1)
+        elif _MONTH_RE.match(period):
+            start = end = self._slot(period)
+        elif _QUARTER_RE.match(period):
+            year, quarter = _QUARTER_RE.match(period).groups()
+            first = int(year) * 12 + (int(quarter) - 1) * 3 - self.first_month
+            start, end = max(first, 0), min(first + 2, latest)
+            if start > end:
+                raise ValueError(f"{period} is outside the loaded data")
+        else:
+            raise ValueError(f"Unrecognised period '{period}'")
+        label = month_label(self.first_month + start)
+        if end != start:
+            label += f" to {month_label(self.first_month + end)}"
+        return start, end, label
+
+    def _value(self, name: str, slot: int) -> float:
+        return float(self._series[name][slot]) if slot >= 0 else 0.0
+
+    def _window_sum(self, name: str, start: int, end: int) -> float:
+        return float(sum(self._series[name][start:end + 1]))
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def movement(self, month: Optional[str] = None) -> MRRMovement:
+        """MRR movement breakdown for a month (default: latest)"""
+        slot = self._slot(month)
+        mrr = self._value('mrr', slot)
+        previous = self._value('mrr', slot - 1)
+        flows = {name: self._value(name, slot) for name in (
+            'new_mrr', 'expansion_mrr', 'contraction_mrr', 'churned_mrr', 'reactivation_mrr')}
+        growth = _ratio(mrr - previous, previous)
+        return MRRMovement(
+            month=month_label(self.first_month + slot),
+            mrr=round(mrr, 2),
+            arr=round(mrr * 12, 2),
+            customers=int(self._value('customers', slot)),
+            new_mrr=round(flows['new_mrr'], 2),
+            expansion_mrr=round(flows['expansion_mrr'], 2),
+            contraction_mrr=round(flows['contraction_mrr'], 2),
+            churned_mrr=round(flows['churned_mrr'], 2),
+            reactivation_mrr=round(flows['reactivation_mrr'], 2),
+            net_new_mrr=round(mrr - previous, 2),
+            new_customers=int(self._value('new_customers', slot)),
+            churned_customers=int(self._value('churned_customers', slot)),
+            mom_growth_percent=_round(None if growth is None else growth * 100, 1),
+        )
+
+    def calculate_mrr(self, month: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Current MRR, ARR, movements and plan mix
+
+        Args:
+            month: 'YYYY-MM' (defaults to the latest month in the data)
+
+        Returns:
+            Movement fields plus 'by_plan' rows (plan, customers, mrr, percent)
+        """
+        result = asdict(self.movement(month))
+        slot = self._slot(month)
+        total = result['mrr']
+        by_plan = []
+        for code, name in enumerate(self._plan_codes):
+            customers = int(round(float(self._plan_series['customers'][code][slot])))
+            mrr = float(self._plan_series['mrr'][code][slot])
+            if customers <= 0 and abs(mrr) < 0.005:
+                continue
+            by_plan.append({
+                'plan': name or 'unspecified',
+                'customers': customers,
+                'mrr': round(mrr, 2),
+                'percent_of_total': round(mrr / total * 100, 1) if total else 0.0,
+            })
+        result['by_plan'] = sorted(by_plan, key=lambda row: row['mrr'], reverse=True)
+        return result
+
+    def calculate_churn(self, period: str = 'last_month') -> Dict[str, Any]:
+        """
+        Customer and revenue churn for the cohort active at the period start
+
+        Args:
+            period: 'last_month', 'last_quarter', 'last_N_months', 'YYYY-MM' or 'YYYY-Qn'
+
+        Returns:
+            Churn rates (percent), churned customers/MRR and net revenue retention
+        """
+        start, end, label = self._period_slots(period)
+        opening_customers = self._value('customers', start - 1)
+        opening_mrr = self._value('mrr', start - 1)
+        churned_customers = self._window_sum('churned_customers', start, end)
+        churned_mrr = self._window_sum('churned_mrr', start, end)
+        contraction = self._window_sum('contraction_mrr', start, end)
+        expansion = self._window_sum('expansion_mrr', start, end)
+        customer_rate = _ratio(churned_customers, opening_customers)
+        revenue_rate = _ratio(churned_mrr + contraction, opening_mrr)
+        nrr = _ratio(opening_mrr + expansion - contraction - churned_mrr, opening_mrr)
+        months = end - start + 1
+        return {
+            'period': label,
+            'months': months,
+            'starting_customers': int(opening_customers),
+            'starting_mrr': round(opening_mrr, 2),
+            'churned_customers': int(churned_customers),
+            'churned_mrr': round(churned_mrr, 2),
+            'contraction_mrr': round(contraction, 2),
+            'customer_churn_rate': _round(None if customer_rate is None else customer_rate * 100),
+            'revenue_churn_rate': _round(None if revenue_rate is None else revenue_rate * 100),
+            'monthly_customer_churn_rate': _round(
+                None if customer_rate is None else (1 - (1 - min(customer_rate, 1.0)) ** (1 / months)) * 100),
+            'net_revenue_retention': _round(None if nrr is None else nrr * 100, 1),
+        }
+
+    def calculate_unit_economics(self, cac: Optional[float] = None, gross_margin: Optional[float] = None,
+                                 churn_window: int = 3) -> Dict[str, Any]:
+        """
+        ARPU, LTV, LTV:CAC and CAC payback
+
+        Args:
+            cac: Customer acquisition cost (defaults to db_config['cac'])
+            gross_margin: Fraction of revenue kept (defaults to db_config or 1.0)
+            churn_window: Months averaged for the monthly churn rate
+
+        Returns:
+            Unit economics dictionary; ratios are None when undefined
+        """
+        cac = cac if cac is not None else self.db_config.get('cac')
+        margin = gross_margin if gross_margin is not None else float(self.db_config.get('gross_margin', 1.0))
+        latest = self.months - 1
+        customers = self._value('customers', latest)
+        arpu = _ratio(self._value('mrr', latest), customers) or 0.0
+        churn = self.calculate_churn(f'last_{max(churn_window, 1)}_months')
+        monthly_churn = (churn['monthly_customer_churn_rate'] or 0.0) / 100
+        ltv = arpu * margin / monthly_churn if monthly_churn else None
+        return {
+            'arpu': round(arpu, 2),
+            'monthly_churn_rate': round(monthly_churn * 100, 2),
+            'gross_margin': margin,
+            'ltv': _round(ltv),
+            'cac': cac,
+            'ltv_cac_ratio': _round(ltv / cac if ltv is not None and cac else None, 1),
+            'payback_months': _round(cac / (arpu * margin) if cac and arpu and margin else None, 1),
+        }
+
+    def analyze_growth(self, periods: int = 12) -> Dict[str, Any]:
+        """
+        Month-by-month growth over the last `periods` months
+
+        Returns:
+            'months' rows (movements plus quick ratio), compound monthly
+            growth rate and average quick ratio
+        """
+        if not self.months:
+            raise ValueError("No subscription data loaded")
+        start = max(0, self.months - periods)
+        rows = []
+        ratios = []
+        for slot in range(start, self.months):
+            row = asdict(self.movement(month_label(self.first_month + slot)))
+            gained = row['new_mrr'] + row['expansion_mrr'] + row['reactivation_mrr']
+            lost = row['churned_mrr'] + row['contraction_mrr']
+            row['quick_ratio'] = _round(gained / lost if lost else None, 1)
+            if row['quick_ratio'] is not None:
+                ratios.append(row['quick_ratio'])
+            rows.append(row)
+        opening = self._value('mrr', start - 1) if start else rows[0]['mrr']
+        closing = rows[-1]['mrr']
+        spans = len(rows) if start else len(rows) - 1
+        cmgr = ((closing / opening) ** (1 / spans) - 1) * 100 if opening > 0 and closing > 0 and spans else None
+        return {
+            'periods': len(rows),
+            'months': rows,
+            'compound_monthly_growth_rate': _round(cmgr),
+            'average_quick_ratio': _round(sum(ratios) / len(ratios) if ratios else None, 1),
+        }
+
+    def calculate_cohorts(self, months: int = 36) -> Dict[str, Any]:
+        """
+        Signup-month x active-month retention tables
+
+        A customer's cohort is the first month they had MRR. Cell ``[c][k]``
+        is measured at the end of month ``c + k``; customers who churn and
+        come back count again from their reactivation month.
+
+        Args:
+            months: Number of most recent signup cohorts (and ages) to include
+
+        Returns:
+            'cohorts' rows (signup month, size, starting MRR, per-age
+            'retention' and 'net_revenue_retention' percentages) and the
+            size-weighted averages per age across cohorts
+        """
+        if not self.months:
+            raise ValueError("No subscription data loaded")
+        heads, mrr = self._cohort_series['customers'], self._cohort_series['mrr']
+        first = max(0, self.months - months)
+        rows = []
+        age_heads = [0.0] * min(months, self.months)
+        age_sizes = [0.0] * len(age_heads)
+        age_mrr = [0.0] * len(age_heads)
+        age_starts = [0.0] * len(age_heads)
+        for row in range(first, self.months):
+            size, start = float(heads[row][0]), float(mrr[row][0])
+            if size <= 0:
+                continue
+            ages = min(self.months - row, months)
+            retained = [float(value) for value in heads[row][:ages]]
+            revenue = [float(value) for value in mrr[row][:ages]]
+            for age in range(ages):
+                age_heads[age] += retained[age]
+                age_sizes[age] += size
+                age_mrr[age] += revenue[age]
+                age_starts[age] += start
+            rows.append({
+                'cohort': month_label(self.first_month + row),
+                'customers': int(round(size)),
+                'starting_mrr': round(start, 2),
+                'retention': [round(value / size * 100, 1) for value in retained],
+                'net_revenue_retention': [_round(_ratio(value * 100, start), 1) for value in revenue],
+            })
+        return {
+            'as_of': month_label(self.first_month + self.months - 1),
+            'cohorts': rows,
+            'average_retention': [_round(_ratio(value * 100, total), 1) for value, total in zip(age_heads, age_sizes)],
+            'average_net_revenue_retention': [
+                _round(_ratio(value * 100, total), 1) for value, total in zip(age_mrr, age_starts)
+            ],
+        }
+
+
+# Example usage for testing
+if __name__ == '__main__':
+    import random
+
+    rng = random.Random(7)
+    plans = {'Starter': 30.0, 'Pro': 90.0, 'Enterprise': 500.0}
+    events = []
+    for customer in range(300):
+        start = rng.randrange(0, 18)
+        plan = rng.choice(list(plans))
+        events.append({'customer_id': f'c{customer}', 'date': month_label(2023 * 12 + start),
+                       'mrr': plans[plan], 'plan': plan})
+        if rng.random() < 0.25:
+            upgrade = 'Enterprise' if plan != 'Enterprise' else 'Pro'
+            events.append({'customer_id': f'c{customer}', 'date': month_label(2023 * 12 + start + rng.randrange(1, 6)),
+                           'mrr': plans[upgrade], 'plan': upgrade})
+        if rng.random() < 0.3:
+            events.append({'customer_id': f'c{customer}', 'date': month_label(2023 * 12 + start + rng.randrange(2, 8)),
+                           'mrr': 0, 'plan': plan})
+
+    latest = max(month_index(event['date']) for event in events)
+    calc = RevenueCalculator(db_config={'cac': 250})
+    calc.load_data(source='records', data=[e for e in events if month_index(e['date']) < latest])
+    calc.update(data=[e for e in events if month_index(e['date']) == latest])
+    print(json.dumps(calc.calculate_mrr(), indent=2))
+    print(json.dumps(calc.calculate_churn(period='last_quarter'), indent=2))
+    print(json.dumps(calc.calculate_unit_economics(), indent=2))
+    growth = calc.analyze_growth(periods=12)
+    print(json.dumps({k: v for k, v in growth.items() if k != 'months'}, indent=2))
+    cohorts = calc.calculate_cohorts(months=36)
+    for row in cohorts['cohorts'][-6:]:
+        print(row['cohort'], row['customers'], row['retention'][:6])
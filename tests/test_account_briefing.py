@@ -0,0 +1,61 @@
+"""Tests for near-duplicate folding in the account briefing."""
+
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'memory-account-briefing' / 'scripts'))
+
+from generate_brief import minhash_bands, rank_section, shingles  # noqa: E402
+
+WORDS = (
+    'renewal pricing champion budget rollout onboarding seats contract legal procurement '
+    'security review pilot expansion usage dashboard integration migration deadline quarter '
+    'sponsor workshop training invoice discount forecast risk timeline approval escalation'
+).split()
+
+
+def note_pair(rng, length=40, edits=2):
+    """A note and a copy with `edits` scattered words replaced (Jaccard ~0.8)."""
+    words = [rng.choice(WORDS) + str(rng.randrange(1000)) for _ in range(length)]
+    copy = list(words)
+    for position in range(length // (edits + 1), length, length // (edits + 1))[:edits]:
+        copy[position] = 'changed' + str(rng.randrange(1000))
+    return ' '.join(words), ' '.join(copy)
+
+
+def jaccard(left, right):
+    return len(left & right) / len(left | right)
+
+
+def test_near_duplicate_notes_are_folded():
+    rng = random.Random(3)
+    now = datetime(2026, 1, 1)
+    pairs = [note_pair(rng) for _ in range(200)]
+    similarities = [jaccard(shingles(first), shingles(second)) for first, second in pairs]
+    assert 0.75 <= min(similarities) and max(similarities) <= 0.85
+
+    folded = 0
+    for index, (first, second) in enumerate(pairs):
+        entries = [
+            {'id': f'a{index}', 'content': first, 'created_at': '2025-12-30T00:00:00'},
+            {'id': f'b{index}', 'content': second, 'created_at': '2025-12-29T00:00:00'},
+        ]
+        kept, omitted = rank_section(entries, 'notes', 10, now, 14.0, 90)
+        assert omitted == 0
+        folded += len(kept) == 1
+    # Four bands of two rows share a band at J=0.8 with probability ~0.98.
+    assert folded >= 190
+
+
+def test_unrelated_notes_rarely_share_a_band():
+    rng = random.Random(5)
+    notes = [note_pair(rng)[0] for _ in range(200)]
+    seen = {}
+    collisions = 0
+    for note in notes:
+        bands = minhash_bands(shingles(note))
+        collisions += any(band in seen for band in bands)
+        seen.update(dict.fromkeys(bands))
+    assert collisions <= 2
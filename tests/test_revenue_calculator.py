@@ -0,0 +1,133 @@
+"""Tests for the revenue-calculator metrics engine."""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'revenue-calculator' / 'utils'))
+
+import calculator  # noqa: E402
+from calculator import RevenueCalculator  # noqa: E402
+
+# Jan: A 100, B 200, C 50. Feb: A expands to 150, B churns, D signs up at 90.
+# Mar: B comes back at 200, C contracts to 30.
+FIXTURE = [
+    {'customer_id': 'A', 'date': '2024-01-05', 'mrr': 100, 'plan': 'Starter'},
+    {'customer_id': 'B', 'date': '2024-01-10', 'mrr': 200, 'plan': 'Pro'},
+    {'customer_id': 'C', 'date': '2024-01-20', 'mrr': 50, 'plan': 'Starter'},
+    {'customer_id': 'A', 'date': '2024-02-01', 'mrr': 150, 'plan': 'Pro'},
+    {'customer_id': 'B', 'date': '2024-02-15', 'mrr': 0, 'plan': 'Pro'},
+    {'customer_id': 'D', 'date': '2024-02-20', 'mrr': 90, 'plan': 'Starter'},
+    {'customer_id': 'B', 'date': '2024-03-03', 'mrr': 200, 'plan': 'Pro'},
+    {'customer_id': 'C', 'date': '2024-03-09', 'mrr': 30, 'plan': 'Starter'},
+]
+
+
+def random_events(seed=7, customers=200):
+    """Whole-dollar events, so sums are exact whichever backend adds them."""
+    rng = random.Random(seed)
+    plans = {'Starter': 30, 'Pro': 90, 'Enterprise': 500}
+    events = []
+    for customer in range(customers):
+        month = rng.randrange(0, 18)
+        plan = rng.choice(list(plans))
+        seats = rng.randint(1, 5)
+        while month < 24:
+            events.append({
+                'customer_id': f'c{customer}',
+                'date': f'{2023 + month // 12}-{month % 12 + 1:02d}-{rng.randint(1, 28):02d}',
+                'mrr': plans[plan] * seats,
+                'plan': plan,
+            })
+            roll = rng.random()
+            if roll < 0.08:
+                events.append({
+                    'customer_id': f'c{customer}',
+                    'date': f'{2023 + month // 12}-{month % 12 + 1:02d}-28',
+                    'mrr': 0,
+                    'plan': plan,
+                })
+                month += rng.randint(2, 6)
+            elif roll < 0.2:
+                seats = max(1, seats + rng.choice((-1, 1, 2)))
+            month += 1
+    rng.shuffle(events)
+    return events
+
+
+def report(calc):
+    return {
+        'mrr': calc.calculate_mrr(),
+        'churn': [
+            calc.calculate_churn(period)
+            for period in ('last_month', 'last_quarter', 'last_6_months', '2023-Q4')
+        ],
+        'unit_economics': calc.calculate_unit_economics(cac=900),
+        'growth': calc.analyze_growth(periods=24),
+        'cohorts': calc.calculate_cohorts(),
+    }
+
+
+def test_numpy_and_python_backends_agree(monkeypatch):
+    pytest.importorskip('numpy')
+    events = random_events()
+    with_numpy = RevenueCalculator()
+    with_numpy.load_data('records', events)
+    expected = report(with_numpy)
+
+    monkeypatch.setattr(calculator, 'np', None)
+    pure = RevenueCalculator()
+    pure.load_data('records', events)
+    assert report(pure) == expected
+
+
+def test_incremental_update_matches_full_load():
+    events = random_events(seed=11)
+    full = RevenueCalculator()
+    full.load_data('records', events)
+
+    incremental = RevenueCalculator()
+    incremental.load_data('records', [event for event in events if event['date'] < '2024-07'])
+    for month in range(7, 13):
+        prefix = f'2024-{month:02d}'
+        batch = [event for event in events if event['date'].startswith(prefix)]
+        incremental.update('records', batch)
+    assert incremental.stats['updates'] == 6
+    assert report(incremental) == report(full)
+
+
+def test_fixture_churn_quick_ratio_and_nrr():
+    calc = RevenueCalculator()
+    calc.load_data('records', FIXTURE)
+
+    february = calc.calculate_churn('2024-02')
+    assert february['starting_customers'] == 3
+    assert february['starting_mrr'] == 350.0
+    assert february['churned_customers'] == 1
+    assert february['churned_mrr'] == 200.0
+    assert february['customer_churn_rate'] == 33.33
+    # Revenue churn is lost MRR (churn + contraction) over opening MRR.
+    assert february['revenue_churn_rate'] == 57.14
+    # NRR covers the opening customers only: D's new MRR is left out.
+    assert february['net_revenue_retention'] == 57.1
+
+    march = calc.calculate_churn('2024-03')
+    assert march['starting_mrr'] == 290.0
+    assert march['customer_churn_rate'] == 0.0
+    assert march['revenue_churn_rate'] == 6.9
+    # B's reactivation is not retention of the opening MRR.
+    assert march['net_revenue_retention'] == 93.1
+
+    window = calc.calculate_churn('last_2_months')
+    assert window['period'] == '2024-02 to 2024-03'
+    assert window['revenue_churn_rate'] == 62.86
+    assert window['net_revenue_retention'] == 51.4
+    assert window['monthly_customer_churn_rate'] == 18.35
+
+    # Quick Ratio: (new + expansion + reactivation) / (churned + contraction).
+    growth = {row['month']: row for row in calc.analyze_growth()['months']}
+    assert growth['2024-01']['quick_ratio'] is None
+    assert growth['2024-02']['quick_ratio'] == 0.7
+    assert growth['2024-03']['quick_ratio'] == 10.0